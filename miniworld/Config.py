@@ -45,10 +45,34 @@ class GlobalConfig(JSONConfig.JSONConfig):
     def is_ramdisk_enabled(self):
         pass
 
+    @customizable_attrs("storage", "tmpfs", "size")
+    def get_storage_tmpfs_size(self):
+        pass
+
+    @customizable_attrs("storage", "tmpfs", "overlay_reserve", default="64M")
+    def get_storage_tmpfs_overlay_reserve(self):
+        pass
+
     @customizable_attrs("qemu", "snapshot_boot", default=True)
     def is_qemu_snapshot_boot(self):
         pass
 
+    @customizable_attrs("qemu", "qmp", default=False)
+    def is_qemu_qmp(self):
+        pass
+
+    @customizable_attrs("qemu", "template_boot", default=False)
+    def is_qemu_template_boot(self):
+        pass
+
+    @customizable_attrs("qemu", "warm_pool", default=False)
+    def is_qemu_warm_pool(self):
+        pass
+
+    @customizable_attrs("qemu", "overlay_images_upfront", default=False)
+    def is_qemu_overlay_images_upfront(self):
+        pass
+
     @customizable_attrs("management", "use", default=False)
     def is_management_switch_enabled(self):
         pass
@@ -69,6 +93,10 @@ class GlobalConfig(JSONConfig.JSONConfig):
     def get_log_level(self):
         pass
 
+    @customizable_attrs("shell", "worker_pool", default=False)
+    def is_shell_worker_pool_enabled(self):
+        pass
+
     @customizable_attrs("network_switching_threads", default=100)
     def get_network_switching_threads(self):
         pass
@@ -86,12 +114,13 @@ class GlobalConfig(JSONConfig.JSONConfig):
 
     PROTOCOL_MSG_PACK = "msgpack"
     PROTOCOL_JSON = "json"
+    PROTOCOL_BINARY = "binary"
 
     PROTOCOL_ZMQ_MODE_P2P = "p2p"
     PROTOCOL_ZMQ_MODE_MCAST = "multicast"
 
     @customizable_attrs("network", "protocol", "name",
-                        expected=[PROTOCOL_JSON, PROTOCOL_MSG_PACK],
+                        expected=[PROTOCOL_JSON, PROTOCOL_MSG_PACK, PROTOCOL_BINARY],
                         default=PROTOCOL_JSON)
     def get_protocol(self):
         pass
@@ -102,6 +131,21 @@ class GlobalConfig(JSONConfig.JSONConfig):
     def is_protocol_msgpack(self):
         return self.get_protocol() == self.PROTOCOL_MSG_PACK
 
+    def is_protocol_binary(self):
+        return self.get_protocol() == self.PROTOCOL_BINARY
+
+    PROTOCOL_COMPRESSION_NONE = "none"
+    PROTOCOL_COMPRESSION_ZLIB = "zlib"
+    PROTOCOL_COMPRESSION_ZSTD = "zstd"
+    PROTOCOL_COMPRESSION_LZ4 = "lz4"
+
+    @customizable_attrs("network", "protocol", "compression",
+                        expected=[PROTOCOL_COMPRESSION_NONE, PROTOCOL_COMPRESSION_ZLIB,
+                                  PROTOCOL_COMPRESSION_ZSTD, PROTOCOL_COMPRESSION_LZ4],
+                        default=PROTOCOL_COMPRESSION_NONE)
+    def get_protocol_compression(self):
+        pass
+
     @customizable_attrs("network", "protocol", "zeromq", "mode", default=PROTOCOL_ZMQ_MODE_MCAST)
     def get_protocol_zeromq_mode(self):
         pass
@@ -117,6 +161,22 @@ class GlobalConfig(JSONConfig.JSONConfig):
     def get_time_step(self):
         pass
 
+    DISTANCE_MATRIX_DICT = "dict"
+    DISTANCE_MATRIX_NUMPY = "numpy"
+
+    @customizable_attrs("simulation", "distance_matrix",
+                        expected=[DISTANCE_MATRIX_DICT, DISTANCE_MATRIX_NUMPY],
+                        default=DISTANCE_MATRIX_DICT)
+    def get_distance_matrix_type(self):
+        pass
+
+    def is_distance_matrix_numpy(self):
+        return self.get_distance_matrix_type() == self.DISTANCE_MATRIX_NUMPY
+
+    @customizable_attrs("simulation", "spatial_index", default=False)
+    def is_spatial_index_enabled(self):
+        pass
+
     # @customizable_attrs("network", "protocol", "zeromq", "precalculate_distance_matrix", default=False)
     # def is_precalculate_distance_matrix(self):
     #     pass
@@ -125,6 +185,18 @@ class GlobalConfig(JSONConfig.JSONConfig):
     def is_publish_only_new_distance_matrices(self):
         pass
 
+    @customizable_attrs("network", "protocol", "zeromq", "keyframe_interval", default=10)
+    def get_distance_matrix_keyframe_interval(self):
+        pass
+
+    @customizable_attrs("network", "protocol", "zeromq", "max_step_lag", default=0)
+    def get_zeromq_max_step_lag(self):
+        pass
+
+    @customizable_attrs("network", "protocol", "zeromq", "publish_coordinates", default=False)
+    def is_publish_coordinates(self):
+        pass
+
     @customizable_attrs("network", "protocol", "zeromq", "publish_individual_distance_matrices", default=False)
     def is_publish_individual_distance_matrices(self):
         pass
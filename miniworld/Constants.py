@@ -13,6 +13,9 @@ PATH_TMP = "/tmp/%s" % PROJECT_NAME
 # logs here
 PATH_LOGS = join(PATH_TMP, "logs/")
 
+# per-run hot files go here (if the tmpfs is enabled)
+PATH_TMPFS = join(PATH_TMP, "tmpfs")
+
 PATH_MARBURG_OSM_MAP = join('%s' % os.getcwd(), 'osm_marburg.db')
 
 # relative to cwd
@@ -98,12 +98,17 @@ class ScenarioConfig(JSONConfig.JSONConfig):
     def is_parallel_node_starting(self):
         pass
 
+    @customizable_attrs("provisioning", "boot_admission", default=False)
+    def is_provisioning_boot_admission(self):
+        pass
+
     @customizable_attrs("provisioning", "overlay_images", default=[])
     def get_overlay_images(self):
         pass
 
     PROVISIONING_BOOT_MODE_SELECTORS = "selectors"
     PROVISIONING_BOOT_MODE_PEXPECT = "pexpect"
+    PROVISIONING_BOOT_MODE_MULTIPLEXER = "multiplexer"
 
     @customizable_attrs("provisioning", "boot_mode", default=PROVISIONING_BOOT_MODE_SELECTORS)
     def get_provisioning_boot_mode(self):
@@ -115,6 +120,17 @@ class ScenarioConfig(JSONConfig.JSONConfig):
     def is_provisioning_boot_mode_pexpect(self):
         return self.get_provisioning_boot_mode() == self.PROVISIONING_BOOT_MODE_PEXPECT
 
+    def is_provisioning_boot_mode_multiplexer(self):
+        return self.get_provisioning_boot_mode() == self.PROVISIONING_BOOT_MODE_MULTIPLEXER
+
+    @customizable_attrs("provisioning", "asyncio", default=False)
+    def is_provisioning_asyncio(self):
+        pass
+
+    @customizable_attrs("provisioning", "pipelined", default=False)
+    def is_provisioning_pipelined(self):
+        pass
+
     @customizable_attrs("provisioning", "regex_shell_prompt")
     def get_shell_prompt(self, not_null=True):
         pass
@@ -132,6 +148,10 @@ class ScenarioConfig(JSONConfig.JSONConfig):
     def get_link_quality_model(self):
         pass
 
+    @customizable_attrs("network", "links", "lookup_table", default=False)
+    def is_link_quality_lookup_table_enabled(self):
+        pass
+
     @customizable_attrs("network", "links", "bandwidth", default=LinkQualityConstants.LINK_QUALITY_VAL_BANDWIDTH_UNLIMITED)
     def get_link_bandwidth(self):
         """ default is unlimited bandwidth """
@@ -299,6 +319,18 @@ class ScenarioConfig(JSONConfig.JSONConfig):
     def is_network_backend_bridged_execution_mode_one_shell_call(self):
         pass
 
+    @customizable_attrs("network", "backend", "execution_mode", "tc_batch", default=False)
+    def is_network_backend_bridged_execution_mode_tc_batch(self):
+        pass
+
+    @customizable_attrs("network", "backend", "execution_mode", "tc_netlink", default=False)
+    def is_network_backend_bridged_execution_mode_tc_netlink(self):
+        pass
+
+    @customizable_attrs("network", "backend", "execution_mode", "ebtables_ruleset", default=False)
+    def is_network_backend_bridged_execution_mode_ebtables_ruleset(self):
+        pass
+
     # TODO: MOVE TO GENERIC SECTION!
     @json2dict
     @customizable_attrs("network", "backend", "tunnel_endpoints")
@@ -6,7 +6,7 @@ import signal
 import sys
 
 from miniworld.Config import set_global_config, PATH_GLOBAL_CONFIG, config
-from miniworld.Constants import PATH_TMP, PATH_LOGS, PROJECT_NAME, PATH_CLEANUP_SCRIPT
+from miniworld.Constants import PATH_TMP, PATH_LOGS, PATH_TMPFS, PROJECT_NAME, PATH_CLEANUP_SCRIPT
 from miniworld.errors import AlreadyRunning
 from miniworld.log import log, set_log_level
 from miniworld.management.ShellHelper import run_shell
@@ -39,6 +39,7 @@ def init(config_path: str=None, do_init_singletons=True):
 def init_singletons():
     from miniworld.model.singletons import SingletonInit
     SingletonInit.init_singletons()
+    singletons.storage_manager.mount()
 
 
 def clean_miniworld_dir():
@@ -47,6 +48,9 @@ def clean_miniworld_dir():
 
 
 def umount_ramdisk():
+    # the tmpfs for the hot files is mounted inside
+    if os.path.ismount(PATH_TMPFS):
+        run_shell("umount {}".format(PATH_TMPFS))
     run_shell("init", "umount {}".format(PATH_TMP))
 
 
@@ -0,0 +1,147 @@
+import numpy as np
+
+from miniworld.model.collections import DistanceMatrix
+from miniworld.model.spatial import Location
+
+__author__ = 'Nils Schmidt'
+
+NO_SERVER = -1
+
+
+def to_distance_matrix(distance_matrix):
+    if not isinstance(distance_matrix, DistanceMatrix.DistanceMatrix):
+        return DistanceMatrix.factory()(distance_matrix)
+    return distance_matrix
+
+
+def filter_nodes(distance_matrix, node_ids):
+    """
+    Get the entries of the distance matrix which involve one of the `node_ids`.
+
+    Parameters
+    ----------
+    distance_matrix : DistanceMatrix or dict<(int, int), float>
+    node_ids : iterable<int>
+
+    Returns
+    -------
+    DistanceMatrix
+    """
+    xs, ys, distances = to_distance_matrix(distance_matrix).to_arrays()
+    node_ids = np.fromiter(node_ids, dtype=np.int64)
+    is_local = np.isin(xs, node_ids) | np.isin(ys, node_ids)
+    return DistanceMatrix.factory().from_arrays(xs[is_local], ys[is_local], distances[is_local])
+
+
+def get_local_distance_matrix_from_positions(node_ids, lat_lons, local_node_ids, max_distance=None, include_pairs=None):
+    """
+    Compute only the rows (and columns) of the distance matrix for the local nodes of an emulation server.
+    The entries are the same as the ones of :py:meth:`.Nodes.get_distance_matrix` for these nodes.
+
+    Parameters
+    ----------
+    node_ids : list<int>
+        The ids of all nodes in ascending order.
+    lat_lons : numpy.ndarray
+        The (lat, lon) decimal degrees of the nodes with shape (n, 2).
+    local_node_ids : iterable<int>
+    max_distance : float, optional (default is no limit)
+        Only emit the pairs which are closer than `max_distance` meters.
+    include_pairs : set<(int, int)>, optional
+        Node id pairs which are always emitted, regardless of `max_distance`.
+
+    Returns
+    -------
+    DistanceMatrix
+    """
+    node_ids = np.asarray(node_ids, dtype=np.int64)
+    rows = np.nonzero(np.isin(node_ids, np.fromiter(local_node_ids, dtype=np.int64)))[0]
+
+    xs, ys = Location.get_row_pairs(len(node_ids), rows)
+    distances = Location.get_distances_in_m(np.asarray(lat_lons, dtype=float).reshape(-1, 2), xs, ys)
+    xs, ys = node_ids[xs], node_ids[ys]
+
+    if max_distance is not None:
+        is_emitted = distances < max_distance
+        if include_pairs:
+            max_node_id = node_ids.max() + 1
+            include_keys = np.array([x * max_node_id + y for x, y in include_pairs], dtype=np.int64)
+            is_emitted |= np.isin(xs * max_node_id + ys, include_keys)
+        xs, ys, distances = xs[is_emitted], ys[is_emitted], distances[is_emitted]
+
+    return DistanceMatrix.factory().from_arrays(xs, ys, distances)
+
+
+class DistanceMatrixPartitioner:
+    """
+    Splits the distance matrix among the emulation servers (distributed mode).
+
+    The server of each node is precomputed as an array indexed by the node id,
+    so that the entries of the whole matrix are assigned to the servers with a few vectorized operations.
+
+    Attributes
+    ----------
+    server_node_mapping : dict<int, list<int>>
+        Stores for each emulation server the list of nodes it maintains.
+    server_ids : list<int>
+    node_servers : numpy.ndarray
+        For each node id the index of its server in `server_ids`. `NO_SERVER` if no server maintains the node.
+    """
+
+    def __init__(self, server_node_mapping):
+        self.server_node_mapping = server_node_mapping
+        self.server_ids = list(server_node_mapping.keys())
+
+        max_node_id = max((max(nodes) for nodes in server_node_mapping.values() if nodes), default=0)
+        self.node_servers = np.full(max_node_id + 1, NO_SERVER, dtype=np.int64)
+        for idx, nodes in enumerate(server_node_mapping.values()):
+            self.node_servers[np.fromiter(nodes, dtype=np.int64)] = idx
+
+    def get_servers_for_nodes(self, node_ids):
+        """
+        Parameters
+        ----------
+        node_ids : numpy.ndarray
+
+        Returns
+        -------
+        numpy.ndarray
+            The server index for each node.
+        """
+        res = np.full(len(node_ids), NO_SERVER, dtype=np.int64)
+        is_known = (node_ids >= 0) & (node_ids < len(self.node_servers))
+        res[is_known] = self.node_servers[node_ids[is_known]]
+        return res
+
+    def get_server_for_node(self, node_id):
+        """
+        Returns
+        -------
+        int
+            The server id, None if no server maintains the node.
+        """
+        idx = self.get_servers_for_nodes(np.array([node_id], dtype=np.int64))[0]
+        if idx != NO_SERVER:
+            return self.server_ids[idx]
+
+    def partition(self, distance_matrix):
+        """
+        Assign each entry to the servers which maintain one of the two nodes.
+
+        Parameters
+        ----------
+        distance_matrix : DistanceMatrix or dict<(int, int), float>
+
+        Returns
+        -------
+        dict<int, DistanceMatrix>
+            Distance matrix for each server
+        """
+        xs, ys, distances = to_distance_matrix(distance_matrix).to_arrays()
+        servers_x, servers_y = self.get_servers_for_nodes(xs), self.get_servers_for_nodes(ys)
+
+        res = {}
+        for idx, server_id in enumerate(self.server_ids):
+            is_server = (servers_x == idx) | (servers_y == idx)
+            res[server_id] = DistanceMatrix.factory().from_arrays(xs[is_server], ys[is_server], distances[is_server])
+        return res
@@ -15,6 +15,8 @@ def factory():
 class ServerScore(object):
     SCORE_CPU = "cpu"
     SCORE_FREE_MEM = "free_mem"
+    SCORE_CPU_LOAD = "cpu_load"
+    SCORE_IO_WAIT = "io_wait"
 
     def get_score(self):
         # in MB
@@ -29,6 +31,25 @@ class ServerScore(object):
                 self.SCORE_FREE_MEM: free_mem
             }
 
+    @staticmethod
+    def get_host_load():
+        """
+        The current load of the host.
+        CPU load and I/O wait are measured since the last call (in percent).
+
+        Returns
+        -------
+        dict
+        """
+        cpu_times = psutil.cpu_times_percent(interval=None)
+        return \
+            {
+                ServerScore.SCORE_CPU_LOAD: 100.0 - cpu_times.idle - getattr(cpu_times, "iowait", 0.0),
+                ServerScore.SCORE_IO_WAIT: getattr(cpu_times, "iowait", 0.0),
+                # in MB
+                ServerScore.SCORE_FREE_MEM: psutil.virtual_memory().available / (1024 ** 2)
+            }
+
     @staticmethod
     def get_cpu_score(score):
         return score[ServerScore.SCORE_CPU]
@@ -1,12 +1,17 @@
+import errno
 import os
 import re
 import selectors
 import shlex
+import shutil
 import subprocess
+import sys
+import uuid
 from collections import defaultdict
 from subprocess import CalledProcessError
 from threading import Lock
 
+from miniworld.Config import config
 from miniworld.concurrency.ExceptionStopThread import ExceptionStopThread
 from miniworld.log import get_node_logger, log
 from miniworld.model.singletons.Resetable import Resetable
@@ -30,6 +35,10 @@ class BackgroundProcessError(ShellHelperError):
     pass
 
 
+class ShellWorkerError(ShellHelperError):
+    pass
+
+
 # TODO: DOC
 
 
@@ -136,6 +145,31 @@ def run_shell_with_input(cmd, _input):
         raise MyCalledProcessError(p.returncode, p.args, output=stderr)
 
 
+def run_batch_shell_with_input(cmd, _input):
+    """
+    Run the shell command `cmd` (e.g. a batch mode like `tc -force -batch -`) and supply `_input` as stdin.
+    In contrast to :py:func:`.run_shell_with_input`, a non-zero exit code does not raise,
+    so that the caller can map the errors in stderr back to the input.
+
+    Parameters
+    ----------
+    cmd : str
+    _input : str
+
+    Returns
+    -------
+    int, str, str
+        The return code, stdout and stderr.
+    """
+    log.info("'%s <<<\"%s\"'", cmd, _input)
+
+    cmd = shlex.split(cmd)
+    p = subprocess.Popen(cmd, close_fds=True, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    stdout, stderr = p.communicate(_input.encode())
+    return p.returncode, stdout.decode(errors="replace"), stderr.decode(errors="replace")
+
+
 def fmt_shell_cmd_log_file_prologue(cmd):
     """ Create the prologue for a log file which holds the result of the execution of `cmd` """
     return """$ %s
@@ -260,6 +294,211 @@ class LogWriter(Resetable):
                     self.descriptor_buffers[fd] = self.descriptor_buffers[fd][:newline_idx]
 
 
+class ShellWorker:
+    """
+    A persistent `/bin/sh` coprocess which executes the commands written to its stdin.
+    This avoids forking the (large) python process for each command.
+
+    Each command is framed by a sentinel on stdout (including the exit code) and on stderr.
+    The command is parsed with :py:func:`shlex.split` and quoted again, so it is executed with the same arguments
+    as with :py:func:`.run_shell`. Its stdin is `/dev/null` so that it does not consume the following commands.
+    Like with :py:func:`.run_shell`, the stderr of the command is written to the console
+    and a missing executable raises a :py:class:`FileNotFoundError`.
+
+    Attributes
+    ----------
+    sentinel : bytes
+    process : subprocess.Popen
+    selector : selectors.BaseSelector
+    """
+
+    def __init__(self):
+        self.sentinel = ("__miniworld_sentinel_%s__" % uuid.uuid4().hex).encode()
+        self.process = subprocess.Popen(["/bin/sh"], close_fds=True,
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.process.stdout, selectors.EVENT_READ)
+        self.selector.register(self.process.stderr, selectors.EVENT_READ)
+
+    def run(self, cmd):
+        """
+        Parameters
+        ----------
+        cmd : str
+
+        Returns
+        -------
+        bytes
+            Stdout of the command.
+
+        Raises
+        ------
+        subprocess.CalledProcessError
+            If the command exited with a non-zero exit code.
+        FileNotFoundError
+            If the executable does not exist.
+        ShellWorkerError
+            If the shell died.
+        """
+        cmd_as_list = shlex.split(cmd)
+        sentinel = self.sentinel.decode()
+        script = "{cmd} </dev/null; printf '\\n{sentinel} %d\\n' $?; printf '\\n{sentinel}\\n' >&2\n".format(
+            cmd=' '.join(map(shlex.quote, cmd_as_list)), sentinel=sentinel)
+
+        try:
+            self.process.stdin.write(script.encode())
+            self.process.stdin.flush()
+        except (BrokenPipeError, ValueError) as e:
+            raise ShellWorkerError("Shell worker (PID = %s) died: %s" % (self.process.pid, e))
+
+        stdout, stderr = self._read_frame()
+
+        stdout_sentinel_idx = stdout.rindex(b"\n" + self.sentinel + b" ")
+        returncode = int(stdout[stdout_sentinel_idx + len(self.sentinel) + 2:-1])
+        output = stdout[:stdout_sentinel_idx]
+        stderr = stderr[:-len(self.sentinel) - 2]
+
+        if stderr:
+            sys.stderr.write(stderr.decode(errors="replace"))
+            sys.stderr.flush()
+
+        # the shell exits with 127 if the command is not found
+        if returncode == 127 and shutil.which(cmd_as_list[0]) is None:
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), cmd_as_list[0])
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, cmd_as_list, output=output, stderr=stderr)
+        return output
+
+    def _read_frame(self):
+        """
+        Read stdout and stderr until both sentinels have been read.
+        Both are read concurrently, otherwise the command may block on a full pipe.
+
+        Returns
+        -------
+        bytes, bytes
+        """
+        buffers = {self.process.stdout: b"", self.process.stderr: b""}
+        done = {self.process.stdout: False, self.process.stderr: False}
+
+        def is_done(fileobj):
+            data = buffers[fileobj]
+            if fileobj is self.process.stdout:
+                idx = data.rfind(b"\n" + self.sentinel + b" ")
+                return idx >= 0 and data.endswith(b"\n")
+            return data.endswith(b"\n" + self.sentinel + b"\n")
+
+        while not all(done.values()):
+            for key, _ in self.selector.select():
+                fileobj = key.fileobj
+                if done[fileobj]:
+                    continue
+                data = os.read(fileobj.fileno(), 65536)
+                if not data:
+                    raise ShellWorkerError("Shell worker (PID = %s) died" % self.process.pid)
+                buffers[fileobj] += data
+                done[fileobj] = is_done(fileobj)
+
+        return buffers[self.process.stdout], buffers[self.process.stderr]
+
+    def close(self):
+        self.selector.close()
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        try:
+            self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.process.stdout.close()
+        self.process.stderr.close()
+
+
+class ShellWorkerPool:
+    """
+    Pool of :py:class:`.ShellWorker`. Each thread checks out an idle worker for a command,
+    hence the pool grows to the number of threads which run commands concurrently (e.g. the thread pool of
+    :py:meth:`.CommandStore.run_commands`) and the workers are reused across thread pools.
+
+    Attributes
+    ----------
+    idle_workers : list<ShellWorker>
+    workers : list<ShellWorker>
+    lock : Lock
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.idle_workers = []
+        self.workers = []
+
+    def acquire(self):
+        with self.lock:
+            if self.idle_workers:
+                return self.idle_workers.pop()
+            worker = ShellWorker()
+            self.workers.append(worker)
+            return worker
+
+    def release(self, worker):
+        with self.lock:
+            self.idle_workers.append(worker)
+
+    def discard(self, worker):
+        """
+        Stop the `worker`, e.g. because it may be in the middle of a frame.
+        """
+        with self.lock:
+            self.workers.remove(worker)
+        worker.process.kill()
+        worker.close()
+
+    def run(self, cmd):
+        """
+        Run `cmd` in an idle shell worker.
+        Falls back to :py:func:`.run_shell` if the worker died.
+
+        Parameters
+        ----------
+        cmd : str
+
+        Returns
+        -------
+        bytes
+
+        Raises
+        ------
+        subprocess.CalledProcessError
+        FileNotFoundError
+        """
+        worker = self.acquire()
+        try:
+            output = worker.run(cmd)
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            # the frame has been read completely
+            self.release(worker)
+            raise
+        except ShellWorkerError as e:
+            self.discard(worker)
+            log.warning("%s. Running '%s' without shell worker ...", e, cmd)
+            return run_shell(cmd)
+        except BaseException:
+            self.discard(worker)
+            raise
+
+        self.release(worker)
+        return output
+
+    def close(self):
+        with self.lock:
+            for worker in self.workers:
+                worker.close()
+            self.workers = []
+            self.idle_workers = []
+
+
 FOREGROUND_SHELL_LOG_PATH = PathUtil.get_log_file_path("foreground_shell_commands.txt")
 
 
@@ -281,11 +520,14 @@ class ShellHelper(Resetable):
     lock
     subprocess : list<subprocess.Popen>
     bg_checker_thread : ExceptionStopThread
+    worker_pool : ShellWorkerPool
+        Executes the foreground commands if enabled in the config.
     """
 
     lock = Lock()
     subprocesses = []
     log_writer = None
+    worker_pool = None
 
     def __init__(self, garbage_collect=True):
         """
@@ -368,7 +610,10 @@ class ShellHelper(Resetable):
         nlog.info('%s: %s', '>>> '.join(prefixes), cmd)
 
         try:
-            output = run_shell(cmd)
+            if config.is_shell_worker_pool_enabled():
+                output = self.get_worker_pool().run(cmd)
+            else:
+                output = run_shell(cmd)
             with open(FOREGROUND_SHELL_LOG_PATH, "a") as f:
                 f.write("%s '%s'\n:%s\n" % (prefix_str, cmd, output))
 
@@ -378,6 +623,12 @@ class ShellHelper(Resetable):
             log.exception(e)
             raise
 
+    def get_worker_pool(self):
+        with self.lock:
+            if self.worker_pool is None:
+                self.worker_pool = ShellWorkerPool()
+            return self.worker_pool
+
     # TODO: Ticket #2
     def run_shell_async(self, node_name, cmd, prefixes=None, take_process_ownership=True, supervise_process=True):
         """
@@ -464,5 +715,10 @@ class ShellHelper(Resetable):
             log.debug("cleared subprocesses index ...")
             self.subprocesses = []
 
+            if self.worker_pool:
+                log.info("stopping %s shell workers", len(self.worker_pool.workers))
+                self.worker_pool.close()
+                self.worker_pool = None
+
             if self.log_writer:
                 self.log_writer.start()
@@ -5,7 +5,7 @@ import json
 import logging
 import math
 import threading
-from collections import OrderedDict, defaultdict
+from collections import defaultdict
 from contextlib import contextmanager
 from copy import deepcopy
 from io import StringIO
@@ -23,6 +23,7 @@ from miniworld.concurrency.ExceptionStopThread import ExceptionStopThread
 from miniworld.errors import SimulationStateAlreadyStarted, SimulationStateStartFailed, Base
 from miniworld.log import get_logger, get_stdout_handler
 from miniworld.log import log
+from miniworld.management import DistanceMatrixPartitioner
 from miniworld.management.RunLoop import RunLoop
 from miniworld.management.emulation import NodeStarter
 from miniworld.management.spatial import MovementDirectorFactory
@@ -37,6 +38,7 @@ from miniworld.model.network.interface.Interface import HubWiFi, Management
 from miniworld.model.network.linkqualitymodels import LinkQualityModel, LinkQualityConstants
 from miniworld.model.singletons.Resetable import Resetable
 from miniworld.model.singletons.Singletons import singletons
+from miniworld.rpc.zeromq.NodePositions import NodePositions
 from miniworld.util import PathUtil, ConcurrencyUtil
 
 __author__ = 'Nils Schmidt'
@@ -96,6 +98,8 @@ class SimulationManager(Resetable, object):
 
     distance_matrix : dict< (int, int), int)
     distance_matrix_hubwifi : dict< (int, int), int)
+    link_quality_matrix : dict<(int, int), (bool, dict)>
+        The link quality which has been applied the last time for each node pair.
 
     resets : int
         The number of times an experiment has been started/stopped
@@ -138,6 +142,7 @@ class SimulationManager(Resetable, object):
         self.link_quality_model = None
         self.distance_matrix = {}
         self.distance_matrix_hubwifi = {}
+        self.link_quality_matrix = {}
 
         self.network_backend = None
         self.resets += 1
@@ -338,7 +343,8 @@ class SimulationManager(Resetable, object):
             # TODO: #41
             # supply the LinkQualityModel the default link settings
             kwargs = dict(bandwidth=scenario_config.get_link_bandwidth(),
-                          loss=LinkQualityConstants.LINK_QUALITY_VAL_LOSS_NONE)
+                          loss=LinkQualityConstants.LINK_QUALITY_VAL_LOSS_NONE,
+                          lookup_table=scenario_config.is_link_quality_lookup_table_enabled())
             self.logger.info("using interface link quality: %s", pformat(kwargs))
 
             # load LinkQualityModel
@@ -392,7 +398,15 @@ class SimulationManager(Resetable, object):
             fun = node.virtualization_layer.run_commands_eager_check_ret_val if validation else node.virtualization_layer.run_commands_eager
             return functools.partial(fun, timeout=timeout)
 
-        if node_id is None:
+        if node_id is None and scenario_config.is_provisioning_asyncio():
+            def get_coroutine(node):
+                fun = node.virtualization_layer.run_commands_eager_check_ret_val_async if validation else node.virtualization_layer.run_commands_eager_async
+                return fun(StringIO(cmd), timeout=timeout)
+
+            results = ConcurrencyUtil.run_coroutines(get_coroutine(node) for node in nodes)
+            return {node.id: result for node, result in zip(nodes, results)}
+
+        elif node_id is None:
             jobs = {}
             res = {}
             with ConcurrencyUtil.node_start_parallel() as executor:
@@ -497,7 +511,7 @@ class SimulationManager(Resetable, object):
             # TODO: #15: support more core xml files + events
 
             if not config.is_mode_distributed():
-                self.movement_director = MovementDirectorFactory.factory(cnt_nodes)
+                self.movement_director = MovementDirectorFactory.factory(cnt_nodes, self.link_quality_model)
                 self.logger.info("%s running ... ", self.movement_director)
 
             if config.is_qemu_snapshot_boot():
@@ -618,22 +632,57 @@ class SimulationManager(Resetable, object):
 
         Parameters
         ----------
-        new_distance_matrix
+        new_distance_matrix : DistanceMatrix
 
         Returns
         -------
         DistanceMatrix
         """
 
-        # TODO: #52: maybe numpy is faster for comparing matrices
-        # new dict with entries present in the first set, but not in the second
+        # new matrix with entries present in the first matrix, but not in the second
         # do not take the distance matrix for the CentralHub into account (doesn't change)
-        distance_matrix_diff = OrderedDict(list(
-            OrderedSet(new_distance_matrix.items()) - OrderedSet(self.distance_matrix.items())))
+        distance_matrix_diff = new_distance_matrix.diff(self.distance_matrix)
+
+        self.distance_matrix = new_distance_matrix.copy()
+
+        return distance_matrix_diff
+
+    def get_link_quality_diff(self, distance_matrix_diff):
+        """
+        Ask the :py:class:`.LinkQualityModel` for the link quality of the changed distances
+        and keep only the node pairs whose link quality changed since it has been applied the last time.
+        For nodes which are neither connected before nor after, the link quality is not compared.
 
-        self.distance_matrix = deepcopy(new_distance_matrix)
+        This method is not idempotent.
+
+        Parameters
+        ----------
+        distance_matrix_diff : DistanceMatrix
 
-        return DistanceMatrix.factory()(distance_matrix_diff)
+        Returns
+        -------
+        list<((int, int), float, (bool, dict))>
+            The node ids, the distance and the link quality (connected, link quality dict).
+        """
+        # assume upper triangular matrix
+        # of course do not connected to itself!
+        changed_distances = [(key, distance) for key, distance in distance_matrix_diff.items() if key[0] < key[1]]
+        all_connected, link_qualities = self.link_quality_model.distances_2_link_qualities(
+            [distance for _, distance in changed_distances])
+
+        link_quality_diff = []
+        for (key, distance), connected, link_quality_dict in zip(changed_distances, all_connected, link_qualities):
+            connected = bool(connected)
+            old_link_quality = self.link_quality_matrix.get(key)
+            if old_link_quality is not None:
+                old_connected, old_link_quality_dict = old_link_quality
+                if connected == old_connected and (not connected or link_quality_dict == old_link_quality_dict):
+                    continue
+
+            self.link_quality_matrix[key] = connected, link_quality_dict
+            link_quality_diff.append((key, distance, (connected, link_quality_dict)))
+
+        return link_quality_diff
 
     ###############################################
     # Simulation stepping
@@ -647,6 +696,8 @@ class SimulationManager(Resetable, object):
 
         If the distance matrix did not change between steps or no `py:class:`.MovementDirector` exists,
         no actions are done at all.
+        Changed distances are mapped to link qualities first, only node pairs whose link quality changed
+        are adjusted (see :py:meth:`.get_link_quality_diff`).
 
         The distance matrix gets updated with the distances for the :py:class:`.CentralHub`.
         Each node which has a :py:class:`.HubWiFi` interface, has no distance to the :py:class:`.CentralHub`.
@@ -683,31 +734,34 @@ class SimulationManager(Resetable, object):
                 if distance_matrix is None:
                     raise ValueError("The supplied distance matrix is invalid: '%s", distance_matrix)
 
+                if not isinstance(distance_matrix, DistanceMatrix.DistanceMatrix):
+                    distance_matrix = DistanceMatrix.factory()(distance_matrix)
+
                 singletons.network_manager.before_simulation_step(self, self.current_step, self.network_backend,
                                                                   self.get_emulation_nodes())
 
                 distance_matrix_diff = self.get_distance_matrix_diff(distance_matrix)
 
-                # only call the following methods for changes in distance matrix
-                if self.current_step == 0 or distance_matrix_diff:
+                # add distances to CentralHub
+                distance_matrix_diff.update(self.distance_matrix_hubwifi)
+                distance_matrix.update(self.distance_matrix_hubwifi)
+
+                # a changed distance does not necessarily change the link quality
+                link_quality_diff = self.get_link_quality_diff(distance_matrix_diff)
 
-                    self.logger.info("change in distance matrix ...")
+                # only call the following methods for changes in link quality
+                if self.current_step == 0 or link_quality_diff:
 
-                    # add distances to CentralHub
-                    distance_matrix_diff.update(self.distance_matrix_hubwifi)
-                    distance_matrix.update(self.distance_matrix_hubwifi)
+                    self.logger.info("change in link quality ...")
 
                     # NOTE: take distances for CentralHub into account
                     singletons.network_manager.before_distance_matrix_changed(self, self.network_backend,
                                                                               distance_matrix_diff,
                                                                               distance_matrix)
 
-                    # only look at changes in distance matrix
-                    for (x, y), distance in distance_matrix_diff.items():
-                        # assume upper triangular matrix
-                        # of course do not connected to itself!
-                        if x < y:
-                            self._step_inner((x, y), distance)
+                    # only look at changes in link quality
+                    for (x, y), distance, link_quality in link_quality_diff:
+                        self._step_inner((x, y), distance, link_quality=link_quality)
 
                     self.logger.info("stepping %d", steps)
                     singletons.network_manager.after_distance_matrix_changed(self, self.network_backend,
@@ -742,10 +796,13 @@ class SimulationManager(Resetable, object):
             # for emulation_node in self.get_emulation_nodes():
             #     emulation_node.run_post_network_shell_commands()
 
-            with ConcurrencyUtil.network_provision_parallel() as executor:
-                res = executor.map(lambda node: node.run_post_network_shell_commands(), self.get_emulation_nodes())
-                # wait for evaluation!
-                list(res)
+            if scenario_config.is_provisioning_asyncio():
+                ConcurrencyUtil.run_coroutines(node.run_post_network_shell_commands_async() for node in self.get_emulation_nodes())
+            else:
+                with ConcurrencyUtil.network_provision_parallel() as executor:
+                    res = executor.map(lambda node: node.run_post_network_shell_commands(), self.get_emulation_nodes())
+                    # wait for evaluation!
+                    list(res)
 
     def create_snapshots_parallel(self):
         log.info("creating snapshots ...")
@@ -762,7 +819,7 @@ class SimulationManager(Resetable, object):
     def get_emulation_node_for_idx(self, idx):
         return self.nodes_id_mapping[idx]
 
-    def _step_inner(self, node_ids, distance):
+    def _step_inner(self, node_ids, distance, link_quality=None):
         """
         Do a step but only if the node_ids are according to an upper triangular matrix.
 
@@ -770,12 +827,17 @@ class SimulationManager(Resetable, object):
         ----------
         node_ids: (int, int)
         distance: int
+        link_quality : (bool, dict), optional (default is asking the :py:class:`.LinkQualityModel`)
+            The already calculated result of :py:meth:`.LinkQualityModel.distance_2_link_quality`.
         """
         x, y = node_ids
 
         connection_info = ConnectionInfo()
 
-        link_quality_model_says_connected, link_quality_dict = self.link_quality_model.distance_2_link_quality(distance)
+        if link_quality is None:
+            link_quality = self.link_quality_model.distance_2_link_quality(distance)
+        link_quality_model_says_connected, link_quality_dict = link_quality
+        link_quality_model_says_connected = bool(link_quality_model_says_connected)
         self.logger.debug("LinkQuality for %s,%s: %s", x, y, pformat(link_quality_dict))
 
         node_x, node_y = self.get_emulation_node_for_idx(x), self.get_emulation_node_for_idx(y)
@@ -783,8 +845,8 @@ class SimulationManager(Resetable, object):
 
         # no connect yet and shall not be connected -> ignore
         # NOTE: for connected nodes which shall be disconnected we cannot simply break here -> existing connections must be closed
-        if not link_quality_model_says_connected and not singletons.network_manager.connection_store.get_active_node_connection_store().get(
-                key):
+        if not link_quality_model_says_connected and not singletons.network_manager.connection_store.get_connections_for_nodes(
+                *key):
             self.logger.debug("ignoring %s,%s: %s", x, y, pformat(link_quality_dict))
             return
 
@@ -869,9 +931,9 @@ class SimulationManager(Resetable, object):
             if interface_x.is_same_interface_type(interface_y) and not interface_x.is_same_interface_type(Management()):
 
                 # does a connection already exists? (active or inactive)
-                key, conns = singletons.network_manager.connection_store.get_connections_for_nodes_implicit(
+                connection_details = singletons.network_manager.connection_store.get_connection_details(
                     emulation_node_x, emulation_node_y, interface_x, interface_y)
-                if not conns:
+                if connection_details is None:
                     # no connection exists
 
                     # HubWiFi interface: do not change connections, but apply link quality
@@ -926,7 +988,6 @@ class SimulationManager(Resetable, object):
         emulation_node_y: EmulationNode
         connection_info : ConnectionInfo
         """
-        key = emulation_node_x, emulation_node_y
 
         def call_link_quality_adjustment_notifications(connection, link_quality_dict, interface_x, interface_y):
             # no step done yet -> new connection -> set initial link quality, used e.g. to set the initial bandwidth
@@ -947,12 +1008,11 @@ class SimulationManager(Resetable, object):
                 connection, link_quality_model_says_connected, link_quality_dict, self.network_backend,
                 emulation_node_x, emulation_node_y, interface_x, interface_y, connection_info)
 
-        if key in singletons.network_manager.connection_store.get_active_node_connection_store():
-            vals = []
-            for (interface_x, interface_y), connection_details in \
-                    singletons.network_manager.connection_store.get_active_node_connection_store()[key].items():
-                vals.append((interface_x, interface_y, connection_details))
-            for interface_x, interface_y, connection_details in vals:
+        connection_store = singletons.network_manager.connection_store
+        active_connections = connection_store.get_connections_for_nodes(emulation_node_x, emulation_node_y, active=True)
+        if active_connections:
+            for connection_details in active_connections:
+                interface_x, interface_y = connection_details.interfaces
 
                 # get the connection
                 connection = connection_details.connection
@@ -967,13 +1027,14 @@ class SimulationManager(Resetable, object):
 
         # inactive connection moved to active
         else:
-            if link_quality_model_says_connected and key in singletons.network_manager.connection_store.get_inactive_node_connection_store():
-                for (interface_x, interface_y), connection_details in \
-                        singletons.network_manager.connection_store.get_inactive_node_connection_store()[key].items():
+            if link_quality_model_says_connected:
+                for connection_details in connection_store.get_connections_for_nodes(emulation_node_x, emulation_node_y, active=False):
+                    interface_x, interface_y = connection_details.interfaces
+
                     # get the connection
                     connection = connection_details.connection
 
-                    call_link_quality_adjustment_notifications(link_quality_dict, interface_x, interface_y)
+                    call_link_quality_adjustment_notifications(connection, link_quality_dict, interface_x, interface_y)
 
                     singletons.network_manager.link_up(connection, link_quality_dict, self.network_backend,
                                                        emulation_node_x, emulation_node_y, interface_x, interface_y,
@@ -1000,11 +1061,24 @@ class DistributedModeSimulationManager(SimulationManager):
     def reset(self):
         super(DistributedModeSimulationManager, self).reset()
         self._all_nodes_id_mapping = {}
+        self._partitioner = None
+
+    @property
+    def partitioner(self):
+        """
+        Returns
+        -------
+        DistanceMatrixPartitioner
+            For the current server node mapping.
+        """
+        # the scenario config returns a new dict on each call
+        server_node_mapping = scenario_config.get_distributed_server_node_mapping()
+        if self._partitioner is None or self._partitioner.server_node_mapping != server_node_mapping:
+            self._partitioner = DistanceMatrixPartitioner.DistanceMatrixPartitioner(server_node_mapping)
+        return self._partitioner
 
     def get_server_for_node(self, node_id):
-        for server, nodes in scenario_config.get_distributed_server_node_mapping().items():
-            if node_id in nodes:
-                return server
+        return self.partitioner.get_server_for_node(node_id)
 
     def get_emulation_node_for_idx(self, idx):
         try:
@@ -1043,18 +1117,21 @@ class DistributedModeSimulationManager(SimulationManager):
                 res[server_id] = distance_matrix
             return res
         else:
-            # create a dict for each server
-            for server_id in scenario_config.get_distributed_server_ids():
-                res[server_id]
+            return self.partitioner.partition(distance_matrix)
 
-            for (x, y), distance in distance_matrix.items():
-                res[self.get_server_for_node(x)][(x, y)] = distance
-                res[self.get_server_for_node(y)][(x, y)] = distance
 
-            return res
+class SimulationManagerDistributedClient(DistributedModeSimulationManager):
+    """
+    Attributes
+    ----------
+    pairs_in_range : set<(int, int)>
+        The local node pairs which were in range during the last step (coordinate broadcast).
+    """
 
+    def reset(self):
+        super(SimulationManagerDistributedClient, self).reset()
+        self.pairs_in_range = set()
 
-class SimulationManagerDistributedClient(DistributedModeSimulationManager):
     def is_local_node(self, emulation_node_id):
         return emulation_node_id in self.get_local_node_ids()
 
@@ -1103,14 +1180,31 @@ class SimulationManagerDistributedClient(DistributedModeSimulationManager):
         dict<(int, int>, int>>
             Distance matrix for this erver
         """
-        res = {}
-        local_node_ids = self.get_local_node_ids()
-        for (x, y), distance in whole_distance_matrix.items():
-            if x in local_node_ids or y in local_node_ids:
-                res[(x, y)] = distance
-                res[(x, y)] = distance
+        return DistanceMatrixPartitioner.filter_nodes(whole_distance_matrix, self.get_local_node_ids())
 
-        return DistanceMatrix.factory()(res)
+    def get_local_distance_matrix_from_positions(self, node_positions):
+        """
+        Derive the local distance matrix from the positions of all nodes.
+        The result is the same as the one of :py:meth:`.get_local_distance_matrix_to_servers`
+        for the distance matrix of the :py:class:`.MovementDirector`.
+
+        Parameters
+        ----------
+        node_positions : NodePositions
+
+        Returns
+        -------
+        DistanceMatrix
+        """
+        max_distance = node_positions.max_distance
+        distance_matrix = DistanceMatrixPartitioner.get_local_distance_matrix_from_positions(
+            node_positions.node_ids, node_positions.lat_lons, self.get_local_node_ids(),
+            max_distance=max_distance, include_pairs=self.pairs_in_range)
+
+        # NOTE: pairs which were in range during the last step need to be emitted, so that they can be disconnected
+        if max_distance is not None:
+            self.pairs_in_range = {key for key, distance in distance_matrix.items() if distance < max_distance}
+        return distance_matrix
 
     def get_remote_node(self, emulation_node_x, emulation_node_y, interface_x, interface_y):
         """
@@ -1138,8 +1232,8 @@ class SimulationManagerDistributedCoordinator(DistributedModeSimulationManager):
                node_ids=None):
 
         with self.try_simulation(scenario_config):
-            self.movement_director = MovementDirectorFactory.factory(cnt_nodes)
             self.link_quality_model = link_quality_model
+            self.movement_director = MovementDirectorFactory.factory(cnt_nodes, self.link_quality_model)
 
         singletons.zeromq_server.wait_for_scenario_config.set()
 
@@ -1185,7 +1279,7 @@ class SimulationManagerDistributedCoordinator(DistributedModeSimulationManager):
         dict<(int, int), int> or dict<int, dict<(int, int), int>
             The first is the normal distance matrix. The latter for each node the local distance matrix.
         """
-        if config.is_protocol_zeromq_mode_mcast():
+        if config.is_protocol_zeromq_mode_mcast() or isinstance(distance_matrix, NodePositions):
             return distance_matrix
         else:
             return self.map_distance_matrix_to_servers(distance_matrix)
@@ -1232,8 +1326,14 @@ class SimulationManagerDistributedCoordinator(DistributedModeSimulationManager):
 
                 if not distance_matrix:
                     self.movement_director.simulate_one_step()
-                    # TODO: #52: avoid big matrices
-                    distance_matrix = self.movement_director.get_distances_from_nodes()
+                    lat_lons = self.movement_director.get_lat_lons_for_nodes() \
+                        if config.is_publish_coordinates() else None
+                    if lat_lons is not None:
+                        # the servers derive their part of the distance matrix themselves
+                        distance_matrix = NodePositions(lat_lons, self.movement_director.max_connected_distance)
+                    else:
+                        # TODO: #52: avoid big matrices
+                        distance_matrix = self.movement_director.get_distances_from_nodes()
                     distance_matrix = self.transform_distance_matrix(distance_matrix)
 
                 if distance_matrix is None:
@@ -1241,10 +1341,6 @@ class SimulationManagerDistributedCoordinator(DistributedModeSimulationManager):
 
                 self.logger.info("waiting for zeromq server to handle the distance_matrix ...")
 
-                if config.is_publish_only_new_distance_matrices():
-                    pass
-
-                # TODO: implement difference checking
                 singletons.zeromq_server.handle_state_distance_matrix(distance_matrix)
                 self.current_step += 1
 
@@ -0,0 +1,189 @@
+import os
+from collections import OrderedDict, namedtuple
+from threading import Lock
+
+from miniworld.Constants import PATH_TMPFS
+from miniworld.log import log
+from miniworld.management.ShellHelper import run_shell
+from miniworld.util import PathUtil
+
+__author__ = 'Nils Schmidt'
+
+# reservations for the per-run hot files (the overlay reservation is configurable)
+RESERVE_LOG = 1024 * 1024
+RESERVE_ATOMIC_FILE = 1024 * 1024
+
+SIZE_UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+Placement = namedtuple("Placement", ["path", "node_id", "reserve", "on_tmpfs"])
+
+
+def parse_size(size):
+    """
+    Examples
+    --------
+    >>> parse_size("512M")
+    536870912
+    >>> parse_size(4096)
+    4096
+
+    Returns
+    -------
+    int
+        The size in bytes.
+    """
+    if isinstance(size, int):
+        return size
+    size = size.strip().upper()
+    if size[-1:] in SIZE_UNITS:
+        return int(float(size[:-1]) * SIZE_UNITS[size[-1]])
+    return int(size)
+
+
+def get_disk_usage(path):
+    """
+    Returns
+    -------
+    int
+        The allocated bytes of the (sparse) file, 0 if it does not exist (yet).
+    """
+    try:
+        return os.stat(path).st_blocks * 512
+    except OSError:
+        return 0
+
+
+class StorageManager(object):
+    """
+    Places the per-run hot files (qcow2 overlays, unix domain sockets, boot logs, atomic files) on a sized tmpfs.
+
+    Each file reserves capacity on the tmpfs. If the reservation does not fit anymore, the file stays at its
+    location on disk (e.g. the temp dir or the log dir).
+    The placement of a file name does not change during the lifetime of the process, hence the sockets and overlays
+    of the snapshot processes (see :py:class:`.QemuProcessSingletons`) are found again.
+
+    NOTE: An overlay image grows while its node is running. The reservation needs to cover the growth,
+    otherwise the node gets write errors if the tmpfs runs full.
+
+    Attributes
+    ----------
+    path_tmpfs : str
+    capacity : int
+        Size of the tmpfs in bytes. None if the tmpfs is disabled.
+    placements : OrderedDict<str, Placement>
+        The file name and its placement.
+    reserved : int
+        The bytes reserved on the tmpfs.
+    lock : Lock
+    """
+
+    def __init__(self, capacity=None, path_tmpfs=PATH_TMPFS):
+        self.lock = Lock()
+        self.path_tmpfs = path_tmpfs
+        self.capacity = parse_size(capacity) if capacity is not None else None
+        self.placements = OrderedDict()
+        self.reserved = 0
+
+    def is_enabled(self):
+        return self.capacity is not None
+
+    #########################################
+    # tmpfs
+    #########################################
+
+    def mount(self):
+        """ Create the tmpfs if enabled and not mounted yet. """
+        if not self.is_enabled():
+            return
+
+        if not os.path.exists(self.path_tmpfs):
+            os.makedirs(self.path_tmpfs)
+        if not os.path.ismount(self.path_tmpfs):
+            log.info("creating tmpfs (%s bytes) at '%s'", self.capacity, self.path_tmpfs)
+            run_shell("sudo mount -t tmpfs -o size={size} tmpfs {path}".format(size=self.capacity, path=self.path_tmpfs))
+        else:
+            log.info("tmpfs still exists at '%s' ... ", self.path_tmpfs)
+
+    def get_free_tmpfs_space(self):
+        stat = os.statvfs(self.path_tmpfs)
+        return stat.f_bavail * stat.f_frsize
+
+    #########################################
+    # Placement
+    #########################################
+
+    def place(self, file_name, node_id=None, reserve=0, path_disk=None):
+        """
+        Get the path for the hot file `file_name`.
+
+        Parameters
+        ----------
+        file_name : str
+        node_id : int, optional (default is None)
+            The node whose usage is accounted.
+        reserve : int, optional (default is 0)
+            Bytes to reserve on the tmpfs.
+        path_disk : str, optional (default is the path in the temp dir)
+            The path used if the tmpfs is disabled or full.
+
+        Returns
+        -------
+        str
+            The path on the tmpfs, or `path_disk` if disabled or the tmpfs is full.
+        """
+        if path_disk is None:
+            path_disk = PathUtil.get_temp_file_path(file_name)
+        with self.lock:
+            placement = self.placements.get(file_name)
+            if placement is None:
+                placement = self.placements[file_name] = self._place(file_name, node_id, reserve, path_disk)
+            return placement.path
+
+    def _place(self, file_name, node_id, reserve, path_disk):
+        if self.is_enabled() and self.fits(reserve):
+            self.reserved += reserve
+            return Placement(os.path.join(self.path_tmpfs, file_name), node_id, reserve, True)
+
+        if self.is_enabled():
+            log.info("tmpfs full (%s of %s bytes reserved), spilling '%s' over to disk", self.reserved, self.capacity, file_name)
+        return Placement(path_disk, node_id, reserve, False)
+
+    def fits(self, reserve):
+        if self.reserved + reserve > self.capacity:
+            return False
+        # files which are not accounted (e.g. of a previous run) use the space as well
+        try:
+            return reserve <= self.get_free_tmpfs_space()
+        except OSError:
+            return False
+
+    #########################################
+    # Usage
+    #########################################
+
+    def get_usage(self):
+        """
+        Returns
+        -------
+        OrderedDict<int, (int, int)>
+            The bytes used on the tmpfs and disk for each node. Files without a node are accounted for None.
+        """
+        with self.lock:
+            placements = list(self.placements.values())
+
+        usage = OrderedDict()
+        for placement in placements:
+            tmpfs, disk = usage.get(placement.node_id, (0, 0))
+            used = get_disk_usage(placement.path)
+            usage[placement.node_id] = (tmpfs + used, disk) if placement.on_tmpfs else (tmpfs, disk + used)
+        return usage
+
+    def log_usage(self):
+        if not self.is_enabled():
+            return
+
+        usage = self.get_usage()
+        log.info("tmpfs: %s of %s bytes reserved, %s bytes used",
+                 self.reserved, self.capacity, sum(tmpfs for tmpfs, _ in usage.values()))
+        for node_id, (tmpfs, disk) in usage.items():
+            log.debug("storage of node %s: %s bytes on tmpfs, %s bytes on disk", node_id, tmpfs, disk)
@@ -0,0 +1,124 @@
+import contextlib
+import time
+from threading import Condition
+
+from miniworld.log import log
+from miniworld.management.ServerScore import ServerScore
+
+__author__ = 'Nils Schmidt'
+
+# do not admit a boot above this cpu load (percent)
+MAX_CPU_LOAD = 90.0
+# do not admit a boot above this I/O wait (percent)
+MAX_IO_WAIT = 30.0
+# a boot is slow if it took longer than the fastest boot times this factor
+SLOW_BOOT_FACTOR = 1.5
+# interval in which the host load is checked while boots are waiting for admission
+ADMISSION_CHECK_INTERVAL = 0.5
+
+
+class BootScheduler(object):
+    """
+    Admission control for the node boots of the :py:class:`.NodeStarter`.
+
+    Over-subscribing the host with concurrent boots leads to timeouts while waiting for the boot signal.
+    Therefore, the number of concurrent boots is limited and adapted to the per-boot latency:
+    While the boots stay fast (compared to the fastest boot so far), the limit is increased by one.
+    Slow or failed boots halve the limit.
+    Additionally, a boot is only admitted if the host is not overloaded (cpu load, I/O wait, free memory).
+    A single boot is always admitted, otherwise no boot would finish.
+
+    Attributes
+    ----------
+    limit : int
+        The number of concurrent boots.
+    max_limit : int
+    running : int
+        The number of boots in progress.
+    min_free_mem : int
+        Free memory (MB) needed for a boot.
+    fastest_boot : float
+        The duration of the fastest boot so far.
+    host_load : dict
+        The last measured host load, refreshed each `ADMISSION_CHECK_INTERVAL`.
+    cond : Condition
+    """
+
+    def __init__(self, max_limit, min_free_mem=0, limit=1):
+        self.max_limit = max(1, max_limit)
+        self.limit = max(1, min(limit, self.max_limit))
+        self.min_free_mem = min_free_mem
+        self.running = 0
+        self.fastest_boot = None
+        self.cond = Condition()
+
+        # the cpu load is measured since the last call
+        self.host_load = ServerScore.get_host_load()
+        self.t_host_load = time.time()
+
+    @contextlib.contextmanager
+    def admit(self):
+        """
+        Wait until the boot is admitted and account its duration.
+        """
+        self.acquire()
+        t_start = time.time()
+        success = False
+        try:
+            yield
+            success = True
+        finally:
+            self.release(time.time() - t_start, success)
+
+    def acquire(self):
+        with self.cond:
+            while not self.is_admissible():
+                self.cond.wait(ADMISSION_CHECK_INTERVAL)
+            self.running += 1
+
+    def release(self, duration, success):
+        """
+        Parameters
+        ----------
+        duration : float
+            Duration of the boot in seconds.
+        success : bool
+        """
+        with self.cond:
+            self.running -= 1
+            if success and (self.fastest_boot is None or duration < self.fastest_boot):
+                self.fastest_boot = duration
+
+            if success and duration <= self.fastest_boot * SLOW_BOOT_FACTOR:
+                self.limit = min(self.limit + 1, self.max_limit)
+            else:
+                self.limit = max(1, self.limit // 2)
+                log.info("boot took %0.2f seconds (fastest: %s), limiting concurrent boots to %d",
+                         duration, self.fastest_boot, self.limit)
+
+            self.cond.notify_all()
+
+    def is_admissible(self):
+        if self.running == 0:
+            return True
+        if self.running >= self.limit:
+            return False
+        return not self.is_host_overloaded(self.get_host_load())
+
+    def get_host_load(self):
+        # measure over an interval, not between two waiting boots
+        if time.time() - self.t_host_load >= ADMISSION_CHECK_INTERVAL:
+            self.host_load = ServerScore.get_host_load()
+            self.t_host_load = time.time()
+        return self.host_load
+
+    def is_host_overloaded(self, host_load):
+        """
+        Parameters
+        ----------
+        host_load : dict
+            See :py:meth:`.ServerScore.get_host_load`.
+        """
+        return host_load[ServerScore.SCORE_CPU_LOAD] > MAX_CPU_LOAD \
+            or host_load[ServerScore.SCORE_IO_WAIT] > MAX_IO_WAIT \
+            or host_load[ServerScore.SCORE_FREE_MEM] < self.min_free_mem
@@ -2,9 +2,12 @@ from copy import deepcopy
 from threading import Lock, Event
 
 from miniworld.Config import config
+from miniworld.Scenario import scenario_config
 from miniworld.concurrency.ExceptionStopThread import ExceptionStopThread
 from miniworld.errors import Unsupported
 from miniworld.log import log
+from miniworld.management.emulation.BootScheduler import BootScheduler
+from miniworld.model.emulation.Qemu import Qemu
 from miniworld.model.emulation.nodes.virtual.CentralNode import is_central_node_interface
 from miniworld.model.network.backends import NetworkBackends
 from miniworld.model.network.interface.Interface import HubWiFi
@@ -34,6 +37,8 @@ class NodeStarter:
     network_backend_name : str
     event_nodes_started : Event
     lock : Lock
+    boot_scheduler : BootScheduler
+        Admission control for the node starts. None if disabled.
     """
 
     def __init__(self, node_ids, network_backend_name):
@@ -50,6 +55,8 @@ class NodeStarter:
 
         self.thread_check_nodes_started = None
 
+        self.boot_scheduler = None
+
     #################################################
     # Thread methods
     #################################################
@@ -122,6 +129,13 @@ class NodeStarter:
                 # init events for first display
                 singletons.event_system.init_events_for_node(i)
 
+            if scenario_config.is_provisioning_boot_admission():
+                self.boot_scheduler = BootScheduler(ConcurrencyUtil.cpu_count() if scenario_config.is_parallel_node_starting() else 1,
+                                                    min_free_mem=scenario_config.get_qemu_memory_mb())
+
+            if config.is_qemu_overlay_images_upfront():
+                Qemu.create_overlay_images(self.node_ids, path_qemu_base_image)
+
             # wait until all nodes have been started
 
             with ConcurrencyUtil.node_start_parallel() as executor:
@@ -145,6 +159,7 @@ class NodeStarter:
                 #         break
 
             log.info("all qemu instances started ...")
+            singletons.storage_manager.log_usage()
 
             # NOTE: create management switch after all nodes exist!
             management_node = self.start_management_node()
@@ -201,7 +216,11 @@ class NodeStarter:
 
         # TODO: #54,#55
         node = NetworkBackends.get_network_backend_bootstrapper_for_string(self.network_backend_name).emulation_node_type.factory(*args[:1])
-        node.start(args[1], flo_post_boot_script=args[2])
+        if self.boot_scheduler is not None:
+            with self.boot_scheduler.admit():
+                node.start(args[1], flo_post_boot_script=args[2])
+        else:
+            node.start(args[1], flo_post_boot_script=args[2])
 
         with self.lock:
             # keep track of started nodes
@@ -138,7 +138,7 @@ class NetworkManager(Resetable, NetworkBackendNotifications.NetworkBackendNotifi
 
     @property
     def bandwidth(self):
-        return self.connection_store.get_active_node_connection_store().get_link_quality_matrix(
+        return self.connection_store.get_link_quality_matrix(
             include_interfaces=False, key=LinkQualityConstants.LINK_QUALITY_KEY_BANDWIDTH)
 
     def bandwidth_matrix(self):
@@ -220,8 +220,10 @@ class NetworkManager(Resetable, NetworkBackendNotifications.NetworkBackendNotifi
         conns_per_node = defaultdict(set)
 
         # check for new connections whether they are connected
-        for (x, y), distance in full_distance_matrix.items():
-            connected, _ = simulation_manager.link_quality_model.distance_2_link_quality(distance)
+        distances = list(full_distance_matrix.items())
+        all_connected, _ = simulation_manager.link_quality_model.distances_2_link_qualities(
+            [distance for _, distance in distances])
+        for ((x, y), _), connected in zip(distances, all_connected):
             if connected:
                 conns_per_node[x].add(y)
                 conns_per_node[y].add(x)
@@ -110,6 +110,9 @@ class NetworkConfigurator:
         return active_interfaces_per_connection
 
     def run_emulation_node_commands(self, commands_per_emulation_node, ev, cnt_minions=None):
+        if scenario_config.is_provisioning_asyncio():
+            return self.run_emulation_node_commands_async(commands_per_emulation_node, ev)
+
         results = []
         # run over EmulationNode s and set up the network
         with ConcurrencyUtil.network_provision_parallel() as executor:
@@ -132,6 +135,20 @@ class NetworkConfigurator:
             for f in results:
                 f.result()
 
+    def run_emulation_node_commands_async(self, commands_per_emulation_node, ev):
+        """ Same as :py:meth:`.run_emulation_node_commands` but for all nodes concurrently on one event loop. """
+
+        async def _exec(emu_node, commands):
+            if commands:
+                log.debug("network config for node: %s:\n%s", emu_node.id, commands)
+                await emu_node.virtualization_layer.run_commands_eager_check_ret_val_async(StringIO(commands))
+
+            # notify EventSystem
+            ev.update([emu_node.id], 1.0, add=True)
+
+        ConcurrencyUtil.run_coroutines(_exec(emu_node, '\n'.join(commands))
+                                       for emu_node, commands in sorted(commands_per_emulation_node.items()))
+
     def apply_nic_configuration_commands(self, commands_per_node):
         es = singletons.event_system
 
@@ -183,6 +183,21 @@ class ShellCommandSerializer(Resetable):
 
         return res
 
+    def get_all_command_args(self):
+        """
+        Like :py:meth:`.get_all_commands` but includes the id and the prefixes of each command.
+
+        Returns
+        -------
+        list<(str, str, tuple<str>)>
+        """
+        res = []
+        for group in self.group_order:
+            for event, command_store in self.mapping_group_to_event_order_to_cs[group].items():
+                res.extend(command_store.shell_command_args)
+
+        return res
+
     def get_verbose_info(self):
         res = "#Shell commands for network provisioning: "
         for group in self.group_order:
@@ -198,7 +213,7 @@ class ShellCommandSerializer(Resetable):
     # Run the commands ...
     #########################################################
 
-    def run_commands(self, max_workers=None, events_order=None):
+    def run_commands(self, max_workers=None, events_order=None, cmd_filter=None):
         """
 
         Parameters
@@ -206,6 +221,8 @@ class ShellCommandSerializer(Resetable):
         max_workers
         events_order : list<str>
             List of events to filter for. E.g. "bridge".
+        cmd_filter : callable, optional (default is None)
+            Only run the commands for which `cmd_filter(cmd)` is true.
 
         Returns
         -------
@@ -225,7 +242,35 @@ class ShellCommandSerializer(Resetable):
 
             for event in event_order:
                 cs = self.mapping_group_to_event_order_to_cs[group][event]
-                cs.run_commands(max_workers=max_workers)
+                cs.run_commands(max_workers=max_workers, cmd_filter=cmd_filter)
+
+
+    def run_commands_batched(self, is_batched, run_batch, max_workers=None):
+        """
+        Like :py:meth:`.run_commands`, but the commands for which `is_batched(cmd)` is true
+        are collected and executed by `run_batch`.
+        The collected commands are executed before the next event with other commands, so the order of the events is kept.
+
+        Parameters
+        ----------
+        is_batched : callable
+        run_batch : callable
+            Called with the list of the collected command args (id, command, prefixes).
+        max_workers
+        """
+        batch = []
+        for group in self.group_order:
+            for event in self.mapping_group_to_event_order_to_cs[group].get_event_order():
+                cs = self.mapping_group_to_event_order_to_cs[group][event]
+                if any(not is_batched(cmd) for cmd in cs.get_shell_commands()):
+                    if batch:
+                        run_batch(batch)
+                        batch = []
+                    cs.run_commands(max_workers=max_workers, cmd_filter=lambda cmd: not is_batched(cmd))
+                batch.extend(x for x in cs.shell_command_args if is_batched(x[1]))
+
+        if batch:
+            run_batch(batch)
 
 
 class Group2EventMapping(collections.UserDict):
@@ -309,10 +354,14 @@ class CommandStore(Resetable):
 
         return out
 
-    def get_one_shell_call_commands(self):
+    def get_one_shell_call_commands(self, shell_command_args=None):
         """
         Shell commands as sh one-liner.
 
+        Parameters
+        ----------
+        shell_command_args : iterable<(str, str, tuple<str>)>, optional (default is all commands)
+
         Returns
         -------
         list<str>
@@ -320,7 +369,10 @@ class CommandStore(Resetable):
         commands = []
         MAX_ARG_STR_LEN = 131072
 
-        shell_commands = self.get_shell_commands()
+        if shell_command_args is None:
+            shell_commands = self.get_shell_commands()
+        else:
+            shell_commands = [x[1] for x in shell_command_args]
 
         # compress commands to one command with sh -c " cmd_1; ...; cmd_n"
         res = '; '.join(shell_commands)
@@ -349,12 +401,14 @@ class CommandStore(Resetable):
             self.__uniq_shell_commands.add(cmd)
             self.shell_command_args.add(shell_command_arg)
 
-    def run_commands(self, max_workers=None):
+    def run_commands(self, max_workers=None, cmd_filter=None):
         """
 
         Parameters
         ----------
         max_workers
+        cmd_filter : callable, optional (default is None)
+            Only run the commands for which `cmd_filter(cmd)` is true.
 
         Returns
         -------
@@ -363,18 +417,22 @@ class CommandStore(Resetable):
         if max_workers is None:
             max_workers = ConcurrencyUtil.cpu_count()
 
-        if self.shell_command_args:
+        shell_command_args = self.shell_command_args
+        if cmd_filter is not None:
+            shell_command_args = OrderedSet(x for x in shell_command_args if cmd_filter(x[1]))
+
+        if shell_command_args:
             def fun(*args, **kwargs):
                 singletons.shell_helper.run_shell(*args[0], **kwargs)
 
             # run the commands in one shell call
             if scenario_config.is_network_backend_bridged_execution_mode_one_shell_call():
-                _id, cmds, prefixes = self.shell_command_args[0][0], self.get_one_shell_call_commands(), self.shell_command_args[0][2]
+                _id, cmds, prefixes = shell_command_args[0][0], self.get_one_shell_call_commands(shell_command_args), shell_command_args[0][2]
                 for cmd in cmds:
                     singletons.shell_helper.run_shell(_id, cmd, prefixes)
             # run the commands with multiple workers (can also be one worker if backend option is not set to parallel)
             elif scenario_config.is_network_backend_parallel():
                 with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-                    executor.map(fun, self.shell_command_args)
+                    executor.map(fun, shell_command_args)
             elif not scenario_config.is_network_backend_parallel():
-                list(map(fun, self.shell_command_args))
+                list(map(fun, shell_command_args))
@@ -17,20 +17,34 @@ class MovementDirector(MovementDirectorAbstract):
         Name of the movement pattern, count of nodes
     roads :                                     Roads
     nodes :                                     Nodes
+    max_connected_distance :                    float
+        If set, only node pairs within this range (and the ones in range during the last step) are emitted.
+    pairs_in_range :                            set<(int, int)>
+        The node pairs which were in range during the last step.
     """
 
-    def __init__(self, dict_of_movements_with_number_of_nodes):
+    def __init__(self, dict_of_movements_with_number_of_nodes, max_connected_distance=None):
         self.roads = singletons.spatial_singleton.get_roads()
         self.nodes = Nodes(dict_of_movements_with_number_of_nodes)
+        self.max_connected_distance = max_connected_distance
+        self.pairs_in_range = set()
 
     def get_distances_from_nodes(self):
         """
         Returns
         -------
-        dict<(int, int), float>
+        DistanceMatrix
             The distance (meters) matrix for each connection.
         """
-        return self.nodes.get_distance_matrix()
+        if self.max_connected_distance is None:
+            return self.nodes.get_distance_matrix()
+
+        # NOTE: pairs which were in range during the last step need to be emitted, so that they can be disconnected
+        distance_matrix = self.nodes.get_distance_matrix(max_distance=self.max_connected_distance,
+                                                         include_pairs=self.pairs_in_range)
+        self.pairs_in_range = {key for key, distance in distance_matrix.items()
+                               if distance < self.max_connected_distance}
+        return distance_matrix
 
     def get_geo_json_for_roads(self):
         """
@@ -50,6 +64,9 @@ class MovementDirector(MovementDirectorAbstract):
         """
         return self.nodes.get_geo_json()
 
+    def get_lat_lons_for_nodes(self):
+        return self.nodes.get_lat_lons()
+
     def get_coordinates_for_nodes(self):
         """
         Returns
@@ -15,3 +15,13 @@ class MovementDirectorAbstract():
         """
         for node in self.nodes.get_list_of_nodes().values():
             node.step()
+
+    def get_lat_lons_for_nodes(self):
+        """
+        Returns
+        -------
+        numpy.ndarray
+            The (lat, lon) decimal degrees of the nodes from which the distance matrix is calculated.
+            None if the distance matrix is not derived from the positions.
+        """
+        return None
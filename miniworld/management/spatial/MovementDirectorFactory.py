@@ -1,6 +1,7 @@
 from pprint import pformat
 
 from miniworld import log
+from miniworld.Config import config
 from miniworld.Scenario import scenario_config, ScenarioConfig
 
 TOPOLOGY_MODE_MANUAL = "manual"
@@ -11,7 +12,7 @@ TOPOLOGY_MODE_NO_MOBILITY = "no_mobility"
 
 
 # TODO: DOC
-def factory(cnt_nodes):
+def factory(cnt_nodes, link_quality_model=None):
     from miniworld.management.spatial.MovementDirectorNoMobility import MovementDirectorNoMobility
 
     walk_model_name = scenario_config.get_walk_model_name()
@@ -44,8 +45,14 @@ def factory(cnt_nodes):
 
     elif topology_mode == TOPOLOGY_MODE_DEFAULT:
         from miniworld.management.spatial.MovementDirector import MovementDirector
+        max_connected_distance = None
+        if config.is_spatial_index_enabled() and link_quality_model is not None:
+            max_connected_distance = link_quality_model.max_connected_distance
+            log.info("using spatial index with a maximum connected distance of '%s'", max_connected_distance)
+
         movement_director = MovementDirector({
-            scenario_config.get_walk_model_name(): cnt_nodes}
+            scenario_config.get_walk_model_name(): cnt_nodes},
+            max_connected_distance=max_connected_distance
         )  # , ("MoveOnBigStreets", 20)])#MovementDirector({"RandomWalk" : cnt_nodes})
     elif topology_mode == TOPOLOGY_MODE_NO_MOBILITY:
         movement_director = MovementDirectorNoMobility()
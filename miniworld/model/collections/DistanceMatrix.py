@@ -2,6 +2,10 @@
 from collections import UserDict
 from collections import defaultdict
 
+import numpy as np
+
+from miniworld.Config import config
+
 
 def transform_distance_matrix(distance_matrix):
     """
@@ -39,6 +43,15 @@ def detransform_distance_matrix(distance_matrix):
 
 
 def factory():
+    """
+    Get the :py:class:`.DistanceMatrix` type which is configured in the global config.
+
+    Returns
+    -------
+    type
+    """
+    if config.is_distance_matrix_numpy():
+        return DistanceMatrixNumpy
     return DistanceMatrixDict
 
 
@@ -61,7 +74,78 @@ class DistanceMatrix:
 
     @staticmethod
     def factory():
-        return DistanceMatrixDict
+        return factory()
+
+    @classmethod
+    def from_upper_triangular(cls, ids, matrix):
+        """
+        Create a new instance from an upper triangular matrix.
+        Entries on and below the diagonal as well as `NaN` entries are ignored.
+
+        Parameters
+        ----------
+        ids : iterable<int>
+            The node id for each row/column.
+        matrix : numpy.ndarray
+
+        Returns
+        -------
+        DistanceMatrix
+        """
+        ids = list(ids)
+        xs, ys = np.triu_indices(len(ids), k=1)
+        distances = matrix[xs, ys]
+        is_set = ~np.isnan(distances)
+        return cls(((ids[x], ids[y]), distance) for x, y, distance in
+                   zip(xs[is_set].tolist(), ys[is_set].tolist(), distances[is_set].tolist()))
+
+    @classmethod
+    def from_arrays(cls, xs, ys, distances):
+        """
+        Create a new instance from the columns of the entries.
+
+        Parameters
+        ----------
+        xs : numpy.ndarray
+        ys : numpy.ndarray
+        distances : numpy.ndarray
+
+        Returns
+        -------
+        DistanceMatrix
+        """
+        return cls(zip(zip(xs.tolist(), ys.tolist()), distances.tolist()))
+
+    def to_arrays(self):
+        """
+        Get the entries as columns.
+
+        Returns
+        -------
+        numpy.ndarray, numpy.ndarray, numpy.ndarray
+            The node ids x, y and the distances.
+        """
+        items = self.items()
+        xs = np.fromiter((x for (x, _), _ in items), dtype=np.int64, count=len(items))
+        ys = np.fromiter((y for (_, y), _ in items), dtype=np.int64, count=len(items))
+        distances = np.fromiter((distance for _, distance in items), dtype=float, count=len(items))
+        return xs, ys, distances
+
+    def diff(self, old_distance_matrix):
+        """
+        Get the entries which are new or changed compared to `old_distance_matrix`.
+        Entries which are only present in `old_distance_matrix` are not part of the result.
+
+        Parameters
+        ----------
+        old_distance_matrix : DistanceMatrix or dict<(int, int), float>
+
+        Returns
+        -------
+        DistanceMatrix
+            Of the same type as this instance.
+        """
+        raise NotImplementedError
 
     def get_key(self, x, y):
         raise NotImplementedError
@@ -104,25 +188,244 @@ class DistanceMatrixDict(UserDict, DistanceMatrix):
         self.set_distance(x, y, self.UNLIMITED_DISTANCE)
 
     def get_distance(self, x, y):
-        return self.data[self.get_key((x, y))]
+        return self.data[self.get_key(x, y)]
+
+    def diff(self, old_distance_matrix):
+        return self.__class__(
+            (key, distance) for key, distance in self.data.items()
+            if key not in old_distance_matrix or old_distance_matrix[key] != distance
+        )
 
 
 class DistanceMatrixNumpy(DistanceMatrix):
+    """
+    Dense distance matrix backed by a :py:class:`numpy.ndarray`.
+
+    Node ids are mapped to row/column indices in the order they are first seen.
+    Entries which are not set are stored as `NaN`, so the usual upper triangular matrix
+    only populates the upper half of the array.
+    The dict interface (items, update, ...) is provided for the existing consumers,
+    whereas :py:meth:`.diff` compares two matrices with a single vectorized operation.
+
+    Attributes
+    ----------
+    ids : list<int>
+        Maps an index to the node id.
+    id_2_idx : dict<int, int>
+        Maps a node id to the index.
+    matrix : numpy.ndarray
+    """
+
+    UNLIMITED_DISTANCE = -1
+
+    def __init__(self, data=None):
+        self.ids = []
+        self.id_2_idx = {}
+        self.matrix = np.full((0, 0), np.nan)
+
+        if data:
+            self.update(data)
+
+    ###############################################
+    # Index management
+    ###############################################
+
+    def _add_ids(self, ids):
+        """
+        Add the unknown node ids to the index and grow the matrix (only once).
+        """
+        new_ids = [_id for _id in dict.fromkeys(ids) if _id not in self.id_2_idx]
+        if not new_ids:
+            return
+
+        for _id in new_ids:
+            self.id_2_idx[_id] = len(self.ids)
+            self.ids.append(_id)
+
+        old_size = self.matrix.shape[0]
+        size = len(self.ids)
+        matrix = np.full((size, size), np.nan)
+        matrix[:old_size, :old_size] = self.matrix
+        self.matrix = matrix
+
+    def _get_idx(self, x, y):
+        return self.id_2_idx[x], self.id_2_idx[y]
 
-    def __init__(self):
-        self.data = {}
+    def _aligned_matrix(self, other):
+        """
+        Get the matrix of `other` with the rows/columns reordered according to the index of this instance.
+        Nodes which are unknown to `other` are filled with `NaN`.
+
+        Parameters
+        ----------
+        other : DistanceMatrixNumpy
+
+        Returns
+        -------
+        numpy.ndarray
+        """
+        if other.ids == self.ids:
+            return other.matrix
+
+        mapping = np.array([other.id_2_idx.get(_id, -1) for _id in self.ids], dtype=int)
+        known = mapping >= 0
+        aligned = np.full(self.matrix.shape, np.nan)
+        if other.matrix.size:
+            aligned[np.ix_(known, known)] = other.matrix[np.ix_(mapping[known], mapping[known])]
+        return aligned
+
+    ###############################################
+    # DistanceMatrix
+    ###############################################
+
+    @classmethod
+    def from_upper_triangular(cls, ids, matrix):
+        res = cls()
+        res._add_ids(ids)
+        res.matrix = np.array(matrix, dtype=float)
+        res.matrix[np.tril_indices(len(res.ids))] = np.nan
+        return res
+
+    @classmethod
+    def from_arrays(cls, xs, ys, distances):
+        res = cls()
+        ids = np.unique(np.concatenate((xs, ys)))
+        res._add_ids(ids.tolist())
+        res.matrix[np.searchsorted(ids, xs), np.searchsorted(ids, ys)] = distances
+        return res
+
+    def to_arrays(self):
+        rows, cols = np.nonzero(~np.isnan(self.matrix))
+        ids = np.array(self.ids, dtype=np.int64)
+        return ids[rows], ids[cols], self.matrix[rows, cols]
 
     def get_key(self, x, y):
         return (x, y)
 
     def set_distance(self, x, y, distance):
-        self.data[self.get_key(x, y)] = distance
+        self._add_ids((x, y))
+        self.matrix[self._get_idx(x, y)] = distance
 
-    def set_unlimited_distance(self, x, y, distance):
-        pass
+    def set_unlimited_distance(self, x, y):
+        self.set_distance(x, y, self.UNLIMITED_DISTANCE)
 
     def get_distance(self, x, y):
-        return self.data[self.get_key(x, y)]
+        return self[x, y]
+
+    def filter_empty(self):
+        res = self.copy()
+        # NOTE: comparisons with NaN are False, so not set entries stay not set
+        res.matrix[res.matrix < 0] = np.nan
+        return res
+
+    def diff(self, old_distance_matrix):
+        if not isinstance(old_distance_matrix, DistanceMatrixNumpy):
+            old_distance_matrix = DistanceMatrixNumpy(old_distance_matrix)
+
+        old_matrix = self._aligned_matrix(old_distance_matrix)
+        is_set = ~np.isnan(self.matrix)
+        changed = is_set & (np.isnan(old_matrix) | (self.matrix != old_matrix))
+
+        res = DistanceMatrixNumpy()
+        res.ids = list(self.ids)
+        res.id_2_idx = dict(self.id_2_idx)
+        res.matrix = np.where(changed, self.matrix, np.nan)
+        return res
+
+    ###############################################
+    # Dict interface
+    ###############################################
+
+    def __getitem__(self, key):
+        x, y = key
+        try:
+            distance = self.matrix[self._get_idx(x, y)]
+        except KeyError:
+            raise KeyError(key)
+        if np.isnan(distance):
+            raise KeyError(key)
+        return distance.item()
+
+    def __setitem__(self, key, distance):
+        self.set_distance(*key, distance)
+
+    def __delitem__(self, key):
+        # raises KeyError if not set
+        self[key]
+        self.matrix[self._get_idx(*key)] = np.nan
+
+    def __contains__(self, key):
+        try:
+            self[key]
+            return True
+        except KeyError:
+            return False
+
+    def __len__(self):
+        return int(np.count_nonzero(~np.isnan(self.matrix)))
+
+    def __bool__(self):
+        return bool(np.any(~np.isnan(self.matrix)))
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __eq__(self, other):
+        if isinstance(other, DistanceMatrixNumpy):
+            return not self.diff(other) and not other.diff(self)
+        try:
+            return dict(self.items()) == dict(other.items())
+        except AttributeError:
+            return NotImplemented
+
+    def __repr__(self):
+        return '%s(%s)' % (self.__class__.__name__, dict(self.items()))
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def items(self):
+        rows, cols = np.nonzero(~np.isnan(self.matrix))
+        ids = self.ids
+        return [((ids[x], ids[y]), distance) for x, y, distance in
+                zip(rows.tolist(), cols.tolist(), self.matrix[rows, cols].tolist())]
+
+    def keys(self):
+        return [key for key, _ in self.items()]
+
+    def values(self):
+        return self.matrix[~np.isnan(self.matrix)].tolist()
+
+    def update(self, other):
+        """
+        Parameters
+        ----------
+        other : DistanceMatrixNumpy or dict<(int, int), float> or iterable<((int, int), float)>
+        """
+        if isinstance(other, DistanceMatrixNumpy):
+            self._add_ids(other.ids)
+            aligned = self._aligned_matrix(other)
+            is_set = ~np.isnan(aligned)
+            self.matrix[is_set] = aligned[is_set]
+            return
+
+        items = list(other.items()) if hasattr(other, 'items') else list(other)
+        if not items:
+            return
+        self._add_ids(_id for (x, y), _ in items for _id in (x, y))
+        rows = [self.id_2_idx[x] for (x, _), _ in items]
+        cols = [self.id_2_idx[y] for (_, y), _ in items]
+        self.matrix[rows, cols] = [distance for _, distance in items]
+
+    def copy(self):
+        res = DistanceMatrixNumpy()
+        res.ids = list(self.ids)
+        res.id_2_idx = dict(self.id_2_idx)
+        res.matrix = self.matrix.copy()
+        return res
 
 
 if __name__ == '__main__':
@@ -1,7 +1,8 @@
-import hashlib
+import codecs
 import os
 import re
 import socket
+import subprocess
 import time
 from collections import UserDict
 from io import StringIO
@@ -12,15 +13,19 @@ import miniworld.model.network.interface.Interface
 from miniworld import log
 from miniworld.Config import config
 from miniworld.Scenario import scenario_config
+from miniworld.management import StorageManager
 from miniworld.management.ShellHelper import run_shell
+from miniworld.model.emulation import QemuImages
+from miniworld.model.emulation import QemuPool
 from miniworld.model.emulation.QemuMonitorRepl import QemuMonitorRepl, QemuMonitorSnapshotLoadError
+from miniworld.model.emulation.QemuQMP import QemuQMP, QemuQMPError
+from miniworld.model.emulation.QemuTemplate import QemuTemplate
 from miniworld.model.emulation.VirtualizationLayer import VirtualizationLayer
 from miniworld.util.NetUtil import Timeout
 
-from os.path import basename, abspath
-from os.path import splitext
+from os.path import abspath
 from miniworld.errors import QemuBootWaitTimeout
-from miniworld.util import PathUtil, NetUtil
+from miniworld.util import PathUtil, NetUtil, SocketMultiplexer
 from miniworld.model.singletons.Singletons import singletons
 
 from miniworld.repl.REPLable import REPLable
@@ -32,14 +37,6 @@ __author__ = 'Nils Schmidt'
 # Command templates
 ###############################################
 
-CMD_TEMPLATE_QEMU_CREATE_OVERLAY_IMAGE = """
-qemu-img create
-    -b "{base_image_path}"
-    -f qcow2
-    "{overlay_image_path}"
-"""
-
-
 # TODO: check for kvm!
 # Ticket: #8
 
@@ -79,13 +76,14 @@ def get_qemu_cmd_template():
         {kvm_support}
         -m {memory}
         -serial unix:{path_serial_uds_socket},server
-        -monitor unix:{path_qmp_uds_socket},server
+        {monitor_option} unix:{path_qmp_uds_socket},server
         -nographic
         {network_interfaces}
         -watchdog-action poweroff
         -hda "{path_overlay_image}"
         {overlay_images}
         {user_addition}
+        {incoming}
     """
     return CMD_TEMPLATE_QEMU
 
@@ -100,6 +98,10 @@ CMD_TEMPLATE_QEMU_MOUNT_DISK = """
 """
 
 READ_BUF_SIZE = 8192 * 5
+# the boot signal is searched only in the last characters of the boot log
+BOOT_SIGNAL_SEARCH_WINDOW = 8192
+# time to wait for the qemu process to exit after the VM has been shut down via QMP
+SHUTDOWN_TIMEOUT = 5
 
 
 def get_nic_models():
@@ -125,7 +127,14 @@ class Qemu(VirtualizationLayer, ShellCmdWrapper, REPLable):
     ----------
     log_path_qemu_boot : str
         The log for the qemu boot process.
-    monitor_repl : QemuMonitorRepl
+    monitor : QemuMonitorRepl or QemuQMP
+    started_from_template : bool
+    path_overlay_image : str
+        The overlay of the base image (or template disk).
+    pool_vm : PooledVM
+        The vm of the :py:class:`.QemuPool` the node runs on. None if the pool is disabled.
+    booted_from_pool_snapshot : bool
+        Whether the pooled vm has been reused.
     """
 
     exit_code_identifier = "exit code:"
@@ -139,11 +148,18 @@ class Qemu(VirtualizationLayer, ShellCmdWrapper, REPLable):
         self.emulation_node = emulation_node
 
         # log file for qemu boot
-        self.log_path_qemu_boot = PathUtil.get_log_file_path("qemu_boot_%s.txt" % self.id)
+        self.log_path_qemu_boot = PathUtil.get_hot_file_path("qemu_boot_%s.txt" % self.id, node_id=self.id,
+                                                             reserve=StorageManager.RESERVE_LOG,
+                                                             get_disk_path=PathUtil.get_log_file_path)
 
-        self.monitor_repl = QemuMonitorRepl(self)
+        self.pool_vm = None
+        self.owns_process = False
+        self.monitor = self.create_monitor()
 
         self.booted_from_snapshot = False
+        self.started_from_template = False
+        self.booted_from_pool_snapshot = False
+        self.path_overlay_image = None
 
         ################################
         # REPLable
@@ -166,8 +182,30 @@ class Qemu(VirtualizationLayer, ShellCmdWrapper, REPLable):
         # except socket.error as e:
         #     self.nlog.exception(e)
 
+        if self.pool_vm is not None:
+            singletons.qemu_pool.release(self.pool_vm)
+            self.pool_vm = None
+        elif not self.shutdown_completed:
+            self.shutdown()
+
         super(Qemu, self).reset()
 
+    def _shutdown(self):
+        """
+        Shut the VM down via QMP so that QEMU exits cleanly before the :py:class:`.ShellHelper` terminates it.
+        Processes which outlive the scenario (snapshot boot) are left running.
+        """
+        if not self.owns_process or not isinstance(self.monitor, QemuQMP):
+            return
+        if self.process is None or self.process.poll() is not None:
+            return
+
+        try:
+            self.monitor.shutdown()
+            self.process.wait(timeout=SHUTDOWN_TIMEOUT)
+        except (QemuQMPError, OSError, subprocess.TimeoutExpired) as e:
+            self.nlog.exception(e)
+
     # TODO: #54,#55: DOC
     def after_start(self):
         pass
@@ -196,7 +234,7 @@ class Qemu(VirtualizationLayer, ShellCmdWrapper, REPLable):
     def _build_qemu_nic_command(self):
         raise NotImplementedError
 
-    def _build_qemu_command(self, path_qemu_base_image, qemu_user_addition=None):
+    def _build_qemu_command(self, path_qemu_base_image, qemu_user_addition=None, path_incoming_state=None):
         """
         Build the qemu cli command.
 
@@ -206,6 +244,8 @@ class Qemu(VirtualizationLayer, ShellCmdWrapper, REPLable):
             Path to the base image used as read layer.
         qemu_user_addition : str, optional (default is the value from the scenario config file)
             Additional parameters for QEMU.
+        path_incoming_state : str, optional (default is None)
+            Restore the VM state from this file instead of booting.
         """
 
         if qemu_user_addition is None:
@@ -213,27 +253,25 @@ class Qemu(VirtualizationLayer, ShellCmdWrapper, REPLable):
 
         log_kvm_usable()
 
+        self.path_overlay_image = self.create_qemu_overlay_image(os.path.realpath(abspath(path_qemu_base_image)))
+
         return get_qemu_cmd_template().format(
             kvm_support=CMD_TEMPLATE_QEMU_KVM if is_kvm_usable() else "",
             path_serial_uds_socket=self.path_uds_socket,
-            path_qmp_uds_socket=self.monitor_repl.path_uds_socket,
-            path_overlay_image=self.create_qemu_overlay_image(os.path.realpath(abspath(path_qemu_base_image))),
+            monitor_option=self.monitor.QEMU_MONITOR_OPTION,
+            path_qmp_uds_socket=self.monitor.path_uds_socket,
+            path_overlay_image=self.path_overlay_image,
             network_interfaces=self._build_qemu_nic_command(),
             overlay_images=self._build_qemu_overlay_images_command(),
             user_addition=qemu_user_addition,
+            incoming=QemuTemplate.get_qemu_incoming_arg(path_incoming_state) if path_incoming_state else "",
             memory=scenario_config.get_qemu_memory()
         )
 
     @staticmethod
     def sha1(file_path):
-        BLOCKSIZE = 65536
-        hasher = hashlib.sha1()
-        with open(file_path, 'rb') as afile:
-            buf = afile.read(BLOCKSIZE)
-            while len(buf) > 0:
-                hasher.update(buf)
-                buf = afile.read(BLOCKSIZE)
-        return hasher.hexdigest()
+        """ The digest is cached by path, size and modification time (see :py:func:`.QemuImages.get_image_digest`). """
+        return QemuImages.get_image_digest(file_path)
 
     @staticmethod
     def get_snapshot_id():
@@ -254,7 +292,8 @@ class Qemu(VirtualizationLayer, ShellCmdWrapper, REPLable):
         4. Start the Qemu process, take process ownership for snapshot mode
             (to keep the snapshots alive in the process)
         5. Enter the Qemu Monitor first, then the serial console
-        6. Boot VM
+        6. Boot VM (or restore the state of the :py:class:`.QemuTemplate` or of a vm of the :py:class:`.QemuPool`
+            and set the node identity)
         7. Set event progress
         8. Create snapshot
         9. Store Qemu process in singleton map
@@ -280,8 +319,10 @@ class Qemu(VirtualizationLayer, ShellCmdWrapper, REPLable):
         es = singletons.event_system
         self.process = None
         snapshot_load_failed = False
+        # the pool replaces the snapshot boot
+        use_pool = config.is_qemu_warm_pool() and self.is_warm_pool_supported()
 
-        if config.is_qemu_snapshot_boot():
+        if config.is_qemu_snapshot_boot() and not use_pool:
             self.process = singletons.qemu_process_singletons.get(self.id)
             take_process_ownership = False
         else:
@@ -308,7 +349,7 @@ class Qemu(VirtualizationLayer, ShellCmdWrapper, REPLable):
                 self.nlog.info("loading vm snapshot %s", id_snapshot)
                 t_start = time.time()
                 try:
-                    self.monitor_repl.loadvm(id_snapshot)
+                    self.monitor.loadvm(id_snapshot)
                     t_end = time.time()
                     log.debug("loaded snapshot in %0.2f seconds", t_end - t_start)
                     self.booted_from_snapshot = True
@@ -320,41 +361,22 @@ class Qemu(VirtualizationLayer, ShellCmdWrapper, REPLable):
             kill_qemu_snapshot_process()
 
         if self.process is None or snapshot_load_failed:
-            self.monitor_repl = QemuMonitorRepl(self)
-
-            # build qemu shell command from template
-            qemu_cmd = self._build_qemu_command(path_qemu_base_image)
-            # run the qemu command
-            self.process = singletons.shell_helper.run_shell_async(self.id, qemu_cmd, prefixes=[self.shell_prefix],
-                                                                   # we are responsible ourselves for killing the process
-                                                                   take_process_ownership=take_process_ownership)
-
-            # we need to connect to both sockets once, first to the qemu monitor socket (this creates the serial shell socket)
-            self.monitor_repl.run_commands_eager(StringIO("\n"))
-            # NetUtil.wait_until_uds_reachable(self.path_uds_socket)
-
-            booted_signal = scenario_config.get_signal_boot_completed(node_id=self.id)
-            shell_prompt = scenario_config.get_shell_prompt(node_id=self.id)
-
-            # boot signal and shell prompt supplied
-            # use boot signal for boot and shell prompt for entering the shell
-            if booted_signal is not None and shell_prompt is not None:
-                func = NetUtil.wait_for_socket_result
-                booted_signal = scenario_config.get_signal_boot_completed(node_id=self.id)
+            if use_pool:
+                self._start_from_pool(path_qemu_base_image)
+            elif config.is_qemu_template_boot():
+                templates = singletons.qemu_templates
+                key = self.get_template_key(path_qemu_base_image)
+                with templates.lock:
+                    template = templates.get(key)
+                    # the first node boots and serves as template
+                    if template is None:
+                        self._boot(path_qemu_base_image, take_process_ownership)
+                        template = templates.create(self, key)
+
+                if self.process is None:
+                    self._start_from_template(template, take_process_ownership)
             else:
-                booted_signal = scenario_config.get_shell_prompt(node_id=self.id)
-                func = NetUtil.wait_for_boot
-
-            if scenario_config.is_provisioning_boot_mode_selectors():
-                # connected via unix domain socket
-                self.wait_until_qemu_booted(func, self.log_path_qemu_boot,
-                                            booted_signal=booted_signal,
-                                            # TODO:
-                                            timeout=config.get_repl_timeout()
-                                            )
-
-            else:
-                raise ValueError("Unknown boot mode!")
+                self._boot(path_qemu_base_image, take_process_ownership)
 
         # notify EventSystem that the VM booted successfully
         with es.event_no_init_finish(es.EVENT_VM_BOOT) as ev:
@@ -364,25 +386,207 @@ class Qemu(VirtualizationLayer, ShellCmdWrapper, REPLable):
             # connect to the serial shell
             self.run_commands_eager(StringIO("\n"))
 
+        if self.started_from_template or self.booted_from_pool_snapshot:
+            # the device state (e.g. the mac addresses) is the one of the template/pooled vm
+            self.run_commands_eager_check_ret_val(StringIO(self.get_identity_commands()))
+
         # notify EventSystem that the VMs shell is ready
         with es.event_no_init_finish(es.EVENT_VM_SHELL_READY) as ev:
             ev.update([self.id], 1.0)
 
         self.nlog.info("qemu instance running ...")
 
-        if config.is_qemu_snapshot_boot():
+        if config.is_qemu_snapshot_boot() and not use_pool:
             # store process singleton
             singletons.qemu_process_singletons[self.id] = self.process
 
         self.after_start()
 
+    def _run_qemu(self, qemu_cmd, take_process_ownership):
+        self.owns_process = take_process_ownership
+        # run the qemu command
+        self.process = singletons.shell_helper.run_shell_async(self.id, qemu_cmd, prefixes=[self.shell_prefix],
+                                                               # we are responsible ourselves for killing the process
+                                                               take_process_ownership=take_process_ownership)
+
+        # we need to connect to both sockets once, first to the qemu monitor socket (this creates the serial shell socket)
+        self.monitor.wait_until_ready()
+        # NetUtil.wait_until_uds_reachable(self.path_uds_socket)
+
+    def _start_from_template(self, template, take_process_ownership):
+        """
+        Start from an overlay of the template disk and restore the template VM state.
+
+        Parameters
+        ----------
+        template : QemuTemplate
+        take_process_ownership : bool
+        """
+        self.monitor = self.create_monitor()
+        self.nlog.info("starting from qemu template ...")
+        qemu_cmd = self._build_qemu_command(template.path_disk, path_incoming_state=template.path_state)
+        self._run_qemu(qemu_cmd, take_process_ownership)
+        self.started_from_template = True
+
+    def _start_from_pool(self, path_qemu_base_image):
+        """
+        Take an idle vm of the :py:class:`.QemuPool` and load its clean snapshot.
+        If there is none, boot a new one for the pool.
+        Afterwards, the host tap devices of the vm are renamed to the ones of the node.
+
+        Parameters
+        ----------
+        path_qemu_base_image : str
+
+        Raises
+        ------
+        QemuBootWaitTimeout
+        """
+        pool = singletons.qemu_pool
+        key = self.get_pool_key(path_qemu_base_image)
+
+        self.pool_vm = pool.acquire(key, self.id)
+        if self.pool_vm is not None:
+            self.nlog.info("starting from pooled vm %s ...", self.pool_vm)
+            self.process = self.pool_vm.process
+            self.path_uds_socket = self.get_qemu_sock_path(self.pool_vm.name)
+            self.monitor = self.create_monitor()
+            try:
+                self.monitor.loadvm(QemuPool.POOL_SNAPSHOT_ID)
+                self.booted_from_snapshot = self.booted_from_pool_snapshot = True
+            except QemuMonitorSnapshotLoadError:
+                pool.discard(self.pool_vm)
+                self.pool_vm = self.process = None
+
+        if self.pool_vm is None:
+            self.pool_vm = pool.create(key, self.id, len(self.emulation_node.network_mixin.interfaces))
+            self.nlog.info("booting pooled vm %s ...", self.pool_vm)
+            self.path_uds_socket = self.get_qemu_sock_path(self.pool_vm.name)
+            # the pooled vm outlives the scenario
+            self._boot(path_qemu_base_image, False)
+            self.pool_vm.process = self.process
+            self.monitor.make_snapshot(QemuPool.POOL_SNAPSHOT_ID)
+            self.pool_vm.ready = True
+
+        pool.assign_taps(self.pool_vm, self.get_tap_names())
+
+    def is_warm_pool_supported(self):
+        """ Whether the network of a running vm can be re-plumbed (see :py:meth:`.get_tap_names`). """
+        return False
+
+    def get_tap_names(self):
+        """
+        Returns
+        -------
+        list<str>
+            The host tap devices of the node's interfaces.
+        """
+        raise NotImplementedError
+
+    def get_pool_key(self, path_qemu_base_image):
+        """
+        Nodes with the same key can run on the same vm of the :py:class:`.QemuPool`.
+
+        Returns
+        -------
+        tuple
+        """
+        # architecture
+        qemu_binary = get_qemu_cmd_template().split()[0]
+        return (QemuImages.get_image_digest(path_qemu_base_image), qemu_binary, is_kvm_usable()) + \
+            self.get_template_key(path_qemu_base_image)[1:]
+
+    def _boot(self, path_qemu_base_image, take_process_ownership):
+        """
+        Boot from an overlay of the base image and wait until the VM has booted.
+
+        Parameters
+        ----------
+        path_qemu_base_image : str
+        take_process_ownership : bool
+
+        Raises
+        ------
+        QemuBootWaitTimeout
+        """
+        self.monitor = self.create_monitor()
+
+        # build qemu shell command from template
+        qemu_cmd = self._build_qemu_command(path_qemu_base_image)
+        self._run_qemu(qemu_cmd, take_process_ownership)
+
+        booted_signal = scenario_config.get_signal_boot_completed(node_id=self.id)
+        shell_prompt = scenario_config.get_shell_prompt(node_id=self.id)
+
+        # boot signal and shell prompt supplied
+        # use boot signal for boot and shell prompt for entering the shell
+        # one thread reads from the sockets of all nodes
+        socket_util = SocketMultiplexer if scenario_config.is_provisioning_boot_mode_multiplexer() else NetUtil
+        if booted_signal is not None and shell_prompt is not None:
+            func = socket_util.wait_for_socket_result
+            booted_signal = scenario_config.get_signal_boot_completed(node_id=self.id)
+        else:
+            booted_signal = scenario_config.get_shell_prompt(node_id=self.id)
+            func = socket_util.wait_for_boot
+
+        if scenario_config.is_provisioning_boot_mode_selectors() or scenario_config.is_provisioning_boot_mode_multiplexer():
+            # connected via unix domain socket
+            self.wait_until_qemu_booted(func, self.log_path_qemu_boot,
+                                        booted_signal=booted_signal,
+                                        # TODO:
+                                        timeout=config.get_repl_timeout()
+                                        )
+
+        else:
+            raise ValueError("Unknown boot mode!")
+
+    def get_template_key(self, path_qemu_base_image):
+        """
+        Nodes with the same key can be started from the same :py:class:`.QemuTemplate`.
+
+        Returns
+        -------
+        tuple
+        """
+        return (os.path.realpath(abspath(path_qemu_base_image)),
+                len(self.emulation_node.network_mixin.interfaces),
+                scenario_config.get_qemu_nic(),
+                scenario_config.get_qemu_memory(),
+                scenario_config.get_qemu_user_addition(node_id=self.id) or "",
+                tuple(scenario_config.get_overlay_images()))
+
+    def get_identity_commands(self):
+        """
+        Set the mac address of each interface.
+
+        Returns
+        -------
+        str
+        """
+        prefix = scenario_config.get_network_links_nic_prefix()
+        return '\n'.join("ifconfig {prefix}{idx} hw ether {mac}".format(prefix=prefix, idx=idx, mac=_if.get_mac(self.emulation_node.id))
+                         for idx, _if in enumerate(self.emulation_node.network_mixin.interfaces))
+
     @staticmethod
     def get_qemu_sock_path(node_id):
-        return PathUtil.get_temp_file_path("qemu_%s.sock" % node_id)
+        return PathUtil.get_hot_file_path("qemu_%s.sock" % node_id, node_id=node_id)
+
+    def create_monitor(self):
+        """
+        Returns
+        -------
+        QemuMonitorRepl or QemuQMP
+            The QMP client if enabled in the config, the human monitor otherwise.
+        """
+        monitor = QemuQMP(self) if config.is_qemu_qmp() else QemuMonitorRepl(self)
+        if self.pool_vm is not None:
+            monitor.path_uds_socket = monitor.get_qemu_sock_path(self.pool_vm.name)
+        return monitor
 
     def create_qemu_overlay_image(self, base_image_path):
         """
         Create an overlay image used for write operations (based on the image `base_image_path`)
+        or take the one prepared by :py:meth:`.create_overlay_images`.
 
         Returns the path of the created overlay image.
         None if an error occurred.
@@ -396,23 +600,35 @@ class Qemu(VirtualizationLayer, ShellCmdWrapper, REPLable):
         -------
         str
         """
+        overlay_id = self.pool_vm.name if self.pool_vm is not None else self.id
+        return singletons.qemu_overlay_images.create(base_image_path, overlay_id, prefixes=[self.shell_prefix])
 
-        base_image_file_name = basename(base_image_path)
+    @staticmethod
+    def create_overlay_images(node_ids, path_qemu_base_image):
+        """
+        Create the overlay images of the nodes `node_ids` up-front and concurrently.
+        The nodes take them in :py:meth:`.create_qemu_overlay_image`.
+
+        Nodes with a snapshot process are skipped, their overlays are in use.
+        With :py:meth:`.Config.is_qemu_warm_pool` nothing is created, the overlays belong to the pooled vms.
+        With :py:meth:`.Config.is_qemu_template_boot` only the overlays of the user supplied images are created,
+        the disk overlays are based on the template disk which does not exist yet.
 
-        # image name without file suffix
-        overlay_image_name = splitext(base_image_file_name)[0]
-        overlay_image_name = '%s_overlay_%s.img' % (overlay_image_name, self.id)
-        # get the temp file for the final overlay image
-        overlay_image_path = PathUtil.get_temp_file_path(overlay_image_name)
-        # create it
-        cmd_qemu_create_overlay_image = CMD_TEMPLATE_QEMU_CREATE_OVERLAY_IMAGE.format(base_image_path=base_image_path,
-                                                                                      overlay_image_path=overlay_image_path)
+        Parameters
+        ----------
+        node_ids : iterable<int>
+        path_qemu_base_image : str
+        """
+        if config.is_qemu_warm_pool():
+            return
+        if config.is_qemu_snapshot_boot():
+            node_ids = [node_id for node_id in node_ids if node_id not in singletons.qemu_process_singletons]
 
-        # TODO: #2 : error handling
-        singletons.shell_helper.run_shell(self.id, cmd_qemu_create_overlay_image,
-                                          [self.shell_prefix, "create_overlay", basename(base_image_path)])
+        base_image_paths = [abspath(image_path) for image_path in scenario_config.get_overlay_images()]
+        if not config.is_qemu_template_boot():
+            base_image_paths.insert(0, os.path.realpath(abspath(path_qemu_base_image)))
 
-        return overlay_image_path
+        singletons.qemu_overlay_images.create_all(base_image_paths, node_ids)
 
     ##########################################################
     # Wait operations
@@ -441,19 +657,20 @@ class Qemu(VirtualizationLayer, ShellCmdWrapper, REPLable):
         assert sock is not None
 
         compiled_regex = re.compile(booted_signal, flags=re.MULTILINE | re.DOTALL)
+        # multibyte characters may be split between two chunks
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
         with open(path_log_file, "w") as f:
             # TODO: REMOVE SELF REF
-            # TODO: USE PARTIAL BUFFER ONLY!
-            def check_fun(buf, whole_data):
-                f.write(buf.decode())
-                # TODO: #35: more efficient!!!
-                if compiled_regex.search(whole_data) is not None:
+            def check_fun(buf, window):
+                f.write(decoder.decode(buf))
+                if compiled_regex.search(window) is not None:
                     return True
 
             self.nlog.info("waiting for '%s'", booted_signal)
 
             try:
-                func(sock, check_fun, read_buf_size=READ_BUF_SIZE, timeout=timeout)
+                func(sock, check_fun, read_buf_size=READ_BUF_SIZE, timeout=timeout,
+                     search_window=BOOT_SIGNAL_SEARCH_WINDOW)
             except Timeout as e:
                 raise QemuBootWaitTimeout(
                     "Timeout occurred while waiting for boot completed signal ('%s') of QEMU instance: %s" % (
@@ -466,8 +683,9 @@ class Qemu(VirtualizationLayer, ShellCmdWrapper, REPLable):
         sock.close()
 
     def make_snapshot(self, name=None):
-        if not self.booted_from_snapshot:
-            self.monitor_repl.make_snapshot(name=None)
+        # the pooled vm has its own snapshot
+        if not self.booted_from_snapshot and self.pool_vm is None:
+            self.monitor.make_snapshot(name=None)
 
     ###############################################
     # REPLable
@@ -479,30 +697,52 @@ class Qemu(VirtualizationLayer, ShellCmdWrapper, REPLable):
         NOTE: We expect that every line is a command and therefore checked for return value,
         """
 
+        return self.run_commands_eager(self.get_ret_val_checked_commands(flo),
+                                       *args,
+                                       return_value_checker=self.return_value_checker,
+                                       **kwargs
+                                       )
+
+    async def run_commands_eager_check_ret_val_async(self, flo, *args, **kwargs):
+        """
+        Coroutine variant of :py:meth:`.run_commands_eager_check_ret_val`.
+        """
+        return await self.run_commands_eager_async(self.get_ret_val_checked_commands(flo),
+                                                   *args,
+                                                   return_value_checker=self.return_value_checker,
+                                                   **kwargs
+                                                   )
+
+    def get_ret_val_checked_commands(self, flo):
+        """
+        Append the return value checker to each command.
+
+        Returns
+        -------
+        StringIO
+        """
         commands = []
         flo.seek(0)
         for cmd in flo.read().split("\n"):
             # append return value checker
             commands.append("%s%s" % (cmd, self.exit_code_shell_cmd_checker))
+        return StringIO('\n'.join(commands))
 
-        def _return_value_checker(cmd, res):
-            if not self.re_zero_ret_code.search(res):
-                raise ValueError("Expected return code `0`. Command: '%s', result:\n%s" % (cmd, res))
-
-        return self.run_commands_eager(StringIO('\n'.join(commands)),
-                                       *args,
-                                       return_value_checker=_return_value_checker,
-                                       **kwargs
-                                       )
+    def return_value_checker(self, cmd, res):
+        if not self.re_zero_ret_code.search(res):
+            raise ValueError("Expected return code `0`. Command: '%s', result:\n%s" % (cmd, res))
 
     def run_commands(self, *args, **kwargs):
+        return REPLable.run_commands(self, *args, **self.get_command_runner_kwargs(kwargs))
 
+    def get_command_runner_kwargs(self, kwargs):
         kwargs.update({
             'brief_logger': self.nlog,
             'verbose_logger': self.nlog if config.is_log_provisioning() else None,
-            'shell_prompt': scenario_config.get_shell_prompt(node_id=self.id)
+            'shell_prompt': scenario_config.get_shell_prompt(node_id=self.id),
+            'pipelined': scenario_config.is_provisioning_pipelined()
         })
-        return REPLable.run_commands(self, *args, **kwargs)
+        return kwargs
 
     def render_script_from_flo(self, flo, **kwargs):
         """
@@ -0,0 +1,227 @@
+import hashlib
+import json
+import os
+from os.path import basename, splitext
+from threading import Lock
+
+from miniworld.log import log
+from miniworld.model.singletons.Resetable import Resetable
+from miniworld.util import PathUtil, ConcurrencyUtil
+
+__author__ = 'Nils Schmidt'
+
+"""
+Creation of the qcow2 overlay images and the digest of the (read-only) base images.
+"""
+
+CMD_TEMPLATE_QEMU_CREATE_OVERLAY_IMAGE = """
+qemu-img create
+    -b "{base_image_path}"
+    -f qcow2
+    "{overlay_image_path}"
+"""
+
+# read block size for hashing
+HASH_BLOCK_SIZE = 65536
+
+###############################################
+# Base image digest
+###############################################
+
+# the on-disk index survives scenario runs (the tmp dir is only deleted if it is a ramdisk)
+PATH_IMAGE_DIGEST_INDEX = PathUtil.get_temp_file_path("qemu_image_digests.json")
+
+_digest_lock = Lock()
+_digests = None
+
+
+def sha1(file_path):
+    """ Hash the whole file. """
+    hasher = hashlib.sha1()
+    with open(file_path, 'rb') as afile:
+        buf = afile.read(HASH_BLOCK_SIZE)
+        while len(buf) > 0:
+            hasher.update(buf)
+            buf = afile.read(HASH_BLOCK_SIZE)
+    return hasher.hexdigest()
+
+
+def get_image_digest_key(file_path):
+    """
+    The digest is valid as long as the path, size and modification time of the file do not change.
+
+    Returns
+    -------
+    str
+    """
+    file_path = os.path.realpath(file_path)
+    stat = os.stat(file_path)
+    return '%s:%d:%d' % (file_path, stat.st_size, stat.st_mtime_ns)
+
+
+def get_image_digest(file_path, path_index=None):
+    """
+    Get the sha1 digest of the image `file_path`.
+    Multi-GB images are hashed only once, afterwards the digest is taken from the on-disk index.
+
+    Parameters
+    ----------
+    file_path : str
+    path_index : str, optional (default is `PATH_IMAGE_DIGEST_INDEX`)
+
+    Returns
+    -------
+    str
+    """
+    global _digests
+
+    path_index = path_index or PATH_IMAGE_DIGEST_INDEX
+    key = get_image_digest_key(file_path)
+    with _digest_lock:
+        if _digests is None or _digests[0] != path_index:
+            _digests = path_index, read_image_digest_index(path_index)
+        digests = _digests[1]
+
+        if key not in digests:
+            log.info("hashing image '%s' ...", file_path)
+            digests[key] = sha1(file_path)
+            write_image_digest_index(path_index, digests)
+
+        return digests[key]
+
+
+def read_image_digest_index(path_index):
+    """
+    Returns
+    -------
+    dict<str, str>
+        Empty if the index does not exist or is corrupt.
+    """
+    try:
+        with open(path_index) as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return {}
+
+
+def write_image_digest_index(path_index, digests):
+    path_tmp = '%s.tmp' % path_index
+    try:
+        with open(path_tmp, 'w') as f:
+            json.dump(digests, f)
+        # atomic, concurrent readers never see a partial index
+        os.rename(path_tmp, path_index)
+    except IOError as e:
+        log.exception(e)
+
+
+###############################################
+# Overlay images
+###############################################
+
+
+def get_overlay_image_path(base_image_path, node_id):
+    """
+    Returns
+    -------
+    str
+        The temp file of the node's overlay for `base_image_path`.
+    """
+    # image name without file suffix
+    overlay_image_name = splitext(basename(base_image_path))[0]
+    overlay_image_name = '%s_overlay_%s.img' % (overlay_image_name, node_id)
+    return PathUtil.get_hot_file_path(overlay_image_name, node_id=node_id, reserve=get_overlay_reserve())
+
+
+def get_overlay_reserve():
+    """ The tmpfs capacity reserved for the growth of an overlay image. """
+    from miniworld.Config import config
+    from miniworld.management.StorageManager import parse_size
+    return parse_size(config.get_storage_tmpfs_overlay_reserve())
+
+
+class QemuOverlayImages(Resetable):
+    """
+    Creates the overlay images used for write operations of the nodes.
+
+    `qemu-img create` can be run for all nodes up-front on a thread pool (see :py:meth:`.create_all`)
+    instead of serially in each node's start path. The node then only takes its prepared overlay.
+
+    Attributes
+    ----------
+    prepared : set<str>
+        The overlay images which have been created up-front and not yet been taken by a node.
+    lock : Lock
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.prepared = set()
+
+    def reset(self):
+        with self.lock:
+            self.prepared = set()
+
+    def create(self, base_image_path, node_id, prefixes=None):
+        """
+        Create an overlay image for the node `node_id` (based on the image `base_image_path`).
+        Takes the prepared one if it exists.
+
+        Parameters
+        ----------
+        base_image_path: str
+            Absolute path to image!
+        node_id : int
+        prefixes : list<str>, optional (default is None)
+            Shell log prefixes.
+
+        Returns
+        -------
+        str
+            The path of the created overlay image.
+        """
+        overlay_image_path = get_overlay_image_path(base_image_path, node_id)
+        with self.lock:
+            if overlay_image_path in self.prepared:
+                self.prepared.remove(overlay_image_path)
+                return overlay_image_path
+
+        return self._create(base_image_path, node_id, overlay_image_path, prefixes=prefixes)
+
+    def create_all(self, base_image_paths, node_ids, cnt_minions=None):
+        """
+        Create the overlay images of all `base_image_paths` for all nodes concurrently.
+
+        Parameters
+        ----------
+        base_image_paths : list<str>
+            Absolute paths to the images!
+        node_ids : iterable<int>
+        cnt_minions : int, optional (default is the number of cpus)
+
+        Raises
+        ------
+        subprocess.CalledProcessError
+        """
+        jobs = [(base_image_path, node_id, get_overlay_image_path(base_image_path, node_id))
+                for node_id in node_ids for base_image_path in base_image_paths]
+        if not jobs:
+            return
+
+        log.info("creating %d overlay images ...", len(jobs))
+        with ConcurrencyUtil.tpe(cnt_minions or ConcurrencyUtil.cpu_count()) as executor:
+            for overlay_image_path in executor.map(lambda job: self._create(*job), jobs):
+                with self.lock:
+                    self.prepared.add(overlay_image_path)
+
+    @staticmethod
+    def _create(base_image_path, node_id, overlay_image_path, prefixes=None):
+        from miniworld.model.singletons.Singletons import singletons
+
+        cmd_qemu_create_overlay_image = CMD_TEMPLATE_QEMU_CREATE_OVERLAY_IMAGE.format(
+            base_image_path=base_image_path, overlay_image_path=overlay_image_path)
+
+        # TODO: #2 : error handling
+        singletons.shell_helper.run_shell(node_id, cmd_qemu_create_overlay_image,
+                                          (prefixes or ["qemu"]) + ["create_overlay", basename(base_image_path)])
+        return overlay_image_path
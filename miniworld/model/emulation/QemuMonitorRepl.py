@@ -47,6 +47,9 @@ class QemuMonitorRepl(REPLable):
     id : int
     """
 
+    # qemu command line option for the monitor socket
+    QEMU_MONITOR_OPTION = "-monitor"
+
     def __init__(self, qemu):
 
         self.qemu = qemu
@@ -68,6 +71,29 @@ class QemuMonitorRepl(REPLable):
     # Monitor Commands
     ###############################################
 
+    def wait_until_ready(self):
+        """ Connect once to the monitor socket (QEMU waits for the connection before it creates the serial socket). """
+        self.run_commands_eager(StringIO("\n"))
+
+    def run_hmp_commands(self, command_lines):
+        """
+        Parameters
+        ----------
+        command_lines : list<str>
+        """
+        self.run_commands_eager(StringIO('\n'.join(command_lines)))
+
+    def migrate(self, uri):
+        """
+        Migrate the VM state to `uri`, e.g. "exec:cat > state".
+        The HMP command of the monitor REPL returns after the migration has finished.
+
+        Parameters
+        ----------
+        uri : str
+        """
+        self.run_hmp_commands(['migrate "%s"' % uri])
+
     def make_snapshot(self, name=None):
         if name is None:
             name = self.qemu.get_snapshot_id()
@@ -98,7 +124,7 @@ class QemuMonitorRepl(REPLable):
 
     @staticmethod
     def get_qemu_sock_path(node_id):
-        return PathUtil.get_temp_file_path("qemu_monitor_%s.sock" % node_id)
+        return PathUtil.get_hot_file_path("qemu_monitor_%s.sock" % node_id, node_id=node_id)
 
     def run_commands_eager_check_ret_val(self, flo, *args, **kwargs):
         def _return_value_checker(cmd, res):
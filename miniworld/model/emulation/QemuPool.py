@@ -0,0 +1,177 @@
+import re
+from collections import defaultdict
+from threading import Lock
+
+from miniworld.log import log
+
+__author__ = 'Nils Schmidt'
+
+# name of the snapshot taken after the boot of a pooled vm
+POOL_SNAPSHOT_ID = "miniworld_pool"
+
+# a root qdisc added by the link shaping (the default root qdisc has the handle 0:)
+re_shaped_root_qdisc = re.compile(r"^qdisc \S+ (?!0:)[0-9a-f]+: root", flags=re.MULTILINE)
+
+
+def get_pool_tap_name(slot, idx):
+    """ The host tap device of a pooled vm which is not assigned to a node (max 15 chars). """
+    return "tp_%05d_%x" % (slot, idx)
+
+
+class PooledVM(object):
+    """
+    A booted generic VM which is reassigned to the nodes of the scenarios.
+
+    Attributes
+    ----------
+    slot : int
+    key : tuple
+        See :py:meth:`.Qemu.get_pool_key`.
+    process : subprocess.Popen
+    tap_names : list<str>
+        The current names of the host tap devices.
+    node_id : int
+        The node the vm is assigned to. None if idle.
+    ready : bool
+        Whether the clean snapshot exists.
+    """
+
+    def __init__(self, slot, key, cnt_interfaces):
+        self.slot = slot
+        self.key = key
+        self.process = None
+        self.tap_names = [get_pool_tap_name(slot, idx) for idx in range(cnt_interfaces)]
+        self.node_id = None
+        self.ready = False
+
+    @property
+    def name(self):
+        """ Used instead of the node id for the sockets and the overlay image. """
+        return "pool_%d" % self.slot
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def __str__(self):
+        return self.name
+
+
+class QemuPool(object):
+    """
+    Pool of booted VMs which survives scenario resets (like the :py:class:`.QemuProcessSingletons`).
+
+    A node takes an idle vm with the same key, loads its clean snapshot and gets the host tap devices renamed
+    to the ones of the node. Therefore, only the network is re-plumbed and the scenario may change between the runs.
+    If there is none, a new vm is booted for the pool.
+    On reset, the vms are released, their tap devices detached from the bridges, unshaped and renamed back to the
+    pool names.
+
+    Attributes
+    ----------
+    idle : defaultdict<tuple, list<PooledVM>>
+    assigned : dict<int, PooledVM>
+    cnt_slots : int
+    lock : Lock
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.idle = defaultdict(list)
+        self.assigned = {}
+        self.cnt_slots = 0
+
+    def acquire(self, key, node_id):
+        """
+        Returns
+        -------
+        PooledVM
+            An idle vm for `key`, None if there is none.
+        """
+        with self.lock:
+            while self.idle[key]:
+                vm = self.idle[key].pop()
+                if vm.is_alive():
+                    vm.node_id = node_id
+                    self.assigned[node_id] = vm
+                    return vm
+                log.info("pooled vm %s died", vm)
+
+    def create(self, key, node_id, cnt_interfaces):
+        """
+        Returns
+        -------
+        PooledVM
+            A new vm slot which is assigned to `node_id`. The vm still needs to be booted.
+        """
+        with self.lock:
+            vm = PooledVM(self.cnt_slots, key, cnt_interfaces)
+            self.cnt_slots += 1
+            vm.node_id = node_id
+            self.assigned[node_id] = vm
+            return vm
+
+    def assign_taps(self, vm, tap_names):
+        """
+        Rename the host tap devices of the `vm` to `tap_names`.
+
+        Raises
+        ------
+        subprocess.CalledProcessError
+        """
+        from miniworld.model.singletons.Singletons import singletons
+        # late import needed, the module creates files
+        from miniworld.model.network.backends.bridged.iproute2 import IPRoute2Commands
+
+        for idx, (tap_name, new_tap_name) in enumerate(zip(vm.tap_names, tap_names)):
+            if tap_name != new_tap_name:
+                # a link can only be renamed if it is down
+                singletons.shell_helper.run_shell(vm.node_id, IPRoute2Commands.get_interface_up_cmd(tap_name, state_down=True), ["pool", vm.name])
+                singletons.shell_helper.run_shell(vm.node_id, IPRoute2Commands.get_link_set_name_cmd(tap_name, new_tap_name), ["pool", vm.name])
+                vm.tap_names[idx] = new_tap_name
+
+    def detach_taps(self, vm):
+        """
+        Remove the network state of the scenario from the host tap devices of the `vm`.
+        The root qdisc (link shaping) is deleted and the tap devices are detached from their bridges.
+        Afterwards, the tap devices can be renamed without taking the state of the scenario along.
+
+        Raises
+        ------
+        subprocess.CalledProcessError
+        """
+        from miniworld.model.singletons.Singletons import singletons
+        # late import needed, the module creates files
+        from miniworld.model.network.backends.bridged.iproute2 import IPRoute2Commands
+
+        for tap_name in vm.tap_names:
+            if re_shaped_root_qdisc.search(singletons.shell_helper.run_shell(vm.node_id, IPRoute2Commands.get_qdisc_show_cmd(tap_name), ["pool", vm.name])):
+                singletons.shell_helper.run_shell(vm.node_id, IPRoute2Commands.get_qdisc_del_root_cmd(tap_name), ["pool", vm.name])
+            singletons.shell_helper.run_shell(vm.node_id, IPRoute2Commands.get_bridge_del_if_cmd(tap_name), ["pool", vm.name])
+
+    def release(self, vm):
+        """
+        Return the `vm` to the pool. Vms which are not ready or cannot be re-plumbed are killed.
+        """
+        with self.lock:
+            self.assigned.pop(vm.node_id, None)
+
+        if vm.ready and vm.is_alive():
+            try:
+                self.detach_taps(vm)
+                self.assign_taps(vm, [get_pool_tap_name(vm.slot, idx) for idx in range(len(vm.tap_names))])
+                vm.node_id = None
+                with self.lock:
+                    self.idle[vm.key].append(vm)
+                return
+            except Exception as e:
+                log.exception(e)
+
+        self.discard(vm)
+
+    def discard(self, vm):
+        with self.lock:
+            self.assigned.pop(vm.node_id, None)
+        log.info("discarding pooled vm %s", vm)
+        if vm.is_alive():
+            vm.process.kill()
+            vm.process.wait()
@@ -0,0 +1,383 @@
+import contextlib
+import json
+import socket
+import time
+from collections import deque
+
+from miniworld.Config import config
+from miniworld.errors import Base
+from miniworld.log import get_node_logger
+from miniworld.model.emulation.QemuMonitorRepl import QemuMonitorSnapshotLoadError
+from miniworld.util import NetUtil, PathUtil
+
+__author__ = 'Nils Schmidt'
+
+# interval in which the status of a migration is polled
+MIGRATION_POLL_INTERVAL = 0.05
+
+
+class QemuQMPError(Base):
+    pass
+
+
+class QemuQMPTimeout(QemuQMPError):
+    pass
+
+
+class QemuQMPConnectionClosed(QemuQMPError):
+    pass
+
+
+class QMPSession(object):
+    """
+    A connection to the QEMU Machine Protocol (QMP) socket.
+
+    Examples
+    --------
+    S: {"QMP": {"version": {...}, "capabilities": []}}
+    C: {"execute": "qmp_capabilities", "id": 1}
+    S: {"return": {}, "id": 1}
+    C: {"execute": "query-status", "id": 2}
+    S: {"event": "RESUME", "timestamp": {...}}
+    S: {"return": {"status": "running", "singlestep": false, "running": true}, "id": 2}
+
+    Attributes
+    ----------
+    sock : socket
+    timeout : float
+        Timeout for each command/event.
+    buffer : bytes
+        Data which has not been parsed yet.
+    events : deque<dict>
+        The events which have been received while waiting for the result of a command.
+    cnt_commands : int
+    """
+
+    def __init__(self, sock, timeout):
+        self.sock = sock
+        self.timeout = timeout
+        self.buffer = b""
+        self.events = deque()
+        self.cnt_commands = 0
+
+    def negotiate(self):
+        """
+        Read the greeting and leave the capabilities negotiation mode.
+
+        Returns
+        -------
+        dict
+            The greeting.
+        """
+        greeting = self.read_message(time.time() + self.timeout)
+        if "QMP" not in greeting:
+            raise QemuQMPError("Unexpected QMP greeting: %s" % greeting)
+        self.execute("qmp_capabilities")
+        return greeting
+
+    def read_message(self, deadline):
+        """
+        Returns
+        -------
+        dict
+
+        Raises
+        ------
+        QemuQMPTimeout
+        QemuQMPConnectionClosed
+        """
+        while b"\n" not in self.buffer:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise QemuQMPTimeout("Timeout (%s) occurred!" % self.timeout)
+            self.sock.settimeout(remaining)
+            try:
+                data = self.sock.recv(NetUtil.DEFAULT_READ_BUF_SIZE)
+            except socket.timeout as e:
+                raise QemuQMPTimeout("Timeout (%s) occurred!" % self.timeout, caused_by=e)
+            if not data:
+                raise QemuQMPConnectionClosed("QMP connection closed!")
+            self.buffer += data
+
+        line, self.buffer = self.buffer.split(b"\n", 1)
+        return json.loads(line.decode('utf-8'))
+
+    def execute(self, command, arguments=None):
+        """
+        Execute the command and wait for its result. Events received in the meantime are queued.
+
+        Parameters
+        ----------
+        command : str
+        arguments : dict, optional (default is None)
+
+        Returns
+        -------
+        object
+            The return value of the command.
+
+        Raises
+        ------
+        QemuQMPError
+            If QEMU returned an error.
+        QemuQMPTimeout
+        """
+        self.cnt_commands += 1
+        msg = {"execute": command, "id": self.cnt_commands}
+        if arguments is not None:
+            msg["arguments"] = arguments
+        self.sock.sendall(json.dumps(msg).encode('utf-8') + b"\n")
+
+        deadline = time.time() + self.timeout
+        while True:
+            response = self.read_message(deadline)
+            if "event" in response:
+                self.events.append(response)
+            elif response.get("id") == self.cnt_commands:
+                if "error" in response:
+                    raise QemuQMPError("QMP command '%s' failed: %s" % (command, response["error"].get("desc")))
+                return response.get("return")
+
+    def wait_for_event(self, *names):
+        """
+        Wait for one of the events `names`. Other events are discarded.
+
+        Returns
+        -------
+        dict
+            The event.
+
+        Raises
+        ------
+        QemuQMPTimeout
+        """
+        while self.events:
+            event = self.events.popleft()
+            if event["event"] in names:
+                return event
+
+        deadline = time.time() + self.timeout
+        while True:
+            response = self.read_message(deadline)
+            if response.get("event") in names:
+                return response
+
+    def human_monitor_command(self, command_line):
+        """
+        Execute a command of the human monitor (HMP).
+        Commands like `savevm` and `loadvm` do not have a QMP equivalent in all QEMU versions.
+
+        Returns
+        -------
+        str
+            The output of the command, empty on success.
+        """
+        return self.execute("human-monitor-command", {"command-line": command_line})
+
+
+class QemuQMP(object):
+    """
+    Qemu Monitor connection via QMP.
+    Same interface as :py:class:`.QemuMonitorRepl` but without prompt matching.
+
+    Attributes
+    ----------
+    qemu : Qemu
+        The associated Node.
+    nlog
+        Extra node logger.
+    id : int
+    path_uds_socket : str
+    """
+
+    # qemu command line option for the monitor socket
+    QEMU_MONITOR_OPTION = "-qmp"
+
+    def __init__(self, qemu):
+        self.qemu = qemu
+
+        self.id = self.qemu.id
+        self.nlog = get_node_logger(self.id)
+
+        self.path_uds_socket = self.get_qemu_sock_path(self.id)
+
+    @staticmethod
+    def get_qemu_sock_path(node_id):
+        return PathUtil.get_hot_file_path("qemu_qmp_%s.sock" % node_id, node_id=node_id)
+
+    @contextlib.contextmanager
+    def session(self, timeout=None):
+        """
+        Connect to the QMP socket.
+        NOTE: QEMU accepts only one client at a time.
+
+        Yields
+        ------
+        QMPSession
+        """
+        sock = NetUtil.wait_until_uds_reachable(self.path_uds_socket, return_sock=True)
+        try:
+            session = QMPSession(sock, timeout or config.get_repl_timeout())
+            session.negotiate()
+            yield session
+        finally:
+            sock.close()
+
+    ###############################################
+    # Monitor Commands
+    ###############################################
+
+    def wait_until_ready(self):
+        """ Connect once to the monitor socket (QEMU waits for the connection before it creates the serial socket). """
+        with self.session():
+            pass
+
+    def run_hmp_commands(self, command_lines):
+        """
+        Parameters
+        ----------
+        command_lines : list<str>
+
+        Raises
+        ------
+        QemuQMPError
+        """
+        with self.session() as session:
+            for command_line in command_lines:
+                self.check_hmp_output(command_line, session.human_monitor_command(command_line))
+
+    def get_status(self):
+        """
+        Returns
+        -------
+        dict
+            The run state of the VM, e.g. {"status": "running", "running": True, ...}
+        """
+        with self.session() as session:
+            return session.execute("query-status")
+
+    def make_snapshot(self, name=None):
+        """
+        Raises
+        ------
+        QemuQMPError
+        """
+        if name is None:
+            name = self.qemu.get_snapshot_id()
+        with self.session() as session:
+            self.check_hmp_output("savevm %s" % name, session.human_monitor_command("savevm %s" % name))
+            self.ensure_running(session)
+
+    def loadvm(self, name):
+        """
+        Load a snapshot.
+
+        Parameters
+        ----------
+        name : str
+
+        Raises
+        ------
+        QemuMonitorSnapshotLoadError
+        """
+        if name is None:
+            name = self.qemu.get_snapshot_id()
+        try:
+            with self.session() as session:
+                self.check_hmp_output("loadvm %s" % name, session.human_monitor_command("loadvm %s" % name))
+                self.ensure_running(session)
+        except QemuQMPError as e:
+            raise QemuMonitorSnapshotLoadError("Could not load '%s'" % name, caused_by=e)
+
+    def migrate(self, uri):
+        """
+        Migrate the VM state to `uri`, e.g. "exec:cat > state", and wait until the migration has finished.
+        The HMP `migrate` command runs detached via QMP.
+
+        Parameters
+        ----------
+        uri : str
+
+        Raises
+        ------
+        QemuQMPError
+            If the migration failed.
+        QemuQMPTimeout
+        """
+        with self.session() as session:
+            session.execute("migrate", {"uri": uri})
+            self.wait_for_migration(session)
+
+    def shutdown(self, powerdown=False, timeout=None):
+        """
+        Shut the VM down and wait for the `SHUTDOWN` event. QEMU exits afterwards.
+
+        Parameters
+        ----------
+        powerdown : bool, optional (default is False)
+            Ask the guest to power off first (`system_powerdown`).
+            The VM is quit if the guest does not power off within `timeout`, e.g. because it has no ACPI daemon.
+        timeout : float, optional (default is the REPL timeout)
+
+        Raises
+        ------
+        QemuQMPError
+        QemuQMPTimeout
+        """
+        with self.session(timeout) as session:
+            if powerdown:
+                session.execute("system_powerdown")
+                try:
+                    session.wait_for_event("SHUTDOWN")
+                    return
+                except QemuQMPTimeout:
+                    self.nlog.info("guest did not power off in time, quitting qemu ...")
+
+            try:
+                session.execute("quit")
+                session.wait_for_event("SHUTDOWN")
+            except QemuQMPConnectionClosed:
+                # QEMU < 4.0 exits without the event
+                pass
+
+    @staticmethod
+    def wait_for_migration(session):
+        """
+        Poll `query-migrate` until the migration has finished.
+        The `MIGRATION` event needs a migration capability which old QEMU versions do not have.
+
+        Raises
+        ------
+        QemuQMPError
+            If the migration failed or has been cancelled.
+        QemuQMPTimeout
+        """
+        deadline = time.time() + session.timeout
+        while True:
+            status = session.execute("query-migrate").get("status")
+            if status == "completed":
+                return
+            if status in ("failed", "cancelled"):
+                raise QemuQMPError("Migration %s!" % status)
+            if time.time() > deadline:
+                raise QemuQMPTimeout("Timeout (%s) occurred while waiting for the migration!" % session.timeout)
+            time.sleep(MIGRATION_POLL_INTERVAL)
+
+    @staticmethod
+    def ensure_running(session):
+        """ Continue the VM if it has been stopped and wait for the `RESUME` event. """
+        if not session.execute("query-status").get("running"):
+            session.execute("cont")
+            session.wait_for_event("RESUME")
+
+    @staticmethod
+    def check_hmp_output(command_line, output):
+        """
+        Raises
+        ------
+        QemuQMPError
+            If the output of the HMP command contains anything but warnings.
+        """
+        errors = [line for line in output.splitlines() if line.strip() and "warning" not in line.lower()]
+        if errors:
+            raise QemuQMPError("HMP command '%s' failed:\n%s" % (command_line, '\n'.join(errors)))
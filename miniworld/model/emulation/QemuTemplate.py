@@ -0,0 +1,120 @@
+import hashlib
+import shutil
+from threading import Lock
+
+from miniworld.log import log
+from miniworld.model.emulation import QemuImages
+from miniworld.util import PathUtil
+
+__author__ = 'Nils Schmidt'
+
+# drive id of the "-hda" disk
+DRIVE_ID_HDA = "ide0-hd0"
+
+
+def get_key_digest(key):
+    """ Used to give each template its own files. """
+    return hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+
+
+class QemuTemplate(object):
+    """
+    Disk and memory state of a booted VM which serves as template for the other nodes with the same key.
+
+    The first node boots normally. Afterwards, it is stopped and its disk is switched to a new overlay
+    so that the old overlay does not change anymore (copied to `path_disk`).
+    Its memory and device state is migrated to `path_state` and the node continues.
+    All other nodes with the same key start from an overlay of `path_disk` with `-incoming` of `path_state`
+    instead of booting.
+
+    Attributes
+    ----------
+    key : tuple
+        The configuration the template is created for (see :py:meth:`.Qemu.get_template_key`).
+    path_disk : str
+        The backing file of the overlays of the nodes started from the template.
+    path_state : str
+    """
+
+    def __init__(self, key):
+        self.key = key
+        digest = get_key_digest(key)
+        self.path_disk = PathUtil.get_hot_file_path("qemu_template_disk_%s.img" % digest,
+                                                    reserve=QemuImages.get_overlay_reserve())
+        self.path_state = PathUtil.get_hot_file_path("qemu_template_state_%s" % digest)
+
+    def create(self, qemu):
+        """
+        Create the template from the booted `qemu` instance.
+
+        Parameters
+        ----------
+        qemu : Qemu
+        """
+        log.info("creating qemu template from node %s ...", qemu.id)
+        path_live_overlay = PathUtil.get_hot_file_path("qemu_overlay_live_%s.img" % qemu.id, node_id=qemu.id,
+                                                       reserve=QemuImages.get_overlay_reserve())
+
+        qemu.monitor.run_hmp_commands([
+            "stop",
+            # the node continues on a new overlay, the old one does not change anymore
+            "snapshot_blkdev {drive} {path} qcow2".format(drive=DRIVE_ID_HDA, path=path_live_overlay),
+        ])
+        # returns after the migration has finished, so it does not race with the copy and `cont`
+        qemu.monitor.migrate("exec:cat > {path}".format(path=self.path_state))
+        try:
+            shutil.copyfile(qemu.path_overlay_image, self.path_disk)
+        finally:
+            qemu.monitor.run_hmp_commands(["cont"])
+
+        log.info("qemu template created ...")
+
+    @staticmethod
+    def get_qemu_incoming_arg(path_state):
+        return '-incoming "exec:cat {path}"'.format(path=path_state)
+
+
+class QemuTemplates(object):
+    """
+    One :py:class:`.QemuTemplate` per key. Survives scenario resets like the qemu processes.
+    A template is never recreated because the nodes started from it use its disk as backing file.
+
+    Attributes
+    ----------
+    lock : Lock
+        Held while a template is created.
+    templates : dict<tuple, QemuTemplate>
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.templates = {}
+
+    def get(self, key):
+        """
+        Returns
+        -------
+        QemuTemplate
+            The template for `key`, None if it has not been created yet.
+        """
+        return self.templates.get(key)
+
+    def create(self, qemu, key):
+        """
+        Create the template for `key` from the booted `qemu` instance.
+
+        Returns
+        -------
+        QemuTemplate
+
+        Raises
+        ------
+        ValueError
+            If the template for `key` already exists.
+        """
+        if key in self.templates:
+            raise ValueError("The qemu template for '%s' exists already!" % (key,))
+        template = QemuTemplate(key)
+        template.create(qemu)
+        self.templates[key] = template
+        return template
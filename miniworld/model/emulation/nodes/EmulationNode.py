@@ -205,6 +205,18 @@ class EmulationNode(StartableObject.StartableSimulationStateObject, ShellCmdWrap
 
             self.nlog.info("post_network_shell_commands done")
 
+    async def run_post_network_shell_commands_async(self, *args, **kwargs):
+        """
+        Coroutine variant of :py:meth:`.run_post_network_shell_commands`.
+        """
+        es = singletons.event_system
+        with es.event_no_init(es.EVENT_VM_SHELL_POST_NETWORK_COMMANDS, finish_ids=[self.id]):
+            commands = scenario_config.get_all_shell_commands_post_network_start(node_id=self.id)
+            if commands:
+                await self.virtualization_layer.run_commands_eager_async(StringIO(commands))
+
+            self.nlog.info("post_network_shell_commands done")
+
     #############################################################
     # Notify NetworkBackend
     #############################################################
@@ -109,3 +109,6 @@ class VirtualNode(EmulationNode):
     # TODO: #54,#55: adjust doc
     def run_post_network_shell_commands(self, *args, **kwargs):
         pass
+
+    async def run_post_network_shell_commands_async(self, *args, **kwargs):
+        pass
@@ -7,6 +7,7 @@ from ordered_set import OrderedSet
 from miniworld import log
 from miniworld.Scenario import scenario_config
 from miniworld.model.network.backends.AbstractConnection import AbstractConnection
+from miniworld.model.network.backends.bridged import TrafficControl
 from miniworld.model.network.linkqualitymodels.LinkQualityModelRange import LinkQualityModelNetEm
 from miniworld.model.singletons.Singletons import singletons
 
@@ -47,6 +48,22 @@ def ConnectionDummy():
             singletons.network_backend.shell_command_executor.add_command(self.EVENT_ROOT, event, self.id, cmd,
                                                                           self.PREFIXES)
 
+        def add_tc_operation(self, event, tc_operation):
+            """
+            Queue the `tc_operation` for the :py:class:`.TrafficControlNetlink` of the network backend if enabled.
+            Otherwise, queue the equivalent shell command.
+
+            Parameters
+            ----------
+            event : str
+            tc_operation : TCOperation
+            """
+            traffic_control = singletons.network_backend.traffic_control
+            if traffic_control is not None:
+                traffic_control.add_operation(event, tc_operation)
+            else:
+                self.add_shell_command(event, tc_operation.shell_command)
+
         def run(self, cmd):
             return singletons.shell_helper.run_shell(self.id, cmd, prefixes=["tc"])
 
@@ -132,41 +149,24 @@ def ConnectionDummy():
             if rate is not None:
 
                 # add root
-                default_class = self._get_default_class()
-                if default_class:
-                    default_class = "default %s" % default_class
-
                 if not self.shaped_ifaces[dev_name]:
-                    postfix = ' htb {}'.format(default_class)
-                    self.add_shell_command(self.EVENT_LINK_SHAPE_ADD_QDISC,
-                                           # TODO: ADD/REMOVE default 1
-                                           "tc qdisc replace dev {} root handle 1:0{}".format(dev_name, postfix))
+                    self.add_tc_operation(self.EVENT_LINK_SHAPE_ADD_QDISC,
+                                          TrafficControl.htb_root_qdisc(dev_name, self._get_default_class()))
                 self.shaped_ifaces[dev_name] = True
 
                 # add first and only class, use htb shaping algorithm
-                self.add_shell_command(self.EVENT_LINK_SHAPE_ADD_CLASS,
-                                       "tc class replace dev {} parent 1:0 classid 1:{id} htb rate {rate}kbit".format(
-                                           dev_name, rate=rate, id=connection_id))
+                self.add_tc_operation(self.EVENT_LINK_SHAPE_ADD_CLASS,
+                                      TrafficControl.htb_class(dev_name, connection_id, rate))
 
                 # TODO: DOC
-                netem_command = "tc qdisc replace dev {dev_name} parent 1:{id} handle {id}0: netem".format(
-                    dev_name=dev_name, id=connection_id)
-
-                def build_netem_options():
-                    netem_options = []
-
-                    def build_opt(key):
-                        opt = link_quality_dict.get(key)
-                        if opt:
-                            netem_options.append("%s %s" % (key, opt))
-
-                    for key in LinkQualityModelNetEm.NETEM_KEYS:
-                        build_opt(key)
-
-                    return ' '.join(netem_options)
-
-                netem_command += ' {}'.format(build_netem_options())
-                self.add_shell_command(self.EVENT_LINK_SHAPE_ADD_CLASS, netem_command)
+                netem_options = []
+                for key in LinkQualityModelNetEm.NETEM_KEYS:
+                    opt = link_quality_dict.get(key)
+                    if opt:
+                        netem_options.append((key, opt))
+
+                self.add_tc_operation(self.EVENT_LINK_SHAPE_ADD_CLASS,
+                                      TrafficControl.netem_qdisc(dev_name, connection_id, netem_options))
                 self._add_filter_cmd(dev_name, connection_id)
                 self.add_cleanup(dev_name)
 
@@ -4,15 +4,15 @@ from os.path import dirname
 from subprocess import check_output
 
 from ordered_set import OrderedSet
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 
 from miniworld.Scenario import scenario_config
 from miniworld.log import log
-from miniworld.management import ShellHelper
 from miniworld.management.serialization.ShellCommandSerializer import ShellCommandSerializer
 from miniworld.model.emulation.nodes.virtual.CentralNode import is_central_node_interface
 from miniworld.model.network.backends import NetworkBackend
 from miniworld.model.network.backends.bridged.ConnectionBookKeeper import ConnectionBookKeeper
+from miniworld.model.network.backends.bridged.TrafficControl import TrafficControlNetlink, run_tc_batch
 from miniworld.model.network.backends.bridged.iproute2.Constants import NODE_ID_FMT
 from miniworld.model.network.interface.Interface import HubWiFi
 from miniworld.model.singletons.Resetable import Resetable
@@ -92,6 +92,8 @@ def NetworkBackendBridgedDummy():
         all_connections : dict<int, list<int>>
             All connections the nodes can have at any time in one of the scenarios.
         shell_command_executor : ShellCommandSerializer
+        traffic_control : TrafficControlNetlink
+            Applies the link shaping via netlink. None if the `tc` shell commands are used.
         """
 
         def _start(self, *args, **kwargs):
@@ -122,6 +124,19 @@ def NetworkBackendBridgedDummy():
             self.init_shell_command_executor()
             self.setup_shell_command_executor(self.shell_command_executor)
 
+        def reset_traffic_control(self):
+            """
+            (Re)create the :py:class:`.TrafficControlNetlink` if link shaping via netlink is enabled.
+            """
+            traffic_control = getattr(self, "traffic_control", None)
+            if traffic_control is not None:
+                traffic_control.reset()
+
+            self.traffic_control = None
+            if scenario_config.is_network_backend_bridged_execution_mode_tc_netlink():
+                conn_type = self.network_backend_bootstrapper.connection_type
+                self.traffic_control = TrafficControlNetlink(conn_type.EVENT_ORDER)
+
         def _shutdown(self):
 
             # TODO: #55: DOC
@@ -134,6 +149,7 @@ def NetworkBackendBridgedDummy():
             self.event_monitor = EventMonitor()
 
             self.reset_shell_command_executor()
+            self.reset_traffic_control()
 
             # reset
             self.connection_book_keeper = ConnectionBookKeeper()
@@ -295,20 +311,44 @@ def NetworkBackendBridgedDummy():
             Execute the linux qdisc commands for traffic shaping etc.
             """
 
+            if self.traffic_control is not None:
+                self.traffic_control.apply()
+                return
+
             # for the other modes the class :py:class:`.ShellCommandSerializer` takes over
             if scenario_config.is_network_backend_bridged_execution_mode_batch():
-                # shell shell_commands
-                shell_commands = self.shell_command_executor.get_all_commands()
-                # list->str
-                shell_commands = '\n'.join(shell_commands)
-
-                # strip "tc " prefix
-                commands_tc = '\n'.join(re_tc.findall(shell_commands))
-                # NOTE: run shell_commands in batch mode, this is much faster than doing it sequentially
-
-                cmd = "tc -d -batch -"
-                log.info("changing network topology with '%s'. See '%s' for the commands." % (cmd, PATH_SHELL_COMMANDS))
-                ShellHelper.run_shell_with_input(cmd, commands_tc)
+                self.execute_batch_tc_commands(self.shell_command_executor.get_all_command_args())
+
+        def execute_batch_tc_commands(self, shell_command_args):
+            """
+            Run all `tc` commands of `shell_command_args` in a single `tc -force -batch -` process.
+            All commands are executed even if some fail. The failed ones are reported together with the id
+            (the connection) which queued them.
+
+            Parameters
+            ----------
+            shell_command_args : iterable<(str, str, tuple<str>)>
+                Id, command and prefixes as stored in the :py:class:`.ShellCommandSerializer`.
+
+            Raises
+            ------
+            NetworkBackendBridgedError
+                If at least one command failed.
+            """
+            # strip "tc " prefix and remove duplicates which may rise from multiple groups
+            tc_commands = OrderedDict()
+            for _id, shell_command, _ in shell_command_args:
+                match = re_tc.match(shell_command)
+                if match:
+                    tc_commands.setdefault(match.group(1), _id)
+            if not tc_commands:
+                return
+
+            tc_command_args = [(_id, tc_command) for tc_command, _id in tc_commands.items()]
+
+            # NOTE: run shell_commands in batch mode, this is much faster than doing it sequentially
+            log.info("changing network topology with 'tc -force -batch -'. See '%s' for the commands." % PATH_SHELL_COMMANDS)
+            run_tc_batch(tc_command_args)
 
         #############################################################
         # Bridge/Connection handling
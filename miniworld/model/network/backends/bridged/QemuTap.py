@@ -45,7 +45,10 @@ class QemuTap(Qemu.Qemu):
         for vlan, _if in enumerate(self.emulation_node.network_mixin.interfaces):
 
             _if_name = None
-            if type(_if) in (Interface.HubWiFi, Interface.Management):
+            if self.pool_vm is not None:
+                # renamed to the tap device of the node after the boot
+                _if_name = self.pool_vm.tap_names[vlan]
+            elif type(_if) in (Interface.HubWiFi, Interface.Management):
                 _if_name = singletons.network_backend.get_tap_name(self.id, _if)
             else:
                 # create for each connection a tap device
@@ -70,6 +73,12 @@ class QemuTap(Qemu.Qemu):
             nic_model=scenario_config.get_qemu_nic()
         )
 
+    def is_warm_pool_supported(self):
+        return True
+
+    def get_tap_names(self):
+        return [singletons.network_backend.get_tap_name(self.id, _if) for _if in self.emulation_node.network_mixin.interfaces]
+
     # TODO: REMOVE ?
     def after_start(self):
         pass
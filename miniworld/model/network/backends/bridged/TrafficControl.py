@@ -0,0 +1,443 @@
+import re
+from collections import OrderedDict, namedtuple
+
+from miniworld.errors import NetworkBackendBridgedError
+from miniworld.log import log
+from miniworld.management import ShellHelper
+from miniworld.model.network.linkqualitymodels.LinkQualityModelRange import LinkQualityModelNetEm
+from miniworld.model.singletons.Resetable import Resetable
+
+__author__ = 'Nils Schmidt'
+
+"""
+Link shaping (htb classes, netem qdiscs and fw filters) for the bridged network backend.
+
+Each operation is described by a :py:class:`.TCOperation` which holds the arguments for :py:meth:`pyroute2.IPRoute.tc`
+as well as the equivalent `tc` shell command. The latter is used if netlink is not available or an operation fails.
+"""
+
+# see linux/pkt_sched.h
+TC_H_ROOT = 0xFFFFFFFF
+
+# error line of `tc -force -batch -` for a failed command, the line number starts with 1
+re_tc_batch_error = re.compile(r"^Command failed -:(\d+)$")
+
+
+class TCOperation(namedtuple("TCOperation", ["command", "kind", "dev_name", "handle", "kwargs", "shell_command"])):
+    """
+    Attributes
+    ----------
+    command : str
+        The pyroute2 tc command, e.g. "replace-class".
+    kind : str
+    dev_name : str
+    handle : int
+    kwargs : dict
+        Additional arguments for :py:meth:`pyroute2.IPRoute.tc`.
+        None if the operation can only be executed with the `tc` shell command.
+    shell_command : str
+    """
+
+    __slots__ = ()
+
+
+###############################################
+# Parsing of the tc syntax
+###############################################
+
+re_tc_value = re.compile(r"^([0-9]*\.?[0-9]+)([a-zA-Z%]*)$")
+
+TIME_UNITS_IN_USEC = {"": 1, "us": 1, "usec": 1, "usecs": 1,
+                      "ms": 1000, "msec": 1000, "msecs": 1000,
+                      "s": 1000000, "sec": 1000000, "secs": 1000000}
+
+RATE_UNITS_IN_BIT = {"": 8, "bit": 1, "kbit": 1000, "mbit": 1000 ** 2, "gbit": 1000 ** 3,
+                     "bps": 8, "kbps": 8 * 1000, "mbps": 8 * 1000 ** 2, "gbps": 8 * 1000 ** 3}
+
+
+def parse_tc_value(value, units):
+    """
+    Parse a value with unit like `tc` does (e.g. "2.00ms").
+
+    Parameters
+    ----------
+    value : str or int or float
+    units : dict<str, int>
+        Factor for each known unit.
+
+    Returns
+    -------
+    float
+
+    Raises
+    ------
+    ValueError
+        If the value or unit is unknown.
+    """
+    match = re_tc_value.match(str(value).strip())
+    if not match or match.group(2).lower() not in units:
+        raise ValueError("Can not parse tc value '%s'" % value)
+    return float(match.group(1)) * units[match.group(2).lower()]
+
+
+def parse_tc_percent(value):
+    """
+    Returns
+    -------
+    float
+        The percentage, e.g. 25.0 for "25%".
+    """
+    return parse_tc_value(value, {"%": 1, "": 1})
+
+
+def parse_tc_handle(handle):
+    """
+    Convert the `tc` notation "major:minor" (both hex) to the netlink representation.
+
+    Examples
+    --------
+    >>> hex(parse_tc_handle("1:12"))
+    '0x10012'
+    >>> hex(parse_tc_handle("10:"))
+    '0x100000'
+    """
+    major, _, minor = handle.partition(":")
+    return (int(major or "0", 16) << 16) | int(minor or "0", 16)
+
+
+def get_netem_kwargs(netem_options):
+    """
+    Convert the netem options from the link quality dict to the pyroute2 netem arguments.
+
+    Parameters
+    ----------
+    netem_options : list<(str, str)>
+        Netem option and value in `tc` syntax, e.g. ("delay", "2.00ms 0.20ms 25%").
+
+    Returns
+    -------
+    dict
+
+    Raises
+    ------
+    ValueError
+        If an option is not supported.
+    """
+    kwargs = {}
+    for key, value in netem_options:
+        args = str(value).split()
+        if key == LinkQualityModelNetEm.NETEM_KEY_DELAY:
+            kwargs["delay"] = int(parse_tc_value(args[0], TIME_UNITS_IN_USEC))
+            jitter = int(parse_tc_value(args[1], TIME_UNITS_IN_USEC)) if len(args) > 1 else 0
+            # NOTE: like tc, ignore the correlation without jitter (pyroute2 refuses to encode it)
+            if jitter:
+                kwargs["jitter"] = jitter
+                if len(args) > 2:
+                    kwargs["delay_corr"] = parse_tc_percent(args[2])
+        elif key == LinkQualityModelNetEm.NETEM_KEY_LIMIT:
+            kwargs["limit"] = int(args[0])
+        elif key == LinkQualityModelNetEm.NETEM_KEY_LOSS:
+            kwargs["loss"] = parse_tc_percent(args[0])
+            if len(args) > 1:
+                kwargs["loss_corr"] = parse_tc_percent(args[1])
+        elif key == LinkQualityModelNetEm.NETEM_KEY_DUPLICATE:
+            kwargs["duplicate"] = parse_tc_percent(args[0])
+            if len(args) > 1:
+                kwargs["dup_corr"] = parse_tc_percent(args[1])
+        elif key == LinkQualityModelNetEm.NETEM_KEY_CORRUPT:
+            kwargs["prob_corrupt"] = parse_tc_percent(args[0])
+            if len(args) > 1:
+                kwargs["corr_corrupt"] = parse_tc_percent(args[1])
+        elif key == LinkQualityModelNetEm.NETEM_KEY_REORDER:
+            kwargs["prob_reorder"] = parse_tc_percent(args[0])
+            if len(args) > 1:
+                kwargs["corr_reorder"] = parse_tc_percent(args[1])
+        elif key == LinkQualityModelNetEm.NETEM_KEY_RATE:
+            # bytes per second
+            kwargs["rate"] = int(parse_tc_value(args[0], RATE_UNITS_IN_BIT) / 8)
+        else:
+            raise ValueError("Netem option '%s' not supported!" % key)
+        if len(args) > 3:
+            raise ValueError("Can not parse netem option '%s %s'" % (key, value))
+    return kwargs
+
+
+###############################################
+# Operations
+###############################################
+
+def htb_root_qdisc(dev_name, default_class):
+    """
+    Parameters
+    ----------
+    dev_name : str
+    default_class : str
+        The minor of the default class (hex like in `tc`). May be empty.
+
+    Returns
+    -------
+    TCOperation
+    """
+    postfix = ' htb {}'.format("default %s" % default_class if default_class else "")
+    return TCOperation("replace", "htb", dev_name, parse_tc_handle("1:0"),
+                       dict(parent=TC_H_ROOT, default=int(str(default_class or 0), 16)),
+                       # TODO: ADD/REMOVE default 1
+                       "tc qdisc replace dev {} root handle 1:0{}".format(dev_name, postfix))
+
+
+def htb_class(dev_name, connection_id, rate):
+    """
+    Parameters
+    ----------
+    dev_name : str
+    connection_id : int
+    rate : float
+        In kbit/s.
+
+    Returns
+    -------
+    TCOperation
+    """
+    return TCOperation("replace-class", "htb", dev_name, parse_tc_handle("1:{}".format(connection_id)),
+                       # bytes per second
+                       dict(parent=parse_tc_handle("1:0"), rate=int(float(rate) * 1000 / 8)),
+                       "tc class replace dev {} parent 1:0 classid 1:{id} htb rate {rate}kbit".format(
+                           dev_name, rate=rate, id=connection_id))
+
+
+def netem_qdisc(dev_name, connection_id, netem_options):
+    """
+    Parameters
+    ----------
+    dev_name : str
+    connection_id : int
+    netem_options : list<(str, str)>
+
+    Returns
+    -------
+    TCOperation
+    """
+    shell_command = "tc qdisc replace dev {dev_name} parent 1:{id} handle {id}0: netem".format(
+        dev_name=dev_name, id=connection_id)
+    shell_command += ' {}'.format(' '.join("%s %s" % (key, value) for key, value in netem_options))
+
+    try:
+        kwargs = get_netem_kwargs(netem_options)
+        kwargs["parent"] = parse_tc_handle("1:{}".format(connection_id))
+    except (ValueError, IndexError) as e:
+        log.warning("netem options %s can only be set with tc: %s", netem_options, e)
+        kwargs = None
+
+    return TCOperation("replace", "netem", dev_name, parse_tc_handle("{}0:".format(connection_id)), kwargs,
+                       shell_command)
+
+
+def fw_filter(dev_name, connection_id):
+    """
+    Classify the packets marked with `connection_id` into the class of the connection.
+
+    Parameters
+    ----------
+    dev_name : str
+    connection_id : int
+
+    Returns
+    -------
+    TCOperation
+    """
+    return TCOperation("replace-filter", "fw", dev_name, int(connection_id),
+                       dict(parent=parse_tc_handle("1:0"), classid=parse_tc_handle("1:{}".format(connection_id))),
+                       "tc filter replace dev {tap_dev_name} parent 1:0 protocol all handle {id} fw flowid 1:{id}".format(
+                           tap_dev_name=dev_name, id=connection_id))
+
+
+###############################################
+# Shell execution
+###############################################
+
+def get_tc_batch_errors(stderr, tc_command_args):
+    """
+    Map the errors of `tc -force -batch -` back to the commands.
+
+    Parameters
+    ----------
+    stderr : str
+    tc_command_args : list<(str, str)>
+        The id (e.g. of the connection) and the command for each line of the batch input.
+
+    Returns
+    -------
+    list<(str, str, str)>
+        The id, the command and the error message for each failed command.
+
+    Examples
+    --------
+    >>> get_tc_batch_errors("RTNETLINK answers: No such file or directory\\nCommand failed -:2\\n", [("1", "qdisc ..."), ("2", "class ...")])
+    [('2', 'class ...', 'RTNETLINK answers: No such file or directory')]
+    """
+    errors = []
+    messages = []
+    for line in stderr.splitlines():
+        match = re_tc_batch_error.match(line.strip())
+        if match:
+            _id, cmd = tc_command_args[int(match.group(1)) - 1]
+            errors.append((_id, cmd, '\n'.join(messages)))
+            messages = []
+        elif line.strip():
+            messages.append(line.strip())
+    return errors
+
+
+def run_tc_batch(tc_command_args):
+    """
+    Run the `tc` commands in a single `tc -force -batch -` process.
+    All commands are executed even if some fail. The failed ones are reported together with their id.
+
+    Parameters
+    ----------
+    tc_command_args : list<(str, str)>
+        The id (e.g. of the connection) and the command without the "tc " prefix.
+
+    Raises
+    ------
+    NetworkBackendBridgedError
+        If at least one command failed.
+    """
+    returncode, _, stderr = ShellHelper.run_batch_shell_with_input(
+        "tc -force -batch -", '\n'.join(tc_command for _, tc_command in tc_command_args) + '\n')
+
+    if returncode != 0:
+        errors = get_tc_batch_errors(stderr, tc_command_args)
+        for _id, tc_command, message in errors:
+            log.error("%s: 'tc %s' failed: %s", _id, tc_command, message)
+
+        raise NetworkBackendBridgedError("%d of %d tc commands failed:\n%s" % (
+            len(errors), len(tc_command_args),
+            '\n'.join("%s: 'tc %s': %s" % error for error in errors) or stderr))
+
+
+###############################################
+# Netlink execution
+###############################################
+
+class TrafficControlNetlink(Resetable):
+    """
+    Collects the :py:class:`.TCOperation` s of a simulation step and applies them over a single netlink socket
+    instead of forking a `tc` process per command.
+    Operations which cannot be applied via netlink are executed with `tc -force -batch`.
+
+    Attributes
+    ----------
+    operations : OrderedDict<str, OrderedDict<(str, str, int), TCOperation>>
+        For each event (in the order of the events), the operations.
+        A later operation for the same object replaces an earlier one.
+    ipr : pyroute2.IPRoute
+    interface_indexes : dict<str, int>
+        Cache for the interface index of the devices.
+    """
+
+    def __init__(self, event_order):
+        """
+        Parameters
+        ----------
+        event_order : iterable<str>
+        """
+        self.event_order = list(event_order)
+        self.ipr = None
+        self.interface_indexes = {}
+        self.reset_operations()
+
+    def reset_operations(self):
+        self.operations = OrderedDict((event, OrderedDict()) for event in self.event_order)
+
+    def reset(self):
+        self.reset_operations()
+        self.interface_indexes = {}
+        if self.ipr is not None:
+            self.ipr.close()
+            self.ipr = None
+
+    def add_operation(self, event, tc_operation):
+        """
+        Parameters
+        ----------
+        event : str
+        tc_operation : TCOperation
+        """
+        if event not in self.operations:
+            self.operations[event] = OrderedDict()
+        key = tc_operation.command, tc_operation.dev_name, tc_operation.handle
+        self.operations[event][key] = tc_operation
+
+    def get_operations(self):
+        """
+        Returns
+        -------
+        list<TCOperation>
+        """
+        return [tc_operation for operations in self.operations.values() for tc_operation in operations.values()]
+
+    def get_shell_commands(self):
+        """
+        Returns
+        -------
+        list<str>
+        """
+        return [tc_operation.shell_command for tc_operation in self.get_operations()]
+
+    def get_iproute(self):
+        if self.ipr is None:
+            import pyroute2
+            self.ipr = pyroute2.IPRoute()
+        return self.ipr
+
+    def get_interface_index(self, dev_name):
+        idx = self.interface_indexes.get(dev_name)
+        if idx is None:
+            idx = self.interface_indexes[dev_name] = self.get_iproute().link_lookup(ifname=dev_name)[0]
+        return idx
+
+    def apply(self):
+        """
+        Apply all operations of the current step.
+
+        Raises
+        ------
+        NetworkBackendBridgedError
+            If a command of the shell fallback fails.
+        """
+        tc_operations = self.get_operations()
+        self.reset_operations()
+        if not tc_operations:
+            return
+
+        failed = []
+        try:
+            self.get_iproute()
+        except Exception as e:
+            log.warning("netlink not available, using tc for %d operations: %s", len(tc_operations), e)
+            failed = tc_operations
+        else:
+            for idx, tc_operation in enumerate(tc_operations):
+                # NOTE: the order of the operations matters, hence fall back for all remaining ones
+                if tc_operation.kwargs is None:
+                    failed = tc_operations[idx:]
+                    break
+                try:
+                    self.ipr.tc(tc_operation.command, tc_operation.kind, self.get_interface_index(tc_operation.dev_name),
+                                tc_operation.handle, **tc_operation.kwargs)
+                # NOTE: the pyroute2 encoders raise plain exceptions for invalid arguments
+                except Exception as e:
+                    log.warning("netlink failed for '%s': %s", tc_operation.shell_command, e)
+                    failed = tc_operations[idx:]
+                    break
+
+        log.info("applied %d tc operations via netlink", len(tc_operations) - len(failed))
+        if failed:
+            self.apply_shell(failed)
+
+    @staticmethod
+    def apply_shell(tc_operations):
+        # strip "tc " prefix, the device identifies the failed commands
+        run_tc_batch([(tc_operation.dev_name, tc_operation.shell_command[len("tc "):])
+                      for tc_operation in tc_operations])
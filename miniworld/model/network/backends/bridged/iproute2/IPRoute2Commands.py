@@ -57,6 +57,18 @@ def get_bridge_add_if_cmd(_if_name, bridge_dev_name):
     return "ip link set dev {_if} master {bridge}".format(_if=_if_name, bridge=bridge_dev_name)
 
 
+def get_bridge_del_if_cmd(_if_name):
+    return "ip link set dev {_if} nomaster".format(_if=_if_name)
+
+
+def get_qdisc_show_cmd(_if_name):
+    return "tc qdisc show dev {_if}".format(_if=_if_name)
+
+
+def get_qdisc_del_root_cmd(_if_name):
+    return "tc qdisc del dev {_if} root".format(_if=_if_name)
+
+
 def get_interface_up_cmd(_if_name, state_down=False):
     return "ip link set dev {} {state}".format(_if_name, state='up' if not state_down else 'down')
 
@@ -76,3 +88,7 @@ def get_add_interface_to_group_cmd(if_name, group):
 
 def get_link_del_cmd(dev_name):
     return "ip link del {}".format(dev_name)
+
+
+def get_link_set_name_cmd(dev_name, new_dev_name):
+    return "ip link set dev {} name {}".format(dev_name, new_dev_name)
@@ -8,7 +8,7 @@ from miniworld.Scenario import scenario_config
 from miniworld.errors import NetworkBackendBridgedError
 from miniworld.management import ShellHelper
 from miniworld.model.network.backends.bridged import NetworkBackendBridged
-from miniworld.model.network.backends.bridged.NetworkBackendBridged import re_find_ip, \
+from miniworld.model.network.backends.bridged.NetworkBackendBridged import re_find_ip, re_tc, \
     PATH_SHELL_COMMANDS
 from miniworld.model.network.backends.bridged.iproute2 import Constants
 
@@ -84,6 +84,10 @@ def NetworkBackendBridgedIproute2():
 
                 # Use iproute2 only
                 execute_batch_iproute2_commands()
+            # pipe the tc commands into tc processes, execute the remaining commands in non-batch parallel mode.
+            # the pending tc commands are executed before the next non-tc commands to keep the order
+            elif scenario_config.is_network_backend_bridged_execution_mode_tc_batch():
+                self.shell_command_executor.run_commands_batched(re_tc.match, self.execute_batch_tc_commands)
             # execute all commands in non-batch parallel mode
             else:
                 self.shell_command_executor.run_commands()
@@ -2,7 +2,9 @@ from collections import defaultdict
 
 from miniworld import log
 from miniworld.Scenario import scenario_config
+from miniworld.management import StorageManager
 from miniworld.model.singletons.Singletons import singletons
+from miniworld.model.network.backends.bridged import TrafficControl
 from miniworld.model.network.backends.bridged.Connection import ConnectionDummy
 from miniworld.util import PathUtil
 
@@ -44,7 +46,7 @@ def ConnectionEbtables():
         policy_drop = "DROP"
         ebtables_cmd = "ebtables --concurrent"
 
-        atomic_file = PathUtil.get_temp_file_path("ebtables_atommic")
+        atomic_file = PathUtil.get_hot_file_path("ebtables_atommic", reserve=StorageManager.RESERVE_ATOMIC_FILE)
         atomic_file_str = "--atomic-file %s" % atomic_file
 
         ebtable_cmd_atomic_init = "{ebtables} {atomic_file} --atomic-init".format(ebtables=ebtables_cmd,
@@ -69,7 +71,13 @@ def ConnectionEbtables():
         @staticmethod
         def get_connection_id(tap_x, tap_y):
             key = tuple(sorted([tap_x, tap_y]))
-            return ConnectionEbtables.connections[key]
+            connection_id = ConnectionEbtables.connections.get(key)
+            if connection_id is None:
+                connection_id = ConnectionEbtables.connections[key]
+                # log only new connection ids
+                with open(ConnectionEbtables.path_connection_log, "a") as f:
+                    f.write("%s,%s: %d\n" % (key[0], key[1], connection_id))
+            return connection_id
 
         # TODO: we should use hosts rather than interfaces here!
         # dict<(str, str>, int>
@@ -82,16 +90,22 @@ def ConnectionEbtables():
 
         # TODO: #84:
         def tap_link_up(self, tap_x, tap_y, up=True):
-            chain = singletons.network_backend.get_br_name(self.interface_x.nr_host_interface)
+            network_backend = singletons.network_backend
+            chain = network_backend.get_br_name(self.interface_x.nr_host_interface)
+
+            # only change the in-memory ruleset, it is committed once per step
+            if scenario_config.is_network_backend_bridged_execution_mode_ebtables_ruleset():
+                connection_id = ConnectionEbtables.get_connection_id(tap_x, tap_y)
+                network_backend.ebtables_ruleset.set_rule(chain, tap_x, tap_y, connection_id, up=up)
+                return
+
             change_cmd = self._get_ebtables_cmd(chain, tap_x, tap_y, up)
 
-            network_backend = singletons.network_backend
             # add to command queue
             network_backend.add_shell_ebtables_command(network_backend.EVENT_EBTABLES_COMMANDS, change_cmd)
 
         def tap_link_up_central(self, tap_x, tap_y, up=True):
-            log.info("accept all packets in FORWARD chain ...")
-            self.run_shell("{ebtables} -P FORWARD ACCEPT".format(ebtables=ConnectionEbtables.ebtables_cmd))
+            ConnectionEbtables.set_ebtables_forward_policy_accept()
 
         def tap_link_up_remote(self, tap_x, tap_y, up=True):
             self.tap_link_up(tap_x, tap_y, up=up)
@@ -120,6 +134,9 @@ def ConnectionEbtables():
         @staticmethod
         def set_ebtables_forward_policy(policy):
             log.info("{policy} all packets in FORWARD chain ...".format(policy=policy))
+            # otherwise the next commit of the ruleset reverts the policy
+            if scenario_config.is_network_backend_bridged_execution_mode_ebtables_ruleset():
+                singletons.network_backend.ebtables_ruleset.set_forward_policy(policy)
             ConnectionEbtables.run_shell("{ebtables} -P FORWARD {policy}".format(
                 ebtables=ConnectionEbtables.ebtables_cmd,
                 policy=policy
@@ -135,9 +152,6 @@ def ConnectionEbtables():
             connection_id = ConnectionEbtables.get_connection_id(tap_x, tap_y)
             mark_str = "mark --set-mark {id} --mark-target {policy}".format(id=connection_id, policy=self.policy_accept)
 
-            with open(self.path_connection_log, "a") as f:
-                f.write("%s,%s: %d\n" % (tap_x, tap_y, connection_id))
-
             return "{ebtables} {atomic_prefix} {up_str} {chain} -i {tap_x} -o {tap_y} -j {policy}".format(
                 ebtables=self.ebtables_cmd,
                 atomic_prefix=self.get_ebtables_atomix_prefix(),
@@ -175,11 +189,8 @@ def ConnectionEbtables():
             return "{ebtables} -X {chain}".format(ebtables=ConnectionEbtables.ebtables_cmd, chain=chain)
 
         def _add_filter_cmd(self, dev_name, connection_id):
-            # TODO: DOC
-            filter_cmd = "tc filter replace dev {tap_dev_name} parent 1:0 protocol all handle {id} fw flowid 1:{id}".format(
-                tap_dev_name=dev_name, id=connection_id)
-
-            self.add_shell_command(self.EVENT_LINK_SHAPE_ADD_FILTER, filter_cmd)
+            # classify the packets marked by ebtables into the class of the connection
+            self.add_tc_operation(self.EVENT_LINK_SHAPE_ADD_FILTER, TrafficControl.fw_filter(dev_name, connection_id))
 
         def _get_default_class(self):
             # use filter instead
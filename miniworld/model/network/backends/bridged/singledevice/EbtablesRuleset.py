@@ -0,0 +1,152 @@
+from collections import OrderedDict
+
+from ordered_set import OrderedSet
+
+from miniworld.log import log
+from miniworld.management import ShellHelper
+from miniworld.model.singletons.Resetable import Resetable
+
+__author__ = 'Nils Schmidt'
+
+
+class EbtablesRuleset(Resetable):
+    """
+    In-memory model of the ebtables `filter` table used by the :py:class:`.NetworkBackendBridgedSingleDevice`.
+
+    Instead of one `ebtables -I/-D` call per direction and connection (each of them reloading the whole table),
+    the desired ruleset is kept as a set. Per step, the diff to the committed ruleset is computed and,
+    only if something changed, the complete table is replaced atomically by a single `ebtables-restore`.
+
+    Examples
+    --------
+    >>> ruleset = EbtablesRuleset()
+    >>> ruleset.add_chain("wifi1", "DROP")
+    >>> ruleset.add_redirect("wifi1")
+    >>> ruleset.set_rule("wifi1", "tap_00001_1", "tap_00002_1", 1, up=True)
+    >>> ruleset.diff()
+    ({('wifi1', 'tap_00001_1', 'tap_00002_1', 1)}, set())
+    >>> print(ruleset.get_restore_input())
+    *filter
+    :INPUT ACCEPT
+    :FORWARD ACCEPT
+    :OUTPUT ACCEPT
+    :wifi1 DROP
+    -A FORWARD --logical-in wifi1 -j wifi1
+    -A wifi1 -i tap_00001_1 -o tap_00002_1 -j mark --set-mark 1 --mark-target ACCEPT
+    <BLANKLINE>
+
+    Attributes
+    ----------
+    forward_policy : str
+    chains : OrderedDict<str, str>
+        The policy for each user-defined chain.
+    redirects : OrderedSet<str>
+        The bridges whose traffic is redirected from the FORWARD chain to the chain of the bridge.
+    rules : set<(str, str, str, int)>
+        The desired rules: chain, input device, output device, connection id (mark).
+    committed_rules : set<(str, str, str, int)>
+        The rules of the last commit.
+    structure_changed : bool
+        Whether the policy, chains or redirects changed since the last commit.
+    """
+
+    POLICY_ACCEPT = "ACCEPT"
+    POLICY_DROP = "DROP"
+
+    EBTABLES_RESTORE_CMD = "ebtables-restore"
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.forward_policy = self.POLICY_ACCEPT
+        self.chains = OrderedDict()
+        self.redirects = OrderedSet()
+        self.rules = set()
+        self.committed_rules = set()
+        self.structure_changed = False
+
+    #########################################
+    # Desired ruleset
+    #########################################
+
+    def set_forward_policy(self, policy):
+        if policy != self.forward_policy:
+            self.forward_policy = policy
+            self.structure_changed = True
+
+    def add_chain(self, name, policy):
+        if self.chains.get(name) != policy:
+            self.chains[name] = policy
+            self.structure_changed = True
+
+    def add_redirect(self, br_name):
+        if br_name not in self.redirects:
+            self.redirects.add(br_name)
+            self.structure_changed = True
+
+    def set_rule(self, chain, tap_x, tap_y, connection_id, up=True):
+        """
+        Accept (and mark) the traffic from `tap_x` to `tap_y` if `up`. Otherwise, remove the rule.
+        """
+        rule = chain, tap_x, tap_y, connection_id
+        if up:
+            self.rules.add(rule)
+        else:
+            self.rules.discard(rule)
+
+    #########################################
+    # Commit
+    #########################################
+
+    def diff(self):
+        """
+        Returns
+        -------
+        set, set
+            The added and removed rules since the last commit.
+        """
+        return self.rules - self.committed_rules, self.committed_rules - self.rules
+
+    def get_restore_input(self):
+        """
+        Returns
+        -------
+        str
+            The complete table in the format of `ebtables-save`.
+        """
+        lines = ["*filter",
+                 ":INPUT %s" % self.POLICY_ACCEPT,
+                 ":FORWARD %s" % self.forward_policy,
+                 ":OUTPUT %s" % self.POLICY_ACCEPT]
+        lines.extend(":%s %s" % (chain, policy) for chain, policy in self.chains.items())
+        lines.extend("-A FORWARD --logical-in {br_name} -j {br_name}".format(br_name=br_name)
+                     for br_name in self.redirects)
+        lines.extend("-A {chain} -i {tap_x} -o {tap_y} -j mark --set-mark {id} --mark-target {policy}".format(
+            chain=chain, tap_x=tap_x, tap_y=tap_y, id=connection_id, policy=self.POLICY_ACCEPT)
+            for chain, tap_x, tap_y, connection_id in sorted(self.rules))
+        return '\n'.join(lines) + '\n'
+
+    def commit(self):
+        """
+        Replace the table atomically if the ruleset changed since the last commit.
+
+        Returns
+        -------
+        bool
+            Whether the table has been replaced.
+
+        Raises
+        ------
+        MyCalledProcessError
+        """
+        added, removed = self.diff()
+        if not added and not removed and not self.structure_changed:
+            return False
+
+        log.info("ebtables: %d rules added, %d rules removed", len(added), len(removed))
+        ShellHelper.run_shell_with_input(self.EBTABLES_RESTORE_CMD, self.get_restore_input())
+
+        self.committed_rules = set(self.rules)
+        self.structure_changed = False
+        return True
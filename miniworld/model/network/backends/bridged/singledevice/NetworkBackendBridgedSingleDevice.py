@@ -5,6 +5,7 @@ from miniworld.Scenario import scenario_config
 from miniworld.management.network.manager.provisioner.NetworkConfiguratorSameSubnet import NetworkConfiguratorSameSubnet
 from miniworld.model.network.backends import InterfaceFilter
 from miniworld.model.network.backends.bridged.NetworkBackendBridged import NetworkBackendBridgedDummy
+from miniworld.model.network.backends.bridged.singledevice.EbtablesRuleset import EbtablesRuleset
 from miniworld.model.network.connections.Connections import Connections
 from miniworld.model.singletons.Singletons import singletons
 from miniworld.util import PathUtil
@@ -22,6 +23,8 @@ def NetworkBackendBridgedSingleDevice():
         ----------
         bridges : dict<str, AbstractSwitch>
             Stores for each bridge name the according class.
+        ebtables_ruleset : EbtablesRuleset
+            The in-memory ruleset (only used in the `ebtables_ruleset` execution mode).
         """
 
         ebtables_history_path = PathUtil.get_log_file_path("ebtables_history.txt")
@@ -58,6 +61,7 @@ def NetworkBackendBridgedSingleDevice():
             shell_command_executor.set_event_order(self.EBTABLES_EVENT_ROOT, self.EBTABLES_EVENT_ORDER)
 
         def __init__(self, *args, **kwargs):
+            self.ebtables_ruleset = EbtablesRuleset()
             super(NetworkBackendBridgedSingleDevice, self).__init__(*args, **kwargs)
             self.bridges = {}
 
@@ -83,7 +87,10 @@ def NetworkBackendBridgedSingleDevice():
 
             conn_type = self.network_backend_bootstrapper.connection_type
             # TODO: MOVE method here ...
-            if scenario_config.is_network_backend_bridged_execution_mode_batch():
+            # the ruleset is committed as a whole, no need to save the table
+            if scenario_config.is_network_backend_bridged_execution_mode_ebtables_ruleset():
+                pass
+            elif scenario_config.is_network_backend_bridged_execution_mode_batch():
                 self.add_shell_ebtables_command(self.EVENT_EBTABLES_INIT, conn_type.ebtable_cmd_atomic_save)
 
             if step_cnt == 0:
@@ -92,6 +99,7 @@ def NetworkBackendBridgedSingleDevice():
         def init_ebtables(self):
             conn_type = self.network_backend_bootstrapper.connection_type
 
+            self.ebtables_ruleset.reset()
             # reset to initial ebtables state
             self.run_shell(conn_type.ebtable_cmd_atomic_init)
             self.run_shell(conn_type.ebtable_cmd_atomic_commit)
@@ -118,10 +126,14 @@ def NetworkBackendBridgedSingleDevice():
             if not self.bridges.get(br_name, None):
                 log.info("creating bridge %s", br_name)
                 bridge = self.bridges[br_name] = self.network_backend_bootstrapper.switch_type(br_name, interface_x)
-                # create extra chain for bridge
-                self.add_shell_ebtables_command(self.EVENT_EBTABLES_CREATE_CHAINS, connection_type.get_ebtables_chain_cmd(br_name, connection_type.policy_drop))
-                # redirect to new chain
-                self.add_shell_ebtables_command(self.EVENT_EBTABLES_REDIRECT, connection_type.get_ebtables_redirect_cmd(br_name))
+                if scenario_config.is_network_backend_bridged_execution_mode_ebtables_ruleset():
+                    self.ebtables_ruleset.add_chain(br_name, connection_type.policy_drop)
+                    self.ebtables_ruleset.add_redirect(br_name)
+                else:
+                    # create extra chain for bridge
+                    self.add_shell_ebtables_command(self.EVENT_EBTABLES_CREATE_CHAINS, connection_type.get_ebtables_chain_cmd(br_name, connection_type.policy_drop))
+                    # redirect to new chain
+                    self.add_shell_ebtables_command(self.EVENT_EBTABLES_REDIRECT, connection_type.get_ebtables_redirect_cmd(br_name))
 
                 bridge.start(switch=False, bridge_dev_name=br_name)
             else:
@@ -172,8 +184,13 @@ def NetworkBackendBridgedSingleDevice():
 
         def do_network_topology_change(self):
             """
-            Run ebtable commands for batch or one shell call mode
+            Run ebtable commands for batch or one shell call mode.
+            In the `ebtables_ruleset` mode, replace the ebtables table once if the ruleset changed.
             """
+            if scenario_config.is_network_backend_bridged_execution_mode_ebtables_ruleset():
+                self.ebtables_ruleset.commit()
+                return
+
             is_pyroute2 = scenario_config.is_network_backend_bridged_execution_mode_pyroute2()
             is_batch = scenario_config.is_network_backend_bridged_execution_mode_batch()
             if is_batch:
@@ -316,7 +316,7 @@ class VDESwitch(AbstractSwitch, ShellCmdWrapper, REPLable):
         -------
         str
         """
-        return PathUtil.get_temp_file_path("vde_switch_mgmt_%s" % id)
+        return PathUtil.get_hot_file_path("vde_switch_mgmt_%s" % id)
 
     @staticmethod
     def get_vde_switch_sock_path(id):
@@ -332,7 +332,7 @@ class VDESwitch(AbstractSwitch, ShellCmdWrapper, REPLable):
         -------
         str
         """
-        return PathUtil.get_temp_file_path("vde_switch_%s" % id)
+        return PathUtil.get_hot_file_path("vde_switch_%s" % id)
 
     ###############################################
     # REPLable
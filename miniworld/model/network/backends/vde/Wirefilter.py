@@ -5,6 +5,7 @@ from io import StringIO
 from miniworld.model.network.linkqualitymodels import LinkQualityConstants
 
 from miniworld.log import get_logger
+from miniworld.management import StorageManager
 from miniworld.model.ShellCmdWrapper import ShellCmdWrapper
 from miniworld.model.emulation.InterfaceDependentID import InterfaceDependentID
 from miniworld.model.network.backends.AbstractConnection import AbstractConnection
@@ -73,7 +74,9 @@ class Wirefilter(AbstractConnection, ShellCmdWrapper, REPLable):
         # unix domain socket paths
         self.path_uds_socket = self.get_wirefilter_uds_socket_path(self.emulation_node_x.id, self.emulation_node_y.id, self.interface_x, self.interface_y)
         # log file for qemu shell commands
-        self.log_path_commands = PathUtil.get_log_file_path("wirefilter_commands_%s.txt" % self.id)
+        self.log_path_commands = PathUtil.get_hot_file_path("wirefilter_commands_%s.txt" % self.id,
+                                                            reserve=StorageManager.RESERVE_LOG,
+                                                            get_disk_path=PathUtil.get_log_file_path)
 
     ###############################################
     # Subclassed methods
@@ -207,7 +210,7 @@ class Wirefilter(AbstractConnection, ShellCmdWrapper, REPLable):
     # TODO: occ
     @staticmethod
     def get_wirefilter_uds_socket_path(node_a_id, node_b_id, interface_a, interface_b):
-        return PathUtil.get_temp_file_path(
+        return PathUtil.get_hot_file_path(
             "wirefilter_%s_%s.sock" % (InterfaceDependentID.get_interface_class_dependent_id(node_a_id, interface_a.node_class, interface_a.nr_host_interface),
                                        InterfaceDependentID.get_interface_class_dependent_id(node_b_id, interface_b.node_class, interface_b.nr_host_interface))
         )
@@ -1,12 +1,28 @@
 
-# TODO: DOC
+class ConnectionDetails:
+    """
+    Compact record for a connection stored in the :py:class:`.ConnectionStore`.
 
+    Attributes
+    ----------
+    connection : AbstractConnection
+    link_quality : dict
+    emulation_nodes : EmulationNodes
+        The sorted node key under which the connection is stored.
+    interfaces : Interfaces
+        The interface key under which the connection is stored.
+    active : bool
+        Whether the connection is in the `active` connections.
+    """
 
-class ConnectionDetails:
+    __slots__ = ('connection', 'link_quality', 'emulation_nodes', 'interfaces', 'active')
 
-    def __init__(self, connection, link_quality):
+    def __init__(self, connection, link_quality, emulation_nodes=None, interfaces=None, active=True):
         self.connection = connection
         self.link_quality = link_quality
+        self.emulation_nodes = emulation_nodes
+        self.interfaces = interfaces
+        self.active = active
 
     def update_link_quality(self, link_quality):
         self.link_quality = link_quality
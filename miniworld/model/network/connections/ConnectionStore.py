@@ -26,6 +26,12 @@ class ConnectionStore(UserDict, JSONStrMixin):
     ----------
     data : dict<str, NodeConnectionStore>
         Stores the connections.
+    connections : dict<(EmulationNode, EmulationNode, Interface, Interface), ConnectionDetails>
+        Index over the active and inactive connections. The nodes are sorted.
+    connections_per_node : dict<bool, dict<EmulationNode, set>>
+        Index keys of the active/inactive connections per node.
+    connections_per_interface : dict<bool, dict<(EmulationNode, Interface), set>>
+        Index keys of the active/inactive connections per interface of a node.
 
     Examples
     --------
@@ -132,12 +138,89 @@ class ConnectionStore(UserDict, JSONStrMixin):
         data: optional (default is `dict<str, NodeConnectionStore>`)
 
         """
+        # secondary indexes, see :py:meth:`._build_indexes`
+        self.connections = {}
+        self.connections_per_node = {True: defaultdict(set), False: defaultdict(set)}
+        self.connections_per_interface = {True: defaultdict(set), False: defaultdict(set)}
+        self._cache = {}
+
         if data is None:
             self.data = {}
             self[self.KEY_CONN_ACTIVE] = NodeConnectionStore()
             self[self.KEY_CONN_NOT_ACTIVE] = NodeConnectionStore()
         else:
             self.data = data
+            self._build_indexes()
+
+    #########################################
+    # Indexes
+    #########################################
+
+    @staticmethod
+    def _get_index_key(emu_node_x, emu_node_y, interface_x, interface_y):
+        """
+        Get the key for the :py:attr:`.connections` index.
+        The nodes are sorted like in :py:meth:`.NodeConnectionStore._get_key`.
+        The interfaces are swapped together with the nodes, so each interface stays with its node.
+
+        Returns
+        -------
+        (EmulationNode, EmulationNode, Interface, Interface)
+        """
+        if emu_node_y < emu_node_x:
+            return emu_node_y, emu_node_x, interface_y, interface_x
+        return emu_node_x, emu_node_y, interface_x, interface_y
+
+    def _build_indexes(self):
+        """
+        Build the secondary indexes from the :py:class:`.NodeConnectionStore` s.
+        """
+        self.connections = {}
+        self.connections_per_node = {True: defaultdict(set), False: defaultdict(set)}
+        self.connections_per_interface = {True: defaultdict(set), False: defaultdict(set)}
+        for active in (True, False):
+            for emu_nodes, nic_connection_store in self.get_connections_explicit(active).data.items():
+                for ifaces, connection_details in nic_connection_store.data.items():
+                    connection_details.emulation_nodes = emu_nodes
+                    connection_details.interfaces = ifaces
+                    connection_details.active = active
+                    self._index_connection(self._get_index_key(*(tuple(emu_nodes) + tuple(ifaces))), connection_details)
+        self._invalidate()
+
+    def _index_connection(self, index_key, connection_details):
+        emu_node_x, emu_node_y, interface_x, interface_y = index_key
+        active = connection_details.active
+        self.connections[index_key] = connection_details
+        self.connections_per_node[active][emu_node_x].add(index_key)
+        self.connections_per_node[active][emu_node_y].add(index_key)
+        self.connections_per_interface[active][(emu_node_x, interface_x)].add(index_key)
+        self.connections_per_interface[active][(emu_node_y, interface_y)].add(index_key)
+
+    def _unindex_connection(self, index_key, connection_details):
+        emu_node_x, emu_node_y, interface_x, interface_y = index_key
+        active = connection_details.active
+        for index, key in ((self.connections_per_node[active], emu_node_x),
+                           (self.connections_per_node[active], emu_node_y),
+                           (self.connections_per_interface[active], (emu_node_x, interface_x)),
+                           (self.connections_per_interface[active], (emu_node_y, interface_y))):
+            index_keys = index.get(key)
+            if index_keys is not None:
+                index_keys.discard(index_key)
+                if not index_keys:
+                    del index[key]
+
+    def _invalidate(self):
+        """
+        Drop the cached views. Has to be called on every change of the connections or link qualities.
+        """
+        self._cache = {}
+
+    def _get_cached(self, key, fun):
+        try:
+            return self._cache[key]
+        except KeyError:
+            res = self._cache[key] = fun()
+            return res
 
     #########################################
     # Iterators
@@ -150,41 +233,96 @@ class ConnectionStore(UserDict, JSONStrMixin):
         ---------
         EmulationNodes, Interfaces
         """
-        node_connection_store = self.get_active_node_connection_store()
-        for emu_nodes, nic_connections in node_connection_store.items():
-
-            for ifaces in nic_connections.keys():
-                yield emu_nodes, ifaces
+        for connection_details in self.connections.values():
+            if connection_details.active:
+                yield connection_details.emulation_nodes, connection_details.interfaces
 
     def get_active_interfaces_per_connection(self):
         """
-        Examples
-        --------
+        The result is cached until the connections change and must not be modified.
 
         Returns
         -------
         dict<EmulationNodes, tuple<Interfaces>>
         """
-        active_connections = self.get_active_node_connection_store()
+        def build():
+            res = {}
+            for key, vals in self.get_active_node_connection_store().data.items():
+                # may be empty dict
+                if vals:
+                    res[key] = tuple(vals.keys())
+            return res
 
-        res = {}
-        for key, vals in active_connections.items():
-            # may be empty dict
-            if vals:
-                res[key] = tuple(vals.keys())
-        return res
+        return self._get_cached(('active_interfaces_per_connection',), build)
 
     def get_connections_per_node(self, active=True):
         """
+        The result is cached until the connections change and must not be modified.
 
         Returns
         -------
         dict<EmulationNode, set<EmulationNode>>
         """
-        network_topo = defaultdict(set)
-        for emulation_node_x, emulation_node_y in self.get_connections_explicit(active=active).keys():
-            network_topo[emulation_node_x].add(emulation_node_y)
-        return network_topo
+        def build():
+            network_topo = defaultdict(set)
+            for (emulation_node_x, emulation_node_y, _, _), connection_details in self.connections.items():
+                if connection_details.active == active:
+                    network_topo[emulation_node_x].add(emulation_node_y)
+            return network_topo
+
+        return self._get_cached(('connections_per_node', active), build)
+
+    def get_connections_for_node(self, emu_node, active=True):
+        """
+        Get all connections of `emu_node`.
+
+        Parameters
+        ----------
+        emu_node : EmulationNode
+        active : bool, optional (default is True)
+
+        Returns
+        -------
+        list<ConnectionDetails>
+        """
+        return [self.connections[index_key] for index_key in self.connections_per_node[active].get(emu_node, ())]
+
+    def get_connections_for_interface(self, emu_node, interface, active=True):
+        """
+        Get all connections of the `interface` of `emu_node`.
+
+        Parameters
+        ----------
+        emu_node : EmulationNode
+        interface : Interface
+        active : bool, optional (default is True)
+
+        Returns
+        -------
+        list<ConnectionDetails>
+        """
+        return [self.connections[index_key] for index_key in
+                self.connections_per_interface[active].get((emu_node, interface), ())]
+
+    def get_connections_for_nodes(self, emu_node_x, emu_node_y, active=True):
+        """
+        Get the connections between `emu_node_x` and `emu_node_y`.
+
+        Parameters
+        ----------
+        emu_node_x : EmulationNode
+        emu_node_y : EmulationNode
+        active : bool, optional (default is True)
+
+        Returns
+        -------
+        list<ConnectionDetails>
+            A copy, hence the connection state may be changed while iterating.
+        """
+        nic_connection_store = self.get_connections_explicit(active).get((emu_node_x, emu_node_y))
+        if not nic_connection_store:
+            return []
+        return list(nic_connection_store.data.values())
 
     #########################################
     # Connection Management
@@ -207,14 +345,38 @@ class ConnectionStore(UserDict, JSONStrMixin):
         link_quality_dict: optional (default is None)
             May not be present at this time.
         """
+        index_key = self._get_index_key(emu_node_x, emu_node_y, interface_x, interface_y)
+        old_connection_details = self.connections.get(index_key)
+        if old_connection_details is not None:
+            self._remove_connection(index_key, old_connection_details)
 
         conns = self.get_connections_explicit(active).get((emu_node_x, emu_node_y))
         if not conns:
             # create new NICConnectionStore
             conns = self.get_connections_explicit(active)[(emu_node_x, emu_node_y)] = NICConnectionStore()
 
-        key = interface_x, interface_y
-        conns[key] = ConnectionDetails(connection, link_quality_dict)
+        emu_nodes = NodeConnectionStore._get_key(emu_node_x, emu_node_y)
+        # the interfaces in the order of the sorted nodes
+        ifaces = NICConnectionStore._get_key(*index_key[2:])
+        connection_details = ConnectionDetails(connection, link_quality_dict,
+                                               emulation_nodes=emu_nodes, interfaces=ifaces, active=active)
+        conns.data[ifaces] = connection_details
+        self._index_connection(index_key, connection_details)
+        self._invalidate()
+
+    def _remove_connection(self, index_key, connection_details):
+        """
+        Remove the connection from the :py:class:`.NodeConnectionStore` and the indexes.
+        """
+        node_connection_store = self.get_connections_explicit(connection_details.active)
+        nic_connection_store = node_connection_store.data[connection_details.emulation_nodes]
+        del nic_connection_store.data[connection_details.interfaces]
+        # delete dict for nodes if no iface any more
+        if not nic_connection_store.data:
+            del node_connection_store.data[connection_details.emulation_nodes]
+
+        self._unindex_connection(index_key, connection_details)
+        del self.connections[index_key]
 
     def get_active_node_connection_store(self):
         """
@@ -251,6 +413,25 @@ class ConnectionStore(UserDict, JSONStrMixin):
         else:
             return self.get_inactive_node_connection_store()
 
+    def get_connection_details(self, emu_node_x, emu_node_y, interface_x, interface_y):
+        """
+        Get the connection (active or inactive) in constant time.
+
+        Parameters
+        ----------
+        emu_node_x: EmulationNode
+        emu_node_y: EmulationNode
+        interface_x : Interface
+        interface_y : Interface
+
+        Returns
+        -------
+        ConnectionDetails
+        None
+            If there is no such connection.
+        """
+        return self.connections.get(self._get_index_key(emu_node_x, emu_node_y, interface_x, interface_y))
+
     def get_connections_for_nodes_implicit(self, emu_node_x, emu_node_y, interface_x, interface_y):
         """
         Get the connection implicit from the `active` or `inactive` connections.
@@ -269,16 +450,12 @@ class ConnectionStore(UserDict, JSONStrMixin):
             The dict key, the connections dict.
         None, None
         """
-        key = emu_node_x, emu_node_y
-        nic_connection_store = self.get_active_node_connection_store().get(key)
-        if nic_connection_store and (interface_x, interface_y) in nic_connection_store:
-            return self.KEY_CONN_ACTIVE, nic_connection_store
-        else:
-            nic_connection_store = self.get_inactive_node_connection_store().get(key)
-            if nic_connection_store and (interface_x, interface_y) in nic_connection_store:
-                return self.KEY_CONN_NOT_ACTIVE, self.get_inactive_node_connection_store().get(key)
+        connection_details = self.get_connection_details(emu_node_x, emu_node_y, interface_x, interface_y)
+        if connection_details is None:
+            return None, None
 
-        return None, None
+        dict_key = self.KEY_CONN_ACTIVE if connection_details.active else self.KEY_CONN_NOT_ACTIVE
+        return dict_key, self[dict_key].data[connection_details.emulation_nodes]
 
     def change_connection_state(self, emu_node_x, emu_node_y, interface_x, interface_y, now_active=True):
         """
@@ -303,46 +480,26 @@ class ConnectionStore(UserDict, JSONStrMixin):
         UnknownConnection
             If the connection is unknown
         """
-        node_key = emu_node_x, emu_node_y
-        iface_key = interface_x, interface_y
-        key = node_key + iface_key
-        was_active_str, nic_connection_store = self.get_connections_for_nodes_implicit(*key)
-        was_active = was_active_str == self.KEY_CONN_ACTIVE
+        index_key = self._get_index_key(emu_node_x, emu_node_y, interface_x, interface_y)
+        connection_details = self.connections.get(index_key)
 
-        # there is only one element for this particular key
-        connection_details = list(nic_connection_store.items())[0][1]
-
-        if not nic_connection_store:
+        if connection_details is None:
             raise UnknownConnection("There is no connection between %s@%s <->%s@%s" % (emu_node_x, emu_node_y, interface_x, interface_y))
 
         # connection change
-        if was_active != now_active:
-
-            # change: inactive -> active
-            if not was_active and now_active:
-                try:
-                    # delete from the inactive connections
-                    del self[self.KEY_CONN_NOT_ACTIVE][node_key][iface_key]
-                    # delete dict for nodes if no active iface any more
-                    if len(self[self.KEY_CONN_NOT_ACTIVE][node_key]) == 0:
-                        del self[self.KEY_CONN_NOT_ACTIVE][node_key]
-                    # move to active connections
-                    self[self.KEY_CONN_ACTIVE][node_key][iface_key] = connection_details
-
-                except KeyError:
-                    pass
-            # change: active -> inactive
-            elif was_active and not now_active:
-                try:
-                    # delete from the active connections
-                    del self[self.KEY_CONN_ACTIVE][node_key][iface_key]
-                    # delete dict for nodes if no active iface any more
-                    if len(self[self.KEY_CONN_ACTIVE][node_key]) == 0:
-                        del self[self.KEY_CONN_ACTIVE][node_key]
-                    # move to inactive connections
-                    self[self.KEY_CONN_NOT_ACTIVE][node_key][iface_key] = connection_details
-                except KeyError:
-                    pass
+        if connection_details.active != now_active:
+            self._remove_connection(index_key, connection_details)
+
+            # move to the other connections
+            connection_details.active = now_active
+            node_connection_store = self.get_connections_explicit(now_active)
+            nic_connection_store = node_connection_store.data.get(connection_details.emulation_nodes)
+            if nic_connection_store is None:
+                nic_connection_store = node_connection_store.data[connection_details.emulation_nodes] = NICConnectionStore()
+            nic_connection_store.data[connection_details.interfaces] = connection_details
+
+            self._index_connection(index_key, connection_details)
+            self._invalidate()
             return True
 
         return False
@@ -353,6 +510,7 @@ class ConnectionStore(UserDict, JSONStrMixin):
 
     def get_link_quality_matrix(self, include_interfaces=True, key=None):
         """
+        The result is cached until the connections or link qualities change and must not be modified.
 
         Parameters
         ----------
@@ -374,20 +532,20 @@ class ConnectionStore(UserDict, JSONStrMixin):
             If `include_interfaces` and `key`.
         """
 
-        def get_key(emu_nodes, ifaces):
-            return emu_nodes
-
-        def get_val(emu_nodes, ifaces):
-            connection_details = self.get_link_quality(emu_nodes[0], emu_nodes[1], ifaces[0], ifaces[1])
+        def get_val(connection_details):
             res = link_quality_dict = connection_details.link_quality
 
             if key:
                 res = link_quality_dict[key]
             if include_interfaces:
-                res = ifaces, link_quality_dict
+                res = connection_details.interfaces, link_quality_dict
             return res
 
-        return NodeDict({get_key(emu_nodes, ifaces): get_val(emu_nodes, ifaces) for emu_nodes, ifaces in self.iter_connections()})
+        def build():
+            return NodeDict({connection_details.emulation_nodes: get_val(connection_details)
+                             for connection_details in self.connections.values() if connection_details.active})
+
+        return self._get_cached(('link_quality_matrix', include_interfaces, key), build)
 
     def get_link_quality(self, emu_node_x, emu_node_y, interface_x, interface_y):
         """
@@ -401,11 +559,16 @@ class ConnectionStore(UserDict, JSONStrMixin):
 
         Returns
         -------
-        bool, dict
+        ConnectionDetails
+
+        Raises
+        ------
+        UnknownConnection
         """
-        key = emu_node_x, emu_node_y, interface_x, interface_y
-        interface_key = interface_x, interface_y
-        return self.get_connections_for_nodes_implicit(*key)[1][interface_key]
+        connection_details = self.get_connection_details(emu_node_x, emu_node_y, interface_x, interface_y)
+        if connection_details is None:
+            raise UnknownConnection("No connection exists for %s,%s.\nConnections: %s" % (emu_node_x, emu_node_y, self))
+        return connection_details
 
     def update_link_quality(self, emu_node_x, emu_node_y, interface_x, interface_y, connection, connected, link_quality_dict):
         """
@@ -430,18 +593,13 @@ class ConnectionStore(UserDict, JSONStrMixin):
         ------
         UnknownConnection
         """
-        # get connections for nodes
-        key = emu_node_x, emu_node_y, interface_x, interface_y
-        dict_key, conns = self.get_connections_for_nodes_implicit(*key)
-        if not issubclass(conns.__class__, NICConnectionStore):
-            raise UnknownConnection("No connection exists for %s,%s.\nConnections: %s" % (emu_node_x, emu_node_y, self))
+        connection_details = self.get_link_quality(emu_node_x, emu_node_y, interface_x, interface_y)
 
         # update link quality
-        iface_key = interface_x, interface_y
-
-        conns[iface_key].update_link_quality(link_quality_dict)
+        connection_details.update_link_quality(link_quality_dict)
+        self._invalidate()
 
-        return dict_key
+        return self.KEY_CONN_ACTIVE if connection_details.active else self.KEY_CONN_NOT_ACTIVE
 
 
 if __name__ == "__main__":
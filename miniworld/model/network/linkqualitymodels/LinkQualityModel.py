@@ -1,6 +1,8 @@
 import importlib
 import sys
 
+import numpy as np
+
 from miniworld import log
 from miniworld.model.network.linkqualitymodels import LinkQualityConstants
 
@@ -13,11 +15,23 @@ __author__ = 'Nils Schmidt'
 
 
 class LinkQualityModel:
+    """
+    Attributes
+    ----------
+    max_connected_distance : int
+        The smallest distance for which the nodes are not connected anymore.
+    lookup_table_connected : numpy.ndarray<bool>
+        Whether connected, indexed by the rounded distance.
+    lookup_table_link_quality : numpy.ndarray<dict>
+        The link quality, indexed by the rounded distance.
+        The dicts are shared between the calls and must not be modified.
+    """
 
     def __init__(self,
                  # link quality stuff
                  bandwidth=None,
                  loss=None,
+                 lookup_table=False,
                  **kwargs):
         """
         Parameters
@@ -25,7 +39,9 @@ class LinkQualityModel:
         bandwidth : int, optional (default is unlimited)
             Bandwidth in bytes/sec. `LINK_QUALITY_VAL_BANDWIDTH_UNLIMITED` means unlimited.
         loss : int, optional (default is no loss)
-        max_connected_distance : float
+        lookup_table : bool, optional (default is False)
+            Precalculate the link quality for each (rounded) distance up to the `max_connected_distance`.
+            Afterwards :py:meth:`.distance_2_link_quality` is a table lookup for these distances.
 
         """
         if loss is None:
@@ -37,13 +53,19 @@ class LinkQualityModel:
         self.bandwidth = bandwidth
         self.max_connected_distance = None
 
+        self.lookup_table = lookup_table
+        self.lookup_table_connected = None
+        self.lookup_table_link_quality = None
+
         self.precalculate()
 
     def precalculate(self):
 
         log.info("precalculating link qualities ...")
+        lookup_table = []
         for distance in range(0, sys.maxsize):
             connected, link_quality_dict = self.distance_2_link_quality(distance)
+            lookup_table.append((connected, link_quality_dict))
             if not connected:
                 self.max_connected_distance = distance
                 log.info("max_connected_distance: '%s'", self.max_connected_distance)
@@ -52,6 +74,12 @@ class LinkQualityModel:
         if self.max_connected_distance is None:
             raise RuntimeError("Maximum connected distance could not be calculated!")
 
+        if self.lookup_table:
+            log.info("using link quality lookup table with %d entries", len(lookup_table))
+            self.lookup_table_connected = np.array([connected for connected, _ in lookup_table], dtype=bool)
+            self.lookup_table_link_quality = np.empty(len(lookup_table), dtype=object)
+            self.lookup_table_link_quality[:] = [link_quality_dict for _, link_quality_dict in lookup_table]
+
     @staticmethod
     def import_link_quality_model(pn):
         """
@@ -109,8 +137,43 @@ class LinkQualityModel:
     def distance_2_link_quality(self, distance):
 
         distance = round(distance)
+        if self.lookup_table_connected is not None and 0 <= distance < len(self.lookup_table_connected):
+            return bool(self.lookup_table_connected[distance]), self.lookup_table_link_quality[distance]
+
         return self._distance_2_link_quality(distance)
 
+    def distances_2_link_qualities(self, distances):
+        """
+        Batch version of :py:meth:`.distance_2_link_quality`.
+
+        Parameters
+        ----------
+        distances : numpy.ndarray<float>
+
+        Returns
+        -------
+        numpy.ndarray<bool>, numpy.ndarray<dict>
+            For each distance whether connected and the link quality.
+        """
+        distances = np.asarray(distances, dtype=float)
+        connected = np.zeros(distances.shape, dtype=bool)
+        link_qualities = np.empty(distances.shape, dtype=object)
+
+        if self.lookup_table_connected is not None:
+            # NOTE: compare before casting, the distances may be too big for an int (e.g. `VAL_DISTANCE_UNLIMITED`)
+            rounded_distances = np.round(distances)
+            in_table = (rounded_distances >= 0) & (rounded_distances < len(self.lookup_table_connected))
+            idxs = rounded_distances[in_table].astype(int)
+            connected[in_table] = self.lookup_table_connected[idxs]
+            link_qualities[in_table] = self.lookup_table_link_quality[idxs]
+        else:
+            in_table = np.zeros(distances.shape, dtype=bool)
+
+        for idx in zip(*np.nonzero(~in_table)):
+            connected[idx], link_qualities[idx] = self.distance_2_link_quality(distances[idx].item())
+
+        return connected, link_qualities
+
     def _distance_2_link_quality(self, distance):
         """
         Returns
@@ -1,5 +1,6 @@
 import miniworld.model.events.MyEventSystem
 from miniworld import log
+from miniworld.Config import config
 from miniworld.management import SimulationManager, NodeDistributionStrategy
 from miniworld.model.spatial import Singleton
 from miniworld.rpc import Protocol
@@ -12,10 +13,17 @@ def init_singletons():
     from miniworld.model.singletons.Singletons import singletons
     from miniworld.errors import SimulationErrors
     from miniworld.management import SimulationStateGarbageCollector
+    from miniworld.management.StorageManager import StorageManager
     from miniworld.model.emulation.Qemu import QemuProcessSingletons
+    from miniworld.model.emulation.QemuImages import QemuOverlayImages
+    from miniworld.model.emulation.QemuPool import QemuPool
+    from miniworld.model.emulation.QemuTemplate import QemuTemplates
     from miniworld.model.spatial.Roads import Roads
+    from miniworld.util.SocketMultiplexer import SocketMultiplexer
 
     # create singletons here
+    # the placements survive scenario resets like the qemu processes
+    singletons.storage_manager = StorageManager(capacity=config.get_storage_tmpfs_size())
     singletons.network_manager = NetworkManager.NetworkManager()
     singletons.shell_helper = ShellHelper.ShellHelper()
     singletons.spatial_singleton = Singleton.Singleton()
@@ -28,7 +36,12 @@ def init_singletons():
 
     singletons.simulation_manager = SimulationManager.factory()()
     singletons.qemu_process_singletons = QemuProcessSingletons()
+    # survives scenario resets like the qemu processes
+    singletons.qemu_templates = QemuTemplates()
+    singletons.qemu_pool = QemuPool()
+    singletons.socket_multiplexer = SocketMultiplexer()
+    singletons.qemu_overlay_images = QemuOverlayImages()
 
     # they share state which needs to be cleared for a new simulation
-    for singleton_with_simulation_scenario_state in [singletons.network_manager, singletons.shell_helper, singletons.spatial_singleton, singletons.simulation_errors]:
+    for singleton_with_simulation_scenario_state in [singletons.network_manager, singletons.shell_helper, singletons.spatial_singleton, singletons.simulation_errors, singletons.socket_multiplexer, singletons.qemu_overlay_images]:
         singletons.simulation_state_gc.add_singleton_with_simulation_scenario_state_(singleton_with_simulation_scenario_state)
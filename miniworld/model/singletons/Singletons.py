@@ -31,6 +31,11 @@ class Singletons:
         self.zeromq_server = None
         self.node_distribution_strategy = None
         self.qemu_process_singletons = None
+        self.socket_multiplexer = None
+        self.qemu_templates = None
+        self.qemu_overlay_images = None
+        self.storage_manager = None
+        self.qemu_pool = None
 
 # TODO: #54,#55: EXTRACT CLASS
 #################################################
@@ -5,7 +5,9 @@ from time import strptime
 from collections import OrderedDict
 
 import geojson
+import numpy as np
 
+from miniworld.model.collections.DistanceMatrix import DistanceMatrix
 from miniworld.model.spatial.Node.ArmaNode import ArmaNode
 
 __author__ = "Patrick Lampe"
@@ -22,12 +24,16 @@ class ArmaNodes:
         self.next_step = self.get_next_step_from_file()
 
     def get_distance_matrix(self):
-        output = {}
-        for n in range(0, self.node_cnt - 1):
-            for i in range(n + 1, self.node_cnt):
-                if n != i:
-                    output[(n + 1, i + 1)] = self.list_of_nodes[n].get_distance_in_m(self.list_of_nodes[i])
-        return output
+        """
+        Returns
+        -------
+        DistanceMatrix
+            The euclidean distances for all node pairs, computed in one vectorized pass.
+        """
+        coordinates = np.array([(node.location.x, node.location.y) for node in self.list_of_nodes], dtype=float)
+        deltas = coordinates[:, np.newaxis, :] - coordinates[np.newaxis, :, :]
+        distances = np.sqrt((deltas ** 2).sum(axis=-1))
+        return DistanceMatrix.factory().from_upper_triangular(range(1, self.node_cnt + 1), distances)
 
     def walk(self):
         if self.next_step is None:
@@ -6,7 +6,7 @@ from miniworld.model.collections.DistanceMatrix import DistanceMatrix
 from miniworld.model.singletons.Resetable import Resetable
 from miniworld.model.singletons.Singletons import singletons
 from miniworld.model.spatial import logger
-from miniworld.model.spatial.Location import Location
+from miniworld.model.spatial.Location import Location, get_distance_matrix_in_m
 
 from miniworld.util.CoreConfigFileParser import parse_core_config_file, parse_core_config_file_positions
 
@@ -163,14 +163,10 @@ class CoreConfigNodesWiFi(CoreConfigNodes):
     # TODO: use distances from core config file
     def get_distance_matrix(self):
         # TODO: supply iterator function
-        distance_matrix = DistanceMatrix.factory()()
-        for n in singletons.simulation_manager.get_emulation_node_ids():
-            for i in range(n + 1, singletons.simulation_manager.get_emulation_node_ids()[-1] + 1):
-                if n != i:
-                    distance = Location(*self.crnt_distances[n]).get_distance_in_m(Location(*self.crnt_distances[i]))
-                    distance_matrix.set_distance(n, i, distance)
-
-        return distance_matrix
+        node_ids = singletons.simulation_manager.get_emulation_node_ids()
+        locations = [Location(*self.crnt_distances[node_id]) for node_id in node_ids]
+        distances = get_distance_matrix_in_m(locations)
+        return DistanceMatrix.factory().from_upper_triangular(node_ids, distances)
 
     def _walk(self):
         # change the scenario
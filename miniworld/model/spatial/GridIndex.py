@@ -0,0 +1,82 @@
+# encoding: utf-8
+from collections import defaultdict
+
+import numpy as np
+
+# only the upper half of the 3x3 neighbourhood, so that each pair of cells is visited only once
+NEIGHBOUR_CELL_OFFSETS = ((0, 1), (1, -1), (1, 0), (1, 1))
+
+
+class GridIndex:
+    """
+    Uniform grid neighbourhood index.
+
+    Each point is bucketed into a square cell of size `cell_size`.
+    Two points which are closer than `cell_size` are always in the same or in adjacent cells.
+    Therefore only the points of these cells are candidate pairs, which turns the O(n^2) pair enumeration
+    into roughly O(n*k) with k being the average number of points in the neighbourhood.
+
+    Attributes
+    ----------
+    cell_size : float
+    """
+
+    def __init__(self, cell_size):
+        if cell_size <= 0:
+            raise ValueError("The cell size has to be positive! Is: '%s'" % cell_size)
+        self.cell_size = cell_size
+
+    def get_cells(self, coordinates):
+        """
+        Parameters
+        ----------
+        coordinates : numpy.ndarray
+            Planar (x, y) coordinates with shape (n, 2).
+
+        Returns
+        -------
+        dict<(int, int), list<int>>
+            The indices of the points for each cell.
+        """
+        cells = defaultdict(list)
+        for idx, cell in enumerate(map(tuple, np.floor(coordinates / self.cell_size).astype(int).tolist())):
+            cells[cell].append(idx)
+        return cells
+
+    def get_candidate_pairs(self, coordinates):
+        """
+        Get the pairs of points which may be closer than `cell_size`.
+
+        Parameters
+        ----------
+        coordinates : numpy.ndarray
+            Planar (x, y) coordinates with shape (n, 2).
+
+        Returns
+        -------
+        numpy.ndarray, numpy.ndarray
+            The indices `xs`, `ys` of the pairs with `xs < ys`, sorted.
+        """
+        cells = self.get_cells(np.asarray(coordinates, dtype=float))
+        xs, ys = [], []
+        for (cell_x, cell_y), idxs in cells.items():
+            idxs = np.array(idxs, dtype=int)
+
+            # pairs inside the cell
+            _xs, _ys = np.triu_indices(len(idxs), k=1)
+            xs.append(idxs[_xs])
+            ys.append(idxs[_ys])
+
+            # pairs with the neighbour cells
+            for offset_x, offset_y in NEIGHBOUR_CELL_OFFSETS:
+                neighbour_idxs = cells.get((cell_x + offset_x, cell_y + offset_y))
+                if neighbour_idxs:
+                    xs.append(np.repeat(idxs, len(neighbour_idxs)))
+                    ys.append(np.tile(neighbour_idxs, len(idxs)))
+
+        if not xs:
+            return np.array([], dtype=int), np.array([], dtype=int)
+
+        xs, ys = np.concatenate(xs), np.concatenate(ys)
+        pairs = np.unique(np.stack((np.minimum(xs, ys), np.maximum(xs, ys)), axis=1), axis=0)
+        return pairs[:, 0], pairs[:, 1]
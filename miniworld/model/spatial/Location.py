@@ -1,11 +1,126 @@
 # encoding: utf-8
 
 
+import numpy as np
+import pyproj
 from LatLon23 import LatLon, Latitude, Longitude
 
 __author__ = "Patrick Lampe"
 __email__ = "uni at lampep.de"
 
+# NOTE: same ellipsoid as used by :py:meth:`LatLon.distance`
+GEOD = pyproj.Geod(ellps='WGS84')
+
+
+# mean earth radius in meters
+EARTH_RADIUS_IN_M = 6371008.8
+
+
+def get_distance_matrix_in_m(locations, pairs=None):
+    """
+    Calculate the distances between the locations with a single vectorized call.
+    The distances are the same as the ones from :py:meth:`.Location.get_distance_in_m`.
+
+    Parameters
+    ----------
+    locations : list<Location>
+    pairs : (numpy.ndarray, numpy.ndarray), optional (default is all pairs)
+        Only calculate the distances for these indices (`xs`, `ys`) with `xs < ys`.
+
+    Returns
+    -------
+    numpy.ndarray
+        Upper triangular matrix (without the diagonal) of the distances in meters.
+        The other entries are `NaN`.
+    """
+    cnt_locations = len(locations)
+    distances = np.full((cnt_locations, cnt_locations), np.nan)
+    if cnt_locations < 2:
+        return distances
+
+    if pairs is None:
+        pairs = np.triu_indices(cnt_locations, k=1)
+    xs, ys = pairs
+    if not len(xs):
+        return distances
+
+    lat_lons = np.array([location.get_decimal_degrees() for location in locations], dtype=float)
+    distances[xs, ys] = get_distances_in_m(lat_lons, xs, ys)
+    return distances
+
+
+def get_distances_in_m(lat_lons, xs, ys):
+    """
+    Calculate the distances between the pairs of coordinates.
+
+    Parameters
+    ----------
+    lat_lons : numpy.ndarray
+        The (lat, lon) decimal degrees with shape (n, 2).
+    xs : numpy.ndarray
+    ys : numpy.ndarray
+
+    Returns
+    -------
+    numpy.ndarray
+        The distance in meters for each pair.
+    """
+    _, _, distances_in_m = GEOD.inv(lat_lons[xs, 1], lat_lons[xs, 0], lat_lons[ys, 1], lat_lons[ys, 0])
+    return np.asarray(distances_in_m, dtype=float)
+
+
+def get_row_pairs(cnt_locations, rows):
+    """
+    Get the pairs of the upper triangular matrix which involve at least one of the `rows`,
+    i.e. the rows and columns of these locations.
+
+    Parameters
+    ----------
+    cnt_locations : int
+    rows : numpy.ndarray
+        Indices of the locations.
+
+    Returns
+    -------
+    numpy.ndarray, numpy.ndarray
+        The indices (`xs`, `ys`) with `xs < ys`, sorted by `xs` and `ys`.
+    """
+    rows = np.unique(rows)
+    is_row = np.zeros(cnt_locations, dtype=bool)
+    is_row[rows] = True
+
+    xs = np.repeat(rows, cnt_locations)
+    ys = np.tile(np.arange(cnt_locations), len(rows))
+    # pairs among the rows are emitted once
+    is_pair = (xs != ys) & ~(is_row[ys] & (ys < xs))
+    xs, ys = np.minimum(xs, ys)[is_pair], np.maximum(xs, ys)[is_pair]
+
+    order = np.lexsort((ys, xs))
+    return xs[order], ys[order]
+
+
+def get_planar_coordinates_in_m(locations):
+    """
+    Project the locations onto a plane (equirectangular projection around the mean latitude).
+    Good enough to find nearby locations, but not to calculate exact distances.
+
+    Parameters
+    ----------
+    locations : list<Location>
+
+    Returns
+    -------
+    numpy.ndarray
+        The (x, y) coordinates in meters with shape (n, 2).
+    """
+    lat_lons = np.radians(np.array([location.get_decimal_degrees() for location in locations], dtype=float))
+    lat_lons = lat_lons.reshape(-1, 2)
+    if not len(lat_lons):
+        return lat_lons
+
+    lat_0 = lat_lons[:, 0].mean()
+    return EARTH_RADIUS_IN_M * np.stack((lat_lons[:, 1] * np.cos(lat_0), lat_lons[:, 0]), axis=1)
+
 
 class Location:
     """
@@ -66,6 +181,15 @@ class Location:
         """
         return self.latlon
 
+    def get_decimal_degrees(self):
+        """
+        Returns
+        -------
+        (float, float)
+            Latitude and longitude
+        """
+        return self.latlon.lat.decimal_degree, self.latlon.lon.decimal_degree
+
     def lat_lon_to_string(self):
         """
         Returns
@@ -54,6 +54,14 @@ class AbstractNode:
         """
         return self.crnt_movement_pattern.location.get_distance_in_km(snd_node.crnt_movement_pattern.location)
 
+    def get_location(self):
+        """
+        Returns
+        -------
+        Location
+        """
+        return self.crnt_movement_pattern.location
+
     def get_lat(self):
         """
         Returns
@@ -4,16 +4,23 @@ from miniworld.model.collections.DistanceMatrix import DistanceMatrix
 from collections import OrderedDict
 
 import geojson
+import numpy as np
+
+from miniworld.model.spatial.GridIndex import GridIndex
 from miniworld.model.spatial.Node.DefaultNode import DefaultNode
 from miniworld.model.spatial.Node.MoveOnBigStreetsNode import MoveOnBigStreetsNode
 from miniworld.model.spatial.Node.ArmaNode import ArmaNode
 from miniworld.model.spatial.Node.ReplayNode import ReplayNode
+from miniworld.model.spatial import Location
 from miniworld.model.singletons.Singletons import singletons
 from miniworld.Scenario import scenario_config
 
 __author__ = "Patrick Lampe"
 __email__ = "uni at lampep.de"
 
+# the planar projection used for the grid index is not exact, therefore enlarge the cells a little bit
+GRID_INDEX_PROJECTION_TOLERANCE = 0.05
+
 
 class Nodes:
     """ abstraction of current state of all nodes
@@ -56,17 +63,63 @@ class Nodes:
         """
         return self.dict_of_nodes[node_id]
 
-    def get_distance_matrix(self):
-        distance_matrix = DistanceMatrix.factory()()
+    def get_distance_matrix(self, max_distance=None, include_pairs=None):
+        """
+        Parameters
+        ----------
+        max_distance : float, optional (default is no limit)
+            Only emit the pairs which are closer than `max_distance` meters.
+            The pairs are looked up with a :py:class:`.GridIndex`, so far away pairs are never calculated.
+        include_pairs : set<(int, int)>, optional
+            Node id pairs which are always emitted, regardless of `max_distance`.
 
+        Returns
+        -------
+        DistanceMatrix
+            The distances (meters) for the node pairs, computed in one vectorized pass.
+        """
         # TODO: REPLACE all calls with this
         # singletons.simulation_manager.get_emulation_node_ids(): -> range(scenario_config.get_number_of_nodes())
-        for n in range(scenario_config.get_number_of_nodes() - 1):
-            for i in range(n + 1, scenario_config.get_number_of_nodes()):
-                if n != i:
-                    distance_matrix.set_distance(n + 1, i + 1,
-                                                 self.dict_of_nodes[n].get_distance_in_m(self.dict_of_nodes[i]))
-        return distance_matrix
+        cnt_nodes = scenario_config.get_number_of_nodes()
+        node_ids = range(1, cnt_nodes + 1)
+        locations = self.get_locations()
+
+        if max_distance is None:
+            distances = Location.get_distance_matrix_in_m(locations)
+            return DistanceMatrix.factory().from_upper_triangular(node_ids, distances)
+
+        grid_index = GridIndex(max_distance * (1 + GRID_INDEX_PROJECTION_TOLERANCE))
+        xs, ys = grid_index.get_candidate_pairs(Location.get_planar_coordinates_in_m(locations))
+        if include_pairs:
+            # node ids are 1-based
+            include_xs, include_ys = np.array(sorted(include_pairs), dtype=int).T - 1
+            xs, ys = np.concatenate((xs, include_xs)), np.concatenate((ys, include_ys))
+
+        distances = Location.get_distance_matrix_in_m(locations, pairs=(xs, ys))
+        is_included = np.zeros(distances.shape, dtype=bool)
+        if include_pairs:
+            is_included[include_xs, include_ys] = True
+        distances[~((distances < max_distance) | is_included)] = np.nan
+
+        return DistanceMatrix.factory().from_upper_triangular(node_ids, distances)
+
+    def get_locations(self):
+        """
+        Returns
+        -------
+        list<Location>
+            The location of each node, ordered by the node id.
+        """
+        return [self.dict_of_nodes[n].get_location() for n in range(scenario_config.get_number_of_nodes())]
+
+    def get_lat_lons(self):
+        """
+        Returns
+        -------
+        numpy.ndarray
+            The exact (lat, lon) decimal degrees of each node (ordered by the node id) with shape (n, 2).
+        """
+        return np.array([location.get_decimal_degrees() for location in self.get_locations()], dtype=float)
 
     def get_coordinates(self):
         """
@@ -0,0 +1,162 @@
+import asyncio
+import codecs
+
+from miniworld.repl.CommandRunner import CommandRunner, CommandPipeline, SOCKET_READ_BUF_SIZE, \
+    SHELL_PROMPT_SEARCH_WINDOW
+from miniworld.repl.errors import REPLConnectionClosed, REPLTimeout
+from miniworld.util.NetUtil import SocketExpect
+
+__author__ = 'Nils Schmidt'
+
+# time to wait before retrying to connect to the unix domain socket
+CONNECT_RETRY_INTERVAL = 0.1
+
+
+class AsyncCommandRunner(CommandRunner):
+    """
+    Coroutine variant of the :py:class:`.CommandRunner`.
+    Many nodes can be provisioned concurrently on a single event loop instead of blocking one thread per node.
+    The `timeout` applies to each command of the node.
+
+    Attributes
+    ----------
+    reader : asyncio.StreamReader
+    writer : asyncio.StreamWriter
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(AsyncCommandRunner, self).__init__(*args, **kwargs)
+        self.reader = None
+        self.writer = None
+
+    async def run(self):
+        """
+        Execute the code in the REPL.
+
+        1. Wait until the REPL is reachable
+        2. Connect
+        3. Execute the code line for line and wait for the shell prompt
+
+        Returns
+        -------
+        list<str>
+            The output of each command.
+
+        Raises
+        ------
+        REPLUnexpectedResult
+            If the `return_value_checker` raised an Exception.
+        REPLTimeout
+            If the `timeout` occurred while waiting for results from the REPL socket.
+        REPLConnectionClosed
+            If the REPL closed the connection before the script has been executed.
+        """
+        results = []
+        try:
+            await self.connect()
+
+            # we may need to press enter first to activate the console/management socket
+            if self.enter_shell_send_newline:
+                self.writer.write(b"\n")
+            await self.wait_for_command_execution_async(timeout=self.timeout)
+            if self.verbose_logger:
+                self.verbose_logger.debug("entered shell ...")
+
+            if self.pipelined:
+                await self.execute_script_pipelined_async(results)
+            else:
+                for cmd in self.get_commands():
+                    self.writer.write(cmd.encode())
+
+                    res = await self.wait_for_command_execution_async(timeout=self.timeout)
+                    self.check_return_value(cmd, res)
+                    results.append(res)
+
+        except asyncio.TimeoutError:
+            self.brief_logger.info('sending CTRL-C to shell ...')
+            try:
+                self.writer.write(b'\x03')
+            except OSError:
+                pass
+            raise REPLTimeout("The REPL '%s' encountered a timeout (%s) while looking for shell prompt (%s)" % (self.replable, self.timeout, self.shell_prompt))
+        except OSError as e:
+            self.brief_logger.exception(e)
+
+        finally:
+            await self.close()
+
+        return results
+
+    async def connect(self):
+        """ Wait until the unix domain socket is reachable and connect to it. """
+        while True:
+            try:
+                self.reader, self.writer = await asyncio.open_unix_connection(self.replable.path_uds_socket)
+                return
+            except (ConnectionRefusedError, FileNotFoundError):
+                await asyncio.sleep(CONNECT_RETRY_INTERVAL)
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            # python >= 3.7
+            if hasattr(self.writer, "wait_closed"):
+                try:
+                    await self.writer.wait_closed()
+                except OSError as e:
+                    self.brief_logger.exception(e)
+
+    async def execute_script_pipelined_async(self, results):
+        """
+        Coroutine variant of :py:meth:`.CommandRunner.execute_script_pipelined`.
+
+        Parameters
+        ----------
+        results : list<str>
+            The output of each command is appended.
+        """
+        pipeline = CommandPipeline(list(self.get_commands()))
+        decoder = codecs.getincrementaldecoder('utf-8')()
+
+        while not pipeline.is_done():
+            for line in pipeline.get_lines_to_send():
+                self.writer.write(line.encode())
+
+            data = await asyncio.wait_for(self.reader.read(SOCKET_READ_BUF_SIZE), self.timeout)
+            if not data:
+                raise REPLConnectionClosed("The REPL '%s' closed the connection!" % self.replable)
+            for cmd, res, exit_code in pipeline.feed(decoder.decode(data)):
+                res = self.process_output(res)
+                self.process_exit_code(cmd, exit_code)
+                self.check_return_value(cmd, res)
+                results.append(res)
+
+        # wait for the shell prompt after the last command
+        if not self.re_shell_prompt.search(pipeline.buffer):
+            await self.wait_for_command_execution_async(timeout=self.timeout)
+
+    async def wait_for_command_execution_async(self, timeout=None):
+        """ Wait until the shell prompt is visible.
+
+        Returns
+        -------
+        str
+            The result of executing the command.
+
+        Raises
+        ------
+        asyncio.TimeoutError
+        REPLConnectionClosed
+        """
+        socket_expect = SocketExpect(None, self.check_shell_prompt, search_window=SHELL_PROMPT_SEARCH_WINDOW)
+
+        async def read():
+            while True:
+                # returns all data which is available (up to the buffer size)
+                data = await self.reader.read(SOCKET_READ_BUF_SIZE)
+                if not data:
+                    raise REPLConnectionClosed("The REPL '%s' closed the connection!" % self.replable)
+                if socket_expect.process_data(data):
+                    return socket_expect.output
+
+        return self.process_output(await asyncio.wait_for(read(), timeout))
@@ -1,15 +1,126 @@
+import codecs
 import re
+import selectors
 import socket
+import time
+import uuid
 
 from miniworld import log
 from miniworld.Config import config
 from miniworld.Scenario import scenario_config
-from miniworld.repl.errors import REPLUnexpectedResult, REPLTimeout
-from miniworld.util import NetUtil
+from miniworld.repl.errors import REPLConnectionClosed, REPLUnexpectedResult, REPLTimeout
+from miniworld.util import NetUtil, SocketMultiplexer
 from miniworld.util.NetUtil import read_remaining_data, Timeout
 
 # buffer size for for non-bytewise operations
 SOCKET_READ_BUF_SIZE = 65536
+# the shell prompt is searched only in the last characters of the output
+SHELL_PROMPT_SEARCH_WINDOW = 4096
+# maximum number of bytes sent ahead in the pipelined mode, stay well below the input buffer of the tty (4096 bytes)
+PIPELINE_WINDOW_SIZE = 1024
+
+
+class CommandPipeline(object):
+    """
+    Pipelined execution of shell commands.
+    Each command is followed by a `printf` of a unique marker so that the output can be split per command
+    without waiting for the shell prompt after each command. The marker carries the exit status of the command.
+    The marker only appears in the output, the echo of the `printf` command has a space instead of the underscore.
+
+    Examples
+    --------
+    >>> pipeline = CommandPipeline(["uptime\\n", "hostname\\n"], marker="MARK")
+    >>> pipeline.get_lines_to_send()
+    ["uptime\\nprintf '\\\\n%s_%d_%d\\\\n' MARK 0 $?\\n", "hostname\\nprintf '\\\\n%s_%d_%d\\\\n' MARK 1 $?\\n"]
+    >>> pipeline.feed("up 1 day\\r\\nMARK_0_0\\r\\nOpen")
+    [('uptime\\n', 'up 1 day', 0)]
+    >>> pipeline.feed("Wrt\\r\\nMARK_1_127\\r\\nroot@OpenWrt:/# ")
+    [('hostname\\n', 'OpenWrt', 127)]
+    >>> pipeline.is_done(), pipeline.buffer
+    (True, 'root@OpenWrt:/# ')
+
+    Attributes
+    ----------
+    commands : list<str>
+    lines : list<str>
+        The commands with the marker command.
+    buffer : str
+        The output which has not been assigned to a command yet.
+    idx_send : int
+        The next line to send.
+    idx_recv : int
+        The next command whose marker is expected.
+    cnt_in_flight : int
+        The number of bytes sent for the commands which are not finished yet.
+    """
+
+    def __init__(self, commands, window_size=PIPELINE_WINDOW_SIZE, marker=None):
+        """
+        Parameters
+        ----------
+        commands : list<str>
+            Each command is terminated by a newline.
+        window_size : int, optional (default is `PIPELINE_WINDOW_SIZE`)
+            Maximum number of bytes sent ahead. The next command is always sent.
+        marker : str, optional (default is a random one)
+        """
+        self.marker = marker or "MW%s" % uuid.uuid4().hex
+        self.commands = commands
+        self.lines = [cmd + "printf '\\n%%s_%%d_%%d\\n' %s %d $?\n" % (self.marker, idx) for idx, cmd in enumerate(commands)]
+        self.window_size = window_size
+        self.buffer = ""
+        self.search_pos = 0
+        self.idx_send = self.idx_recv = self.cnt_in_flight = 0
+
+    def get_marker_regex(self, idx):
+        return re.compile(r"\r?\n%s_%d_(\d+)\r?\n" % (self.marker, idx))
+
+    def is_done(self):
+        return self.idx_recv == len(self.commands)
+
+    def get_lines_to_send(self):
+        """
+        Returns
+        -------
+        list<str>
+            The lines which can be sent without exceeding the window size.
+        """
+        lines = []
+        while self.idx_send < len(self.lines):
+            line = self.lines[self.idx_send]
+            if self.idx_send > self.idx_recv and self.cnt_in_flight + len(line) > self.window_size:
+                break
+            lines.append(line)
+            self.cnt_in_flight += len(line)
+            self.idx_send += 1
+        return lines
+
+    def feed(self, data):
+        """
+        Parameters
+        ----------
+        data : str
+            The output read from the shell.
+
+        Returns
+        -------
+        list<(str, str, int)>
+            The command, its output and its exit status for each command finished by `data`.
+        """
+        self.buffer += data
+        results = []
+        while not self.is_done():
+            match = self.get_marker_regex(self.idx_recv).search(self.buffer, self.search_pos)
+            if match is None:
+                # the marker may be split between two reads
+                self.search_pos = max(0, len(self.buffer) - len(self.marker) - 32)
+                break
+            results.append((self.commands[self.idx_recv], self.buffer[:match.start()], int(match.group(1))))
+            self.buffer = self.buffer[match.end():]
+            self.search_pos = 0
+            self.cnt_in_flight -= len(self.lines[self.idx_recv])
+            self.idx_recv += 1
+        return results
 
 
 class CommandRunner:
@@ -20,6 +131,8 @@ class CommandRunner:
     ----------
     sock
     re_shell_prompt
+    exit_codes : list<int>
+        The exit status of each command executed in the pipelined mode.
     """
 
     def __init__(self,
@@ -34,6 +147,7 @@ class CommandRunner:
                  template_engine_kwargs=None,
                  return_value_checker=None,
                  enter_shell_send_newline=True,
+                 pipelined=False,
                  ):
         """
         Parameters
@@ -68,6 +182,9 @@ class CommandRunner:
             Raises :py:class:`.REPLUnexpectedResult` if this method raises an exception.
         # TODO: DOC
         enter_shell_send_newline
+        pipelined : bool, optional (default is False)
+            Send the commands without waiting for the shell prompt (see :py:class:`.CommandPipeline`).
+            Only for shells! All commands are executed even if the `return_value_checker` fails for one of them.
         """
 
         if template_engine_kwargs is None:
@@ -84,11 +201,13 @@ class CommandRunner:
         self.return_value_checker = return_value_checker
         self.timeout = timeout
         self.enter_shell_send_newline = enter_shell_send_newline
+        self.pipelined = pipelined
 
         if self.brief_logger is None:
             raise ValueError("A valid logger must be given!")
 
         self.sock = None
+        self.exit_codes = []
         self.re_shell_prompt = re.compile(shell_prompt, flags=re.DOTALL | re.MULTILINE)
 
     def is_reuse_socket(self):
@@ -112,6 +231,8 @@ class CommandRunner:
             If the `return_value_checker` raised an Exception.
         REPLTimeout
             If the `timeout` occurred while waiting for results from the REPL socket.
+        REPLConnectionClosed
+            If the REPL closed the connection during the pipelined execution.
         """
 
         try:
@@ -133,7 +254,7 @@ class CommandRunner:
 
             # execute script on socket
             # NOTE: needed to let the generator finish the method execution
-            for x in self.execute_script():
+            for x in self.execute_script_pipelined() if self.pipelined else self.execute_script():
                 yield x
 
         except socket.error as e:
@@ -211,6 +332,82 @@ class CommandRunner:
             If return_value_checker
         """
 
+        for cmd in self.get_commands():
+
+            # execute command
+            self.sock.send(cmd.encode())
+
+            res = self.wait_for_command_execution(timeout=self.timeout)
+            # read all data which is not covered by the regex used for stream searching
+            # TODO: use loop here?!
+            res += read_remaining_data(self.sock, SOCKET_READ_BUF_SIZE)
+
+            self.check_return_value(cmd, res)
+
+            yield res
+
+    def execute_script_pipelined(self):
+        """
+        Same as :py:meth:`.execute_script` but send the commands ahead (see :py:class:`.CommandPipeline`).
+        The `timeout` applies to the whole script.
+
+        Yields
+        ------
+        str
+            The output from the commands.
+
+        Raises
+        ------
+        REPLUnexpectedResult
+            If return_value_checker
+        Timeout
+        REPLConnectionClosed
+            If the REPL closed the connection.
+        """
+        pipeline = CommandPipeline(list(self.get_commands()))
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        # the timeout applies to the whole pipeline, a shell which outputs slowly must not extend it
+        deadline = time.time() + self.timeout if self.timeout is not None else None
+
+        def get_remaining_time():
+            if deadline is not None:
+                return max(0, deadline - time.time())
+
+        with selectors.DefaultSelector() as selector:
+            selector.register(self.sock, selectors.EVENT_READ)
+
+            while not pipeline.is_done():
+                # NOTE: socket errors are only logged by :py:meth:`.__call__`, a closed REPL must fail the script
+                try:
+                    for line in pipeline.get_lines_to_send():
+                        self.sock.sendall(line.encode())
+
+                    if not selector.select(get_remaining_time()):
+                        raise Timeout("Timeout (%s) occurred!" % self.timeout)
+                    data = self.sock.recv(SOCKET_READ_BUF_SIZE)
+                except (BrokenPipeError, ConnectionResetError) as e:
+                    raise REPLConnectionClosed("The REPL '%s' closed the connection!" % self.replable, caused_by=e)
+                if not data:
+                    raise REPLConnectionClosed("The REPL '%s' closed the connection!" % self.replable)
+                for cmd, res, exit_code in pipeline.feed(decoder.decode(data)):
+                    res = self.process_output(res)
+                    self.process_exit_code(cmd, exit_code)
+                    self.check_return_value(cmd, res)
+                    yield res
+
+        # wait for the shell prompt after the last command
+        if not self.re_shell_prompt.search(pipeline.buffer):
+            self.wait_for_command_execution(timeout=get_remaining_time())
+
+    def get_commands(self):
+        """
+        Render the script and split it into commands. Each command is logged.
+
+        Yields
+        ------
+        str
+            The command (terminated by a newline).
+        """
         # render script variables
         script = self.replable.render_script_from_flo(self.flo, **self.template_engine_kwargs)
 
@@ -224,25 +421,38 @@ class CommandRunner:
                 if self.verbose_logger and self.log_file_echo_command:
                     self.verbose_logger.info("$> '%s'", cmd)
 
-                # execute command
-                cmd = cmd + "\n"
-                self.sock.send(cmd.encode())
+                yield cmd + "\n"
+
+    def process_exit_code(self, cmd, exit_code):
+        """
+        Remember the exit status of a command executed in the pipelined mode and log it if it is non-zero.
+        """
+        self.exit_codes.append(exit_code)
+        if exit_code != 0:
+            self.brief_logger.warning("The command '%s' exited with status %d", cmd.rstrip("\n"), exit_code)
+
+    def check_return_value(self, cmd, res):
+        """
+        Apply the `return_value_checker`.
 
-                res = self.wait_for_command_execution(timeout=self.timeout)
-                # read all data which is not covered by the regex used for stream searching
-                # TODO: use loop here?!
-                res += read_remaining_data(self.sock, SOCKET_READ_BUF_SIZE)
+        Raises
+        ------
+        REPLUnexpectedResult
+        """
+        if self.return_value_checker is not None:
+            try:
+                self.return_value_checker(cmd, res)
+            except Exception as e:
+                raise REPLUnexpectedResult(
+                    "The following output is unexpected to the method `return_value_checker`:\n%s" % res,
+                    caused_by=e)
 
-                # apply the custom check function
-                if self.return_value_checker is not None:
-                    try:
-                        self.return_value_checker(cmd, res)
-                    except Exception as e:
-                        raise REPLUnexpectedResult(
-                            "The following output is unexpected to the method `return_value_checker`:\n%s" % res,
-                            caused_by=e)
+    def check_shell_prompt(self, buf, whole_data):
+        # TODO: expose via logging config entry
+        if self.verbose_logger is not None:
+            self.verbose_logger.debug("expecting '%s', got: '%s'", self.shell_prompt, buf)
 
-                yield res
+        return self.re_shell_prompt.search(whole_data)
 
     def process_output(self, data):
         """ Write the `data` to the log file as well as to the logger """
@@ -282,21 +492,16 @@ class CommandRunner:
             In case of a timeout.
         """
         if check_fun is None:
-            def check_fun2(buf, whole_data):
-                # TODO: expose via logging config entry
-                if self.verbose_logger is not None:
-                    self.verbose_logger.debug("expecting '%s', got: '%s'", self.shell_prompt, buf)
-
-                return self.re_shell_prompt.search(whole_data)
-
-            check_fun = check_fun2
+            check_fun = self.check_shell_prompt
+        # one thread reads from the sockets of all nodes
+        socket_util = SocketMultiplexer if scenario_config.is_provisioning_boot_mode_multiplexer() else NetUtil
         try:
             res = self.process_output(
-                NetUtil.wait_for_socket_result(self.sock,
-                                               check_fun,
-                                               read_buf_size=SOCKET_READ_BUF_SIZE,
-                                               timeout=timeout
-                                               )
+                socket_util.wait_for_socket_result(self.sock,
+                                                   check_fun,
+                                                   read_buf_size=SOCKET_READ_BUF_SIZE,
+                                                   timeout=timeout,
+                                                   search_window=SHELL_PROMPT_SEARCH_WINDOW)
             )
         except NetUtil.Timeout as e:
             # netstat_uds = run_shell("netstat -ape -A unix")
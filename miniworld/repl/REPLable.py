@@ -1,6 +1,10 @@
+import asyncio
+import functools
+
 from miniworld import config
 from miniworld.log import get_logger, get_file_handler
 from miniworld.util import NetUtil
+from miniworld.repl.AsyncCommandRunner import AsyncCommandRunner
 from miniworld.repl.CommandRunner import CommandRunner
 
 __author__ = 'Nils Schmidt'
@@ -118,6 +122,41 @@ class REPLable(object):
             if idx == 1:
                 yield res
 
+    async def run_commands_eager_async(self, flo, *args, **kwargs):
+        """
+        Coroutine variant of :py:meth:`.run_commands_eager`.
+
+        For the documentation of the parameters, see the constructor of :py:class:`.CommandRunner`.
+
+        Returns
+        -------
+        str
+            Output of the commands
+        """
+        timeout = kwargs.pop("timeout", None) or config.get_repl_timeout()
+
+        command_runner = AsyncCommandRunner(self, timeout, flo, *args, **self.get_command_runner_kwargs(kwargs))
+        if command_runner.is_reuse_socket():
+            # the socket is shared with the synchronous command execution
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(None, functools.partial(self.run_commands_eager, flo, *args, timeout=timeout, **kwargs))
+
+        return '\n'.join(await command_runner.run())
+
+    def get_command_runner_kwargs(self, kwargs):
+        """
+        Overwrite this method to supply keyword arguments (e.g. the loggers) to the :py:class:`.CommandRunner`.
+
+        Parameters
+        ----------
+        kwargs : dict
+
+        Returns
+        -------
+        dict
+        """
+        return kwargs
+
     def run_commands_get_socket(self, *args, **kwargs):
         """
         Same as :py:meth:`.run_commands` but do not throw the socket away, which is used for the REPL.
@@ -11,3 +11,7 @@ class REPLUnexpectedResult(REPLError):
 
 class REPLTimeout(REPLError):
     pass
+
+
+class REPLConnectionClosed(REPLUnexpectedResult):
+    pass
@@ -1,8 +1,13 @@
 import msgpack
 import json
+import struct
+import zlib
+
+import numpy as np
 
 # TODO: ABC class
 from miniworld.Config import config
+from miniworld.model.collections import DistanceMatrix
 
 REGISTER_MSG_KEY_TUNNEL_ADDR = "tunnel_addr"
 
@@ -59,8 +64,33 @@ class Protocol:
     def get_register_msg_tunnel_addr(register_msg):
         return register_msg[REGISTER_MSG_KEY_TUNNEL_ADDR]
 
+    def encode_distance_matrix(self, distance_matrix):
+        """
+        Bring the distance matrix into a form which can be serialized.
+
+        Parameters
+        ----------
+        distance_matrix : DistanceMatrix or dict<(int, int), float>
+
+        Returns
+        -------
+        obj
+        """
+        return DistanceMatrix.transform_distance_matrix(distance_matrix)
+
+    def decode_distance_matrix(self, obj):
+        """
+        Inverse of :py:meth:`.encode_distance_matrix`.
+
+        Parameters
+        ----------
+        obj
 
-# TODO: move (en/de)coders here ...
+        Returns
+        -------
+        DistanceMatrix
+        """
+        return DistanceMatrix.detransform_distance_matrix(obj)
 
 
 class JSONProtocol(Protocol):
@@ -79,10 +109,79 @@ class MsgPackProtocol(Protocol):
         return msgpack.unpackb(obj)
 
 
+class BinaryProtocol(MsgPackProtocol):
+    """
+    Like the :py:class:`.MsgPackProtocol`, but the distance matrices are encoded as binary columns:
+    the uint16 node ids x, the uint16 node ids y and the float32 distances.
+    The columns are optionally compressed (see :py:meth:`.GlobalConfig.get_protocol_compression`).
+
+    Wire format: codec (uint8) | number of entries (uint32) | columns (compressed)
+    """
+
+    HEADER = struct.Struct("<BI")
+    CODECS = [config.PROTOCOL_COMPRESSION_NONE, config.PROTOCOL_COMPRESSION_ZLIB,
+              config.PROTOCOL_COMPRESSION_ZSTD, config.PROTOCOL_COMPRESSION_LZ4]
+    MAX_NODE_ID = np.iinfo(np.uint16).max
+
+    def __init__(self, compression=None):
+        """
+        Parameters
+        ----------
+        compression : str, optional
+            Defaults to the configured compression.
+        """
+        self.compression = compression or config.get_protocol_compression()
+
+    def encode_distance_matrix(self, distance_matrix):
+        if not isinstance(distance_matrix, DistanceMatrix.DistanceMatrix):
+            distance_matrix = DistanceMatrix.factory()(distance_matrix)
+
+        xs, ys, distances = distance_matrix.to_arrays()
+        if len(xs) and max(xs.max(), ys.max()) > self.MAX_NODE_ID:
+            raise ValueError("Node ids > %d are not supported by the binary protocol!" % self.MAX_NODE_ID)
+
+        columns = xs.astype("<u2").tobytes() + ys.astype("<u2").tobytes() + distances.astype("<f4").tobytes()
+        return self.HEADER.pack(self.CODECS.index(self.compression), len(xs)) + self.compress(columns)
+
+    def decode_distance_matrix(self, obj):
+        codec, cnt = self.HEADER.unpack_from(obj)
+        columns = self.decompress(self.CODECS[codec], obj[self.HEADER.size:])
+
+        xs = np.frombuffer(columns, dtype="<u2", count=cnt).astype(np.int64)
+        ys = np.frombuffer(columns, dtype="<u2", count=cnt, offset=2 * cnt).astype(np.int64)
+        distances = np.frombuffer(columns, dtype="<f4", count=cnt, offset=4 * cnt).astype(float)
+        return DistanceMatrix.factory().from_arrays(xs, ys, distances)
+
+    def compress(self, data):
+        if self.compression == config.PROTOCOL_COMPRESSION_ZLIB:
+            return zlib.compress(data)
+        elif self.compression == config.PROTOCOL_COMPRESSION_ZSTD:
+            import zstandard
+            return zstandard.ZstdCompressor().compress(data)
+        elif self.compression == config.PROTOCOL_COMPRESSION_LZ4:
+            import lz4.frame
+            return lz4.frame.compress(data)
+        return data
+
+    @staticmethod
+    def decompress(codec, data):
+        if codec == config.PROTOCOL_COMPRESSION_ZLIB:
+            return zlib.decompress(data)
+        elif codec == config.PROTOCOL_COMPRESSION_ZSTD:
+            import zstandard
+            return zstandard.ZstdDecompressor().decompress(data)
+        elif codec == config.PROTOCOL_COMPRESSION_LZ4:
+            import lz4.frame
+            return lz4.frame.decompress(data)
+        return data
+
+
 def factory():
     if config.is_protocol_msgpack():
         return MsgPackProtocol
     elif config.is_protocol_json():
         return JSONProtocol
+    elif config.is_protocol_binary():
+        return BinaryProtocol
     else:
         raise ValueError("Invalid protocol!")
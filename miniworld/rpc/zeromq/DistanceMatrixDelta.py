@@ -0,0 +1,137 @@
+from miniworld.log import log
+from miniworld.model.collections import DistanceMatrix
+
+__author__ = 'Nils Schmidt'
+
+MSG_KEY_SEQ = "seq"
+MSG_KEY_KEYFRAME = "keyframe"
+MSG_KEY_ENTRIES = "entries"
+MSG_KEY_REMOVED = "removed"
+
+
+class DistanceMatrixDeltaEncoder:
+    """
+    Encodes the distance matrix published each step as the entries which changed since the previous step.
+
+    Each message carries a sequence number. Every `keyframe_interval` steps (and after a reset)
+    the whole distance matrix is sent, so that late or desynced subscribers can resync.
+
+    Attributes
+    ----------
+    keyframe_interval : int
+        Send a keyframe every n messages. 1 sends only keyframes, 0 only the first one.
+    protocol : Protocol
+        Encodes the entries.
+    seq : int
+        The sequence number of the next message.
+    last_distance_matrix : DistanceMatrix
+        The previously encoded distance matrix.
+    """
+
+    def __init__(self, keyframe_interval, protocol):
+        self.keyframe_interval = keyframe_interval
+        self.protocol = protocol
+        self.reset()
+
+    def reset(self):
+        self.seq = 0
+        self.last_distance_matrix = None
+
+    def is_keyframe(self):
+        if self.last_distance_matrix is None:
+            return True
+        return self.keyframe_interval > 0 and self.seq % self.keyframe_interval == 0
+
+    def encode(self, distance_matrix):
+        """
+        Parameters
+        ----------
+        distance_matrix : DistanceMatrix
+
+        Returns
+        -------
+        dict
+            The message, serializable by the :py:class:`.Protocol`.
+        """
+        if not isinstance(distance_matrix, DistanceMatrix.DistanceMatrix):
+            distance_matrix = DistanceMatrix.factory()(distance_matrix)
+
+        keyframe = self.is_keyframe()
+        if keyframe:
+            entries = distance_matrix
+            removed = []
+        else:
+            entries = distance_matrix.diff(self.last_distance_matrix)
+            removed = [list(key) for key in self.last_distance_matrix.keys() if key not in distance_matrix]
+
+        msg = {
+            MSG_KEY_SEQ: self.seq,
+            MSG_KEY_KEYFRAME: keyframe,
+            MSG_KEY_ENTRIES: self.protocol.encode_distance_matrix(entries),
+            MSG_KEY_REMOVED: removed
+        }
+
+        self.seq += 1
+        self.last_distance_matrix = distance_matrix.copy()
+        return msg
+
+
+class DistanceMatrixDeltaDecoder:
+    """
+    Maintains the whole distance matrix from the messages of the :py:class:`.DistanceMatrixDeltaEncoder`.
+
+    If a message got lost, the deltas are still applied, but the matrix may be stale until the next keyframe.
+
+    Attributes
+    ----------
+    protocol : Protocol
+        Decodes the entries.
+    distance_matrix : DistanceMatrix
+    seq : int
+        The sequence number of the last message.
+    synced : bool
+        Whether all messages since the last keyframe have been applied.
+    """
+
+    def __init__(self, protocol):
+        self.protocol = protocol
+        self.reset()
+
+    def reset(self):
+        self.distance_matrix = DistanceMatrix.factory()()
+        self.seq = None
+        self.synced = False
+
+    def decode(self, msg):
+        """
+        Parameters
+        ----------
+        msg : dict
+
+        Returns
+        -------
+        DistanceMatrix
+            The updated whole distance matrix.
+        """
+        seq = msg[MSG_KEY_SEQ]
+        entries = self.protocol.decode_distance_matrix(msg[MSG_KEY_ENTRIES])
+
+        if msg[MSG_KEY_KEYFRAME]:
+            if not self.synced:
+                log.info("resynced distance matrix with keyframe %d", seq)
+            self.distance_matrix = entries
+            self.synced = True
+        else:
+            if self.synced and seq != self.seq + 1:
+                log.warning("missed distance matrix delta (expected %d, got %d), waiting for the next keyframe ...",
+                            self.seq + 1, seq)
+                self.synced = False
+
+            for key in msg[MSG_KEY_REMOVED]:
+                key = tuple(key)
+                if key in self.distance_matrix:
+                    del self.distance_matrix[key]
+            self.distance_matrix.update(entries)
+
+        self.seq = seq
+        return self.distance_matrix
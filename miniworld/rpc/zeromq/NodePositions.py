@@ -0,0 +1,48 @@
+import numpy as np
+
+__author__ = 'Nils Schmidt'
+
+MSG_KEY_LAT_LONS = "lat_lons"
+MSG_KEY_MAX_DISTANCE = "max_distance"
+
+
+class NodePositions:
+    """
+    The positions of all nodes which are distributed instead of the distance matrix (O(n) instead of O(n²)).
+    Each emulation server derives the entries of the distance matrix for its local nodes itself.
+
+    Attributes
+    ----------
+    lat_lons : numpy.ndarray
+        The (lat, lon) decimal degrees with shape (n, 2). The node ids are 1 ... n.
+    max_distance : float
+        See :py:attr:`.MovementDirector.max_connected_distance`.
+    """
+
+    def __init__(self, lat_lons, max_distance=None):
+        self.lat_lons = np.asarray(lat_lons, dtype=float).reshape(-1, 2)
+        self.max_distance = max_distance
+
+    @property
+    def node_ids(self):
+        return range(1, len(self.lat_lons) + 1)
+
+    def to_msg(self):
+        """
+        Returns
+        -------
+        dict
+            The message, serializable by the :py:class:`.Protocol`.
+        """
+        return {
+            MSG_KEY_LAT_LONS: self.lat_lons.ravel().tolist(),
+            MSG_KEY_MAX_DISTANCE: self.max_distance
+        }
+
+    @staticmethod
+    def is_msg(msg):
+        return isinstance(msg, dict) and MSG_KEY_LAT_LONS in msg
+
+    @classmethod
+    def from_msg(cls, msg):
+        return cls(msg[MSG_KEY_LAT_LONS], msg[MSG_KEY_MAX_DISTANCE])
@@ -55,6 +55,8 @@ class Expecter:
         address, message part 1, ..., message part n
     cnt_message_parts : int
         How much parts the messages is expected to have
+    last_address : obj
+        The address of the client which sent the last message (also if the message has been ignored).
     """
 
     def __init__(self, socket, cnt_peers, protocol, state,
@@ -79,6 +81,7 @@ class Expecter:
         self.cnt_message_parts = cnt_message_parts
         # address, space, state
         self.cnt_minimal_args_per_message = 3
+        self.last_address = None
 
     def expect_for_all(self):
         """
@@ -116,6 +119,7 @@ class Expecter:
             The received objects if no error occurred!
         """
         msgs = self.socket.recv_multipart()
+        self.last_address = msgs[0]
         expected_msg_parts = self.cnt_minimal_args_per_message + self.cnt_message_parts
         if len(msgs) == expected_msg_parts:
             # address, empty, state
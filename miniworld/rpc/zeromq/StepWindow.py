@@ -0,0 +1,54 @@
+__author__ = 'Nils Schmidt'
+
+
+class StepWindow:
+    """
+    Bounded staleness for the distribution of the distance matrix:
+    the coordinator may publish up to `max_lag` steps which have not been applied by all emulation servers yet.
+
+    Attributes
+    ----------
+    max_lag : int
+    cnt_peers : int
+        The number of emulation servers.
+    published : int
+        The number of published steps.
+    applied : dict<int, int>
+        For each server the number of applied steps (as reported by the server).
+    """
+
+    def __init__(self, max_lag, cnt_peers):
+        self.max_lag = max_lag
+        self.cnt_peers = cnt_peers
+        self.reset()
+
+    def reset(self):
+        self.published = 0
+        self.applied = {}
+
+    def report(self, server_id, applied_steps):
+        # reports may be coalesced, but never go back
+        self.applied[server_id] = max(applied_steps, self.applied.get(server_id, 0))
+
+    def get_min_applied(self):
+        """
+        Returns
+        -------
+        int
+            The number of steps applied by the slowest server.
+        """
+        if len(self.applied) < self.cnt_peers:
+            return 0
+        return min(self.applied.values())
+
+    def get_lag(self):
+        return self.published - self.get_min_applied()
+
+    def is_full(self):
+        """
+        Returns
+        -------
+        bool
+            Whether the next step may not be published before the slowest server catches up.
+        """
+        return self.get_lag() >= self.max_lag
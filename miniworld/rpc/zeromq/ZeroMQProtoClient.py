@@ -17,6 +17,8 @@ from miniworld.model.singletons.Resetable import Resetable
 from miniworld.model.singletons.Singletons import singletons
 from miniworld.rpc import Protocol
 from miniworld.rpc.zeromq import States
+from miniworld.rpc.zeromq.DistanceMatrixDelta import DistanceMatrixDeltaDecoder
+from miniworld.rpc.zeromq.NodePositions import NodePositions
 
 
 def factory():
@@ -110,10 +112,13 @@ class ZeroMQClient:
         # self.svc.setsockopt(zmq.REQ_RELAXED, 1)
         self.svc.connect(addr)
 
-    # def reset(self):
-    #     #self.reset_socket.close()
-    #     self.svc.close()
-    #     self.init_req_socket()
+    def reinit_req_socket(self):
+        """
+        Replace the request socket, e.g. if a request will not be answered anymore.
+        A request socket can not send before it received the reply of the previous request.
+        """
+        self.svc.close(linger=0)
+        self.init_req_socket()
 
     # TODO: create own logger!
     def myprint(self, str):
@@ -273,13 +278,17 @@ class ZeroMQClientReq(ZeroMQClient):
     def recv_distance_matrix(self):
         """
         Receive the distance matrix and detransform it to its actual form.
+        If the node positions are distributed instead, the local distance matrix is derived from them.
 
         Returns
         -------
         DistanceMatrix
         """
+        msg = self.recv()
+        if NodePositions.is_msg(msg):
+            return singletons.simulation_manager.get_local_distance_matrix_from_positions(NodePositions.from_msg(msg))
 
-        return DistanceMatrix.factory()(DistanceMatrix.detransform_distance_matrix(self.recv()))
+        return singletons.protocol.decode_distance_matrix(msg)
 
 
 class ZeroMQClientSub(ZeroMQClient, Resetable):
@@ -292,11 +301,15 @@ class ZeroMQClientSub(ZeroMQClient, Resetable):
     Attributes
     ----------
     sub_socket : zmq.sugar.socket.Socket
+    delta_decoder : DistanceMatrixDeltaDecoder
+        Maintains the whole distance matrix from the published changes.
     """
 
     def __init__(self, *args, **kwargs):
         super(ZeroMQClientSub, self).__init__(*args, **kwargs)
 
+        self.delta_decoder = DistanceMatrixDeltaDecoder(singletons.protocol)
+
         self.sub_socket = self.context.socket(zmq.SUB)
         self.sub_socket.setsockopt(zmq.SUBSCRIBE, b'')
 
@@ -332,13 +345,19 @@ class ZeroMQClientSub(ZeroMQClient, Resetable):
 
     def recv_distance_matrix(self):
         """
-        Receive the whole distance matrix via the publish-subscribe socket and filter out the relevant part.
+        Receive the changes of the whole distance matrix via the publish-subscribe socket,
+        apply them to the local copy and filter out the relevant part.
+        If the node positions are published instead, the local distance matrix is derived from them.
 
         Returns
         -------
         DistanceMatrix
         """
-        whole_distance_matrix = DistanceMatrix.detransform_distance_matrix(self.deserialize(self.sub_socket.recv()))
+        msg = self.deserialize(self.sub_socket.recv())
+        if NodePositions.is_msg(msg):
+            return singletons.simulation_manager.get_local_distance_matrix_from_positions(NodePositions.from_msg(msg))
+
+        whole_distance_matrix = self.delta_decoder.decode(msg)
 
         if config.is_debug():
             log.info("server id: %d", scenario_config.get_distributed_server_id())
@@ -352,6 +371,7 @@ class ZeroMQClientSub(ZeroMQClient, Resetable):
     def reset(self):
         log.info("got reset message ...")
         singletons.simulation_manager.abort()
+        self.delta_decoder.reset()
         # super(ZeroMQClientSub, self).reset()
         self.start(self.tunnel_ip)
 
@@ -375,6 +395,10 @@ class ZeroMQClientSub(ZeroMQClient, Resetable):
         log.info("syncing with server initially ...")
         self.sync()
 
+        if config.get_zeromq_max_step_lag() > 0:
+            self.enter_pipelined_run_loop()
+            return
+
         # enable CTRL-C
         while True:
             def step():
@@ -426,6 +450,53 @@ class ZeroMQClientSub(ZeroMQClient, Resetable):
                 # exec_time = timeit(step, number=1)
                 # log.info("took %0.2f seconds (sync + step)", exec_time)
 
+    def enter_pipelined_run_loop(self):
+        """
+        Apply the queued distance matrices as fast as possible and report the number of applied steps.
+        The server only waits for the reports if it is more than the maximum lag ahead.
+
+        There is at most one report in flight (request socket). Reports are coalesced until it is acknowledged.
+        If the reset arrives while a report is in flight, the request socket is replaced.
+
+        Raises
+        ------
+        ZeroMQException
+        """
+        applied_steps = reported_steps = 0
+        waiting_for_ack = False
+
+        while True:
+            sockets = [self.reset_socket, self.sub_socket] + ([self.svc] if waiting_for_ack else [])
+            rlist, _, xlist = zmq.select(sockets, [], [])
+
+            if xlist:
+                raise ZeroMQException("Unknown error occurred during a select() call")
+
+            if self.reset_socket in rlist:
+                self.reset_socket.recv()
+                # the server drops the report on reset, the new registration needs a usable request socket
+                if waiting_for_ack:
+                    self.reinit_req_socket()
+                self.reset()
+                return
+
+            if self.svc in rlist:
+                self.recv_sync()
+                waiting_for_ack = False
+
+            if self.sub_socket in rlist:
+                local_distance_matrix = self.recv_distance_matrix()
+                if config.is_debug():
+                    log.info("received distance matrix: %s", local_distance_matrix)
+
+                singletons.simulation_manager.step(1, distance_matrix=local_distance_matrix)
+                applied_steps += 1
+
+            if not waiting_for_ack and reported_steps < applied_steps:
+                self.send_server_id(States.STATE_DISTANCE_MATRIX, applied_steps)
+                reported_steps = applied_steps
+                waiting_for_ack = True
+
 
 if __name__ == '__main__':
 
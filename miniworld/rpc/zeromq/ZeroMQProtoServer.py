@@ -10,10 +10,12 @@ import miniworld
 from miniworld import Scenario
 from miniworld.Config import config
 from miniworld.log import log
-from miniworld.model.collections import DistanceMatrix
 from miniworld.model.singletons.Singletons import singletons
 from miniworld.rpc import Protocol
-from miniworld.rpc.zeromq import States
+from miniworld.rpc.zeromq import DistanceMatrixDelta, States
+from miniworld.rpc.zeromq.DistanceMatrixDelta import DistanceMatrixDeltaEncoder
+from miniworld.rpc.zeromq.NodePositions import NodePositions
+from miniworld.rpc.zeromq.StepWindow import StepWindow
 from miniworld.rpc.zeromq.StateMachine import Expecter, ResponderArgument, ResponderServerID, ResponderPerServerID
 from miniworld.util.CliUtil import scenario_config_parser, parse_scenario_config
 
@@ -272,15 +274,20 @@ class ZeroMQServerRouter(ZeroMQServer):
 
         Parameters
         ----------
-        distance_matrix_per_server : dict<int, dict<(int, int), int>>
-            For each server the distance matrix.
+        distance_matrix_per_server : dict<int, dict<(int, int), int>> or NodePositions
+            For each server the distance matrix. Or the positions of all nodes for all servers.
         """
 
         log.info("syncing nodes ...")
 
-        distance_matrix_per_server = dict(zip(distance_matrix_per_server.keys(),
-                                              list(map(DistanceMatrix.transform_distance_matrix,
-                                                       distance_matrix_per_server.values()))))
+        if isinstance(distance_matrix_per_server, NodePositions):
+            msg = distance_matrix_per_server.to_msg()
+            distance_matrix_per_server = {server_id: msg for server_id in
+                                          Scenario.scenario_config.get_distributed_server_ids()}
+        else:
+            distance_matrix_per_server = dict(zip(distance_matrix_per_server.keys(),
+                                                  list(map(singletons.protocol.encode_distance_matrix,
+                                                           distance_matrix_per_server.values()))))
 
         expect_distance_matrix = self.get_expecter_state(States.STATE_DISTANCE_MATRIX, 1)
         # sync clients and send each his distance matrix
@@ -304,14 +311,20 @@ class ZeroMQCServerPubSub(ZeroMQServer):
     Attributes
     ----------
     pub_socket : zmq.sugar.socket.Socket
-    last_distance_matrix_hash : str
-        The last hash of the distance matrix.
-        Used to send only the distance matrix if it changed (configurable via the config system)
+    delta_encoder : DistanceMatrixDeltaEncoder
+        Publishes only the changes of the distance matrix with periodic keyframes
+        (configurable via the config system).
+    step_window : StepWindow
+        If the steps are pipelined (see :py:meth:`.GlobalConfig.get_zeromq_max_step_lag`),
+        tracks how far the subscribers lag behind. Otherwise, the subscribers are synced after each step.
     """
 
-    last_distance_matrix_hash = ""
-
     def __init__(self, *args, **kwargs):
+        keyframe_interval = config.get_distance_matrix_keyframe_interval() \
+            if config.is_publish_only_new_distance_matrices() else 1
+        self.delta_encoder = DistanceMatrixDeltaEncoder(keyframe_interval, singletons.protocol)
+        self.step_window = None
+
         super(ZeroMQCServerPubSub, self).__init__(*args, **kwargs)
 
         # create the publish socket
@@ -320,20 +333,40 @@ class ZeroMQCServerPubSub(ZeroMQServer):
         self.pub_socket.bind(addr)
         log.info("listening on '%s'", addr)
 
+    def send_reset(self):
+        # the clients register again after the reset, so the reports are drained before
+        if self.step_window is not None:
+            self.drain_step_reports()
+        super(ZeroMQCServerPubSub, self).send_reset()
+
+    def reset(self):
+        super(ZeroMQCServerPubSub, self).reset()
+        self.delta_encoder.reset()
+        self.step_window = None
+
     def shutdown(self):
         # finally call context.term()
         super(ZeroMQCServerPubSub, self).shutdown()
 
     def send_distance_matrix(self, distance_matrix):
         """
-        Send the distance matrix via the publish socket.
+        Send the changes of the distance matrix (or the node positions) via the publish socket.
 
         Parameters
         ----------
-        distance_matrix : DistanceMatrix
+        distance_matrix : DistanceMatrix or NodePositions
         """
-        data = self.serialize(DistanceMatrix.transform_distance_matrix(distance_matrix))
-        log.info("sending %f kbytes ...", len(data) / 1024.0)
+        if isinstance(distance_matrix, NodePositions):
+            data = self.serialize(distance_matrix.to_msg())
+            log.info("sending %f kbytes (positions) ...", len(data) / 1024.0)
+            self.pub_socket.send(data)
+            return
+
+        msg = self.delta_encoder.encode(distance_matrix)
+        data = self.serialize(msg)
+        log.info("sending %f kbytes (%s %d) ...", len(data) / 1024.0,
+                 "keyframe" if msg[DistanceMatrixDelta.MSG_KEY_KEYFRAME] else "delta",
+                 msg[DistanceMatrixDelta.MSG_KEY_SEQ])
         self.pub_socket.send(data)
 
     def _handle_state_distance_matrix(self, distance_matrix):
@@ -342,45 +375,59 @@ class ZeroMQCServerPubSub(ZeroMQServer):
             log.info("syncing clients initially ...")
             self.sync_subscribers()
 
-        self.send_distance_matrix(distance_matrix)
-        self.sync_subscribers()
-
-        # def enter_run_loop(self, block=True):
-        #     """
-        #     Notify subscribers about changes in the distance matrix.
-        #     """
-        #
-        #     super(ZeroMQCServerPubSub, self).enter_run_loop()
-        #
-        #     ZeroMQCServerPubSub.last_distance_matrix_hash = ""
-        #
-        #     def fun(whole_distance_matrix):
-        #
-        #         new_distance_matrix = True
-        #         if config.is_publish_only_new_distance_matrices():
-        #             new_distance_matrix_hash = hash(frozenset(whole_distance_matrix.items()))
-        #
-        #             if new_distance_matrix_hash != ZeroMQCServerPubSub.last_distance_matrix_hash:
-        #                 new_distance_matrix = False
-        #
-        #         if new_distance_matrix:
-        #             log.info("change in distance matrix ...")
-        #
-        #             self.handle_state_distance_matrix(whole_distance_matrix)
-        #
-        #             if config.is_publish_only_new_distance_matrices():
-        #                 ZeroMQCServerPubSub.last_distance_matrix_hash = new_distance_matrix_hash
-        #
-        #             if config.is_debug():
-        #                 log.debug("publishing distance matrix: %s", pformat(whole_distance_matrix))
-        #         else:
-        #             log.info("no change in distance matrix ... not publishing!")
-        #
-        #     self.drun_loop = singletons.simulation_manager.start_distributed_runloop(fun, split_distance_matrix=False)
-        #     if block:
-        #         # enable CTRL-C
-        #         while 1:
-        #             self.drun_loop.join(0.1)
+            max_step_lag = config.get_zeromq_max_step_lag()
+            if max_step_lag > 0:
+                log.info("pipelining steps with a maximum lag of %d steps", max_step_lag)
+                self.step_window = StepWindow(max_step_lag, self.cnt_peers)
+
+        if self.step_window is None:
+            self.send_distance_matrix(distance_matrix)
+            self.sync_subscribers()
+        else:
+            self.handle_step_reports()
+            self.send_distance_matrix(distance_matrix)
+            self.step_window.published += 1
+
+    def handle_step_reports(self):
+        """
+        Acknowledge the number of applied steps the subscribers reported in the meantime.
+        Blocks only until the slowest subscriber is within the lag window again.
+        """
+        if self.step_window.is_full():
+            log.info("waiting for subscribers (lag: %d steps) ...", self.step_window.get_lag())
+
+        while True:
+            if not self.step_window.is_full() and not self.router_socket.poll(0):
+                return
+
+            expecter = self.get_expecter_state(States.STATE_DISTANCE_MATRIX, 2)
+            if expecter.expect():
+                _, server_id, applied_steps = expecter.expect_storage[-1]
+                self.step_window.report(server_id, applied_steps)
+                ResponderArgument(self.router_socket, self.protocol, expecter, '').respond()
+            else:
+                self.ack_ignored_message(expecter)
+
+    def drain_step_reports(self):
+        """
+        Acknowledge the step reports which are still queued when the stepping ends,
+        so that they are not taken for messages of the next simulation.
+        Reports which arrive later are ignored by the state machine.
+        """
+        while self.router_socket.poll(0):
+            expecter = self.get_expecter_state(States.STATE_DISTANCE_MATRIX, 2)
+            if expecter.expect():
+                ResponderArgument(self.router_socket, self.protocol, expecter, '').respond()
+            else:
+                self.ack_ignored_message(expecter)
+
+    def ack_ignored_message(self, expecter):
+        """
+        Acknowledge a message the state machine ignored (wrong state or number of parts).
+        Otherwise, the request socket of the client blocks forever while waiting for the acknowledgement.
+        """
+        log.error("acknowledging the ignored message of client '%s' to unblock it", expecter.last_address)
+        self.router_socket.send_multipart([expecter.last_address, b'', self.protocol.serialize('')])
 
 
 def main(cnt_peers):
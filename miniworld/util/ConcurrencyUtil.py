@@ -1,3 +1,4 @@
+import asyncio
 import contextlib
 from time import sleep
 
@@ -66,6 +67,39 @@ def tpe(cnt_minions):
         yield executor
 
 
+def run_coroutines(coroutines):
+    """
+    Run the coroutines concurrently on a new event loop.
+
+    Parameters
+    ----------
+    coroutines : iterable<coroutine>
+
+    Returns
+    -------
+    list
+        The results in the order of the coroutines.
+
+    Raises
+    ------
+    Exception
+        The first exception raised by a coroutine.
+    """
+    # no `asyncio.run` (python >= 3.7)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    tasks = [loop.create_task(coroutine) for coroutine in coroutines]
+    try:
+        return loop.run_until_complete(asyncio.gather(*tasks))
+    finally:
+        # the other coroutines are still running if one raised
+        for task in tasks:
+            task.cancel()
+        loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
 def cpu_count():
     cnt_minions = multiprocessing.cpu_count()
     return int(round(cnt_minions))
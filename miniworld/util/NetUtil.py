@@ -1,3 +1,4 @@
+import codecs
 import errno
 import time
 import socket
@@ -107,6 +108,10 @@ class Timeout(Base):
     pass
 
 
+# read in chunks instead of bytewise
+DEFAULT_READ_BUF_SIZE = 65536
+
+
 # # TODO: DOC
 # TODO: use for multiple sockets in parallel!
 
@@ -114,7 +119,8 @@ class Timeout(Base):
 class SocketExpect(object):
     # TODO: REMOVE expected_length
     # TODO: support timeout!
-    def __init__(self, sock, check_fun, read_buf_size=1, timeout=None, send_data=None):
+    def __init__(self, sock, check_fun, read_buf_size=DEFAULT_READ_BUF_SIZE, timeout=None, send_data=None,
+                 search_window=None):
         """
         Read from the socket `sock` until the function
         `check_fun` return True.
@@ -122,11 +128,15 @@ class SocketExpect(object):
         Parameters
         ----------
         sock: socket
-        check_fun : str -> str -> bool
-            Currently received data, whole data, expected result?
-        read_buf_size : int, optional (default is 1)
-            Reads bytewise from the socket.
+        check_fun : bytes -> str -> bool
+            Currently received data, whole data (or the search window), expected result?
+        read_buf_size : int, optional (default is `DEFAULT_READ_BUF_SIZE`)
+            Maximum number of bytes read from the socket at once.
         send_data: bytes
+        search_window : int, optional (default is None)
+            If set, `check_fun` gets only the last `search_window` characters of the previously received data
+            plus the currently received data instead of the whole data.
+            Matches which are not longer than `search_window` are found as before.
         """
 
         if timeout is not None and timeout < 0:
@@ -134,17 +144,26 @@ class SocketExpect(object):
         self.sock = sock
         self.check_fun = check_fun
         self.read_buf_size = read_buf_size
+        self.search_window = search_window
 
-        self.output = ""
+        self.chunks = []
+        self.window = ""
+        # multibyte characters may be split between two chunks
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
 
-        # get the best selector for the system
-        self.selector = selectors.DefaultSelector()
+        self.selector = None
 
         self.timeout = timeout
 
         self.send_data = send_data
         self.logger = get_logger(self.__class__.__name__)
 
+    @property
+    def output(self):
+        if self.search_window is None:
+            return self.window
+        return ''.join(self.chunks)
+
     # TODO: DOC
     def read(self):
         """
@@ -160,6 +179,8 @@ class SocketExpect(object):
         Timeout
             If `timeout` is not None.
         """
+        # get the best selector for the system
+        self.selector = selectors.DefaultSelector()
         try:
             self.selector.register(self.sock, selectors.EVENT_READ)
             t_start = time.time()
@@ -186,21 +207,39 @@ class SocketExpect(object):
 
         finally:
             self.selector.unregister(self.sock)
+            self.selector.close()
 
     def process_socket(self):
 
         try:
             data = self.sock.recv(self.read_buf_size)
-            self.output += data.decode('utf-8')
-            res = self.check_fun(data, self.output)
-            if res:
-                return res
+            return self.process_data(data)
         except socket.error as e:
             # # error: [Errno 104] Connection reset by peer
             # if e.errno == 104:
             #     log.critical("Socket '%s' caused troubles! %s, %s.Read yet:%s", self.sock, self.sock.getpeername(), self.sock.getsockname(), self.output)
             raise
 
+    def process_data(self, data):
+        """
+        Parameters
+        ----------
+        data : bytes
+            The data received from the socket.
+
+        Returns
+        -------
+        object
+            The result of `check_fun`.
+        """
+        text = self.decoder.decode(data)
+        if self.search_window is None:
+            self.window += text
+        else:
+            self.chunks.append(text)
+            self.window = self.window[-self.search_window:] + text
+        return self.check_fun(data, self.window)
+
 
 def wait_for_socket_result(*args, **kwargs):
     buffered_socket_reader = SocketExpect(*args, **kwargs)
@@ -16,3 +16,26 @@ def get_temp_file_path(file_name):
 def get_log_file_path(log_file_name):
     """ Get the path to the `log_file_name` """
     return os.path.join(PATH_LOGS, log_file_name)
+
+
+def get_hot_file_path(file_name, node_id=None, reserve=0, get_disk_path=get_temp_file_path):
+    """
+    Get the path to a per-run hot file named `file_name` (overlay image, socket, boot log, ...).
+    Placed on the tmpfs of the :py:class:`.StorageManager` if enabled and not full,
+    otherwise it stays at its location on disk.
+
+    Parameters
+    ----------
+    file_name : str
+    node_id : int, optional (default is None)
+        The node whose storage usage is accounted.
+    reserve : int, optional (default is 0)
+        The bytes to reserve on the tmpfs.
+    get_disk_path : fun: str -> str, optional (default is :py:func:`.get_temp_file_path`)
+        The location on disk, e.g. :py:func:`.get_log_file_path` for log files.
+    """
+    from miniworld.model.singletons.Singletons import singletons
+    path_disk = get_disk_path(file_name)
+    if singletons.storage_manager is None:
+        return path_disk
+    return singletons.storage_manager.place(file_name, node_id=node_id, reserve=reserve, path_disk=path_disk)
@@ -0,0 +1,261 @@
+import selectors
+import socket
+import threading
+import time
+from concurrent import futures
+
+from miniworld.errors import Base
+from miniworld.log import get_logger
+from miniworld.model.singletons.Resetable import Resetable
+from miniworld.util import NetUtil
+from miniworld.util.NetUtil import SocketExpect, Timeout
+
+__author__ = 'Nils Schmidt'
+
+"""
+A single thread which reads from the serial/monitor sockets of all nodes.
+
+Instead of blocking one thread per node in its own :py:class:`.SocketExpect` loop,
+the expectations are registered at the :py:class:`.SocketMultiplexer` which returns a future for each of them.
+"""
+
+# interval in which `send_data` is sent to the socket (see :py:meth:`.SocketExpect.read`)
+SEND_DATA_INTERVAL = 1.0
+
+
+class SocketMultiplexerError(Base):
+    pass
+
+
+class Expectation(object):
+    """
+    Attributes
+    ----------
+    socket_expect : SocketExpect
+    future : concurrent.futures.Future
+    deadline : float
+        None if there is no timeout.
+    next_send : float
+        When to send `send_data` the next time. None if there is nothing to send.
+    """
+
+    __slots__ = ('socket_expect', 'future', 'deadline', 'next_send')
+
+    def __init__(self, socket_expect, future, now):
+        self.socket_expect = socket_expect
+        self.future = future
+        self.deadline = now + socket_expect.timeout if socket_expect.timeout is not None else None
+        self.next_send = now + SEND_DATA_INTERVAL if socket_expect.send_data is not None else None
+
+    @property
+    def sock(self):
+        return self.socket_expect.sock
+
+
+class SocketMultiplexer(Resetable):
+    """
+    Reads from all registered sockets with a single selector in a single (daemon) thread.
+    The thread is started with the first expectation.
+
+    Attributes
+    ----------
+    selector : selectors.BaseSelector
+    pending : list<Expectation>
+        The expectations which are not yet registered at the selector.
+    wakeup_r, wakeup_w : socket
+        Interrupt the select call on new expectations or shutdown.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.logger = get_logger(self.__class__.__name__)
+        self.thread = None
+        self.selector = None
+        self.pending = []
+        self.stopped = False
+        self.wakeup_r = self.wakeup_w = None
+
+    #########################################
+    # API
+    #########################################
+
+    def expect(self, sock, check_fun, read_buf_size=NetUtil.DEFAULT_READ_BUF_SIZE, timeout=None, send_data=None,
+               search_window=None):
+        """
+        Read from the socket `sock` until `check_fun` returns True.
+        See :py:class:`.SocketExpect` for the parameters.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            The result is the read stream content.
+            Raises :py:class:`.Timeout` if `timeout` is not None.
+        """
+        if timeout is not None and timeout < 0:
+            raise ValueError("timeout must be > 0!")
+
+        socket_expect = SocketExpect(sock, check_fun, read_buf_size=read_buf_size, timeout=timeout,
+                                     send_data=send_data, search_window=search_window)
+        future = futures.Future()
+        with self.lock:
+            self.start()
+            self.pending.append(Expectation(socket_expect, future, time.time()))
+        self.wakeup()
+        return future
+
+    def start(self):
+        """ Start the thread if not running yet. Needs the `lock`. """
+        if self.thread is None:
+            self.stopped = False
+            self.selector = selectors.DefaultSelector()
+            self.wakeup_r, self.wakeup_w = socket.socketpair()
+            self.wakeup_r.setblocking(False)
+            self.selector.register(self.wakeup_r, selectors.EVENT_READ)
+            self.thread = threading.Thread(target=self.run, name=self.__class__.__name__, daemon=True)
+            self.thread.start()
+
+    def wakeup(self):
+        try:
+            self.wakeup_w.send(b'\0')
+        except (socket.error, AttributeError):
+            pass
+
+    def reset(self):
+        """ Stop the thread. Pending expectations fail with a :py:class:`.SocketMultiplexerError`. """
+        with self.lock:
+            thread = self.thread
+            self.stopped = True
+        if thread is None:
+            return
+
+        self.wakeup()
+        thread.join()
+
+        with self.lock:
+            for expectation in self.pending:
+                expectation.future.set_exception(SocketMultiplexerError("The multiplexer has been stopped!"))
+            self.pending = []
+            self.selector.close()
+            self.wakeup_r.close()
+            self.wakeup_w.close()
+            self.thread = self.selector = self.wakeup_r = self.wakeup_w = None
+
+    #########################################
+    # Event loop
+    #########################################
+
+    def get_expectations(self):
+        """
+        Returns
+        -------
+        list<Expectation>
+            The expectations registered at the selector.
+        """
+        return [key.data for key in self.selector.get_map().values() if key.data is not None]
+
+    def run(self):
+        while True:
+            with self.lock:
+                if self.stopped:
+                    break
+                pending, self.pending = self.pending, []
+
+            for expectation in pending:
+                self.register(expectation)
+
+            for key, mask in self.selector.select(self.get_select_timeout(time.time())):
+                if key.data is None:
+                    self.drain_wakeup()
+                else:
+                    self.process(key.data)
+
+            self.check_timers(time.time())
+
+        for expectation in self.get_expectations():
+            self.finish(expectation, exception=SocketMultiplexerError("The multiplexer has been stopped!"))
+
+    def register(self, expectation):
+        if not expectation.future.set_running_or_notify_cancel():
+            return
+        try:
+            self.selector.register(expectation.sock, selectors.EVENT_READ, expectation)
+        except (KeyError, ValueError) as e:
+            expectation.future.set_exception(
+                SocketMultiplexerError("Can not register socket '%s'" % expectation.sock, caused_by=e))
+
+    def drain_wakeup(self):
+        try:
+            while self.wakeup_r.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def get_select_timeout(self, now):
+        """
+        Returns
+        -------
+        float
+            Time until the next deadline or send. None if there is none.
+        """
+        timers = [timer for expectation in self.get_expectations()
+                  for timer in (expectation.deadline, expectation.next_send) if timer is not None]
+        if not timers:
+            return None
+        return max(0, min(timers) - now)
+
+    def process(self, expectation):
+        socket_expect = expectation.socket_expect
+        try:
+            data = expectation.sock.recv(socket_expect.read_buf_size)
+            if not data:
+                raise ConnectionResetError("Socket '%s' has been closed by the peer!" % expectation.sock)
+            res = socket_expect.process_data(data)
+        except Exception as e:
+            self.finish(expectation, exception=e)
+            return
+
+        if res:
+            self.finish(expectation, result=socket_expect.output)
+
+    def check_timers(self, now):
+        for expectation in self.get_expectations():
+            if expectation.deadline is not None and now > expectation.deadline:
+                self.finish(expectation,
+                            exception=Timeout("Timeout (%s) occurred!" % expectation.socket_expect.timeout))
+
+            elif expectation.next_send is not None and now >= expectation.next_send:
+                expectation.next_send = now + SEND_DATA_INTERVAL
+                send_data = expectation.socket_expect.send_data
+                try:
+                    expectation.sock.send(send_data)
+                    self.logger.debug('sending {}'.format(send_data))
+                except socket.error as e:
+                    self.finish(expectation, exception=e)
+
+    def finish(self, expectation, result=None, exception=None):
+        self.selector.unregister(expectation.sock)
+        if exception is not None:
+            expectation.future.set_exception(exception)
+        else:
+            expectation.future.set_result(result)
+
+
+###########################################################
+# Drop-in replacements for the `NetUtil` functions
+###########################################################
+
+def wait_for_socket_result(*args, **kwargs):
+    from miniworld.model.singletons.Singletons import singletons
+    return singletons.socket_multiplexer.expect(*args, **kwargs).result()
+
+
+def wait_for_boot(*args, **kwargs):
+    """
+    Raises
+    ------
+    Timeout
+    """
+    from miniworld.model.singletons.Singletons import singletons
+    # enter shell after each send interval
+    kwargs['send_data'] = b'\n'
+    return singletons.socket_multiplexer.expect(*args, **kwargs).result()
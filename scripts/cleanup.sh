@@ -8,6 +8,7 @@ killall -9 vde_switch
 killall -9 wirefilter
 killall -9 vde_plug
 
+umount /tmp/MiniWorld/tmpfs
 umount /tmp/MiniWorld
 rm -r /tmp/MiniWorld
 
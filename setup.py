@@ -26,8 +26,9 @@ setup(
     extras_require={
         'server': ['ordered-set', 'argparse', 'ipaddress', 'colorlog', 'geojson', 'futures',
                    'netifaces', 'networkx', 'blessings', 'py-dictdiffer', 'pyroute2', 'psutil', 'LatLon23',
-                   'requests', 'msgpack-python', 'zmq', 'injector'],
+                   'requests', 'msgpack-python', 'zmq', 'injector', 'numpy'],
         'develop': ['pytest', 'sphinx', 'pep8', 'flake8'],
+        'compression': ['zstandard', 'lz4'],
     },
     scripts=['mwcli'],
     entry_points={
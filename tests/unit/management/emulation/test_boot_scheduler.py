@@ -0,0 +1,43 @@
+import pytest
+
+from miniworld.management.ServerScore import ServerScore
+from miniworld.management.emulation.BootScheduler import BootScheduler
+
+
+@pytest.fixture
+def host_load(monkeypatch):
+    load = {ServerScore.SCORE_CPU_LOAD: 10.0, ServerScore.SCORE_IO_WAIT: 0.0, ServerScore.SCORE_FREE_MEM: 4096}
+    monkeypatch.setattr(ServerScore, "get_host_load", staticmethod(lambda: dict(load)))
+    return load
+
+
+def test_boot_scheduler_adapts_limit(host_load):
+    boot_scheduler = BootScheduler(max_limit=4)
+    assert boot_scheduler.limit == 1
+
+    # fast boots raise the parallelism up to the maximum
+    for _ in range(5):
+        boot_scheduler.acquire()
+        boot_scheduler.release(10.0, True)
+    assert boot_scheduler.limit == 4
+
+    # slow and failed boots halve it
+    boot_scheduler.acquire()
+    boot_scheduler.release(30.0, True)
+    assert boot_scheduler.limit == 2
+    boot_scheduler.acquire()
+    boot_scheduler.release(1.0, False)
+    assert boot_scheduler.limit == 1
+
+
+def test_boot_scheduler_host_overloaded(host_load):
+    boot_scheduler = BootScheduler(max_limit=4, min_free_mem=1024, limit=4)
+    boot_scheduler.host_load[ServerScore.SCORE_FREE_MEM] = 512
+
+    # a single boot is always admitted
+    assert boot_scheduler.is_admissible()
+    boot_scheduler.acquire()
+    assert not boot_scheduler.is_admissible()
+
+    boot_scheduler.host_load[ServerScore.SCORE_FREE_MEM] = 2048
+    assert boot_scheduler.is_admissible()
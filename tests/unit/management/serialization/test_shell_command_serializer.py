@@ -0,0 +1,41 @@
+import re
+
+from miniworld.Scenario import scenario_config
+from miniworld.management.serialization.ShellCommandSerializer import ShellCommandSerializer
+from miniworld.model.singletons.Singletons import singletons
+
+
+class FakeShellHelper(object):
+
+    def __init__(self, executed):
+        self.executed = executed
+
+    def run_shell(self, _id, cmd, prefixes):
+        self.executed.append(cmd)
+
+
+def test_run_commands_batched_keeps_event_order(monkeypatch):
+    executed = []
+    monkeypatch.setattr(singletons, "shell_helper", FakeShellHelper(executed))
+    monkeypatch.setattr(scenario_config, "is_network_backend_bridged_execution_mode_one_shell_call", lambda: False)
+    monkeypatch.setattr(scenario_config, "is_network_backend_parallel", lambda: False)
+
+    scs = ShellCommandSerializer()
+    scs.set_event_order("connection", ["tap_up", "qdisc", "bridge_add_if", "filter"])
+    scs.add_group("connection")
+    scs.add_command("connection", "filter", "1", "tc filter replace dev tap_1", [])
+    scs.add_command("connection", "bridge_add_if", "1", "ip link set dev tap_1 master br_1", [])
+    scs.add_command("connection", "qdisc", "1", "tc qdisc replace dev tap_1 root", [])
+    scs.add_command("connection", "qdisc", "2", "tc qdisc replace dev tap_2 root", [])
+    scs.add_command("connection", "tap_up", "1", "ip link set dev tap_1 up", [])
+
+    def run_batch(shell_command_args):
+        executed.append([cmd for _, cmd, _ in shell_command_args])
+
+    scs.run_commands_batched(re.compile("^tc ").match, run_batch)
+    assert executed == [
+        "ip link set dev tap_1 up",
+        ["tc qdisc replace dev tap_1 root", "tc qdisc replace dev tap_2 root"],
+        "ip link set dev tap_1 master br_1",
+        ["tc filter replace dev tap_1"],
+    ]
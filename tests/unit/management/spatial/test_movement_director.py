@@ -0,0 +1,52 @@
+import pytest
+
+from miniworld.Scenario import scenario_config
+from miniworld.management.spatial.MovementDirector import MovementDirector
+from miniworld.model.spatial.Location import Location
+from miniworld.model.spatial.Nodes import Nodes
+
+
+class FakeNode(object):
+
+    def __init__(self, location):
+        self.location = location
+
+    def get_location(self):
+        return self.location
+
+
+@pytest.fixture
+def movement_director(monkeypatch):
+    monkeypatch.setattr(scenario_config, "get_number_of_nodes", lambda: 3)
+    nodes = Nodes.__new__(Nodes)
+    nodes.dict_of_nodes = {
+        0: FakeNode(Location(50.8, 8.77)),
+        1: FakeNode(Location(50.801, 8.77)),
+        2: FakeNode(Location(50.9, 8.77)),
+    }
+    movement_director = MovementDirector.__new__(MovementDirector)
+    movement_director.nodes = nodes
+    movement_director.max_connected_distance = 500
+    movement_director.pairs_in_range = set()
+    return movement_director
+
+
+def test_pairs_in_range(movement_director):
+    nodes = movement_director.nodes.dict_of_nodes
+
+    distance_matrix = movement_director.get_distances_from_nodes()
+    assert set(distance_matrix.keys()) == {(1, 2)}
+    assert movement_director.pairs_in_range == {(1, 2)}
+
+    # node 2 leaves the range, node 3 enters the range of node 1
+    nodes[1].location = Location(50.81, 8.77)
+    nodes[2].location = Location(50.8005, 8.77)
+    distance_matrix = movement_director.get_distances_from_nodes()
+    # the pair which left the range is emitted once more, so that it can be disconnected
+    assert set(distance_matrix.keys()) == {(1, 2), (1, 3)}
+    assert distance_matrix[(1, 2)] >= 500
+    assert movement_director.pairs_in_range == {(1, 3)}
+
+    distance_matrix = movement_director.get_distances_from_nodes()
+    assert set(distance_matrix.keys()) == {(1, 3)}
+    assert movement_director.pairs_in_range == {(1, 3)}
@@ -0,0 +1,37 @@
+import numpy as np
+
+from miniworld.management.DistanceMatrixPartitioner import DistanceMatrixPartitioner, filter_nodes, \
+    get_local_distance_matrix_from_positions
+from miniworld.model.collections.DistanceMatrix import DistanceMatrixDict
+from miniworld.model.spatial.Location import Location, get_distance_matrix_in_m
+
+
+def test_partition():
+    partitioner = DistanceMatrixPartitioner({1: [1, 2], 2: [3], 3: [4]})
+    distance_matrix = DistanceMatrixDict({(1, 2): 1.0, (1, 3): 2.0, (2, 4): 3.0, (5, 6): 4.0})
+
+    assert partitioner.get_server_for_node(3) == 2
+    assert partitioner.get_server_for_node(5) is None
+
+    res = {server_id: dict(local_distance_matrix.items())
+           for server_id, local_distance_matrix in partitioner.partition(distance_matrix).items()}
+    assert res == {1: {(1, 2): 1.0, (1, 3): 2.0, (2, 4): 3.0}, 2: {(1, 3): 2.0}, 3: {(2, 4): 3.0}}
+    assert dict(filter_nodes(distance_matrix, [3, 4]).items()) == {(1, 3): 2.0, (2, 4): 3.0}
+
+
+def test_get_local_distance_matrix_from_positions():
+    locations = [Location(50.8 + i * 0.001, 8.77 + i * 0.002) for i in range(6)]
+    node_ids = list(range(1, 7))
+    local_node_ids = [2, 5]
+    include_pairs = {(2, 6)}
+
+    # what the coordinator computes
+    distances = get_distance_matrix_in_m(locations)
+    distances[distances >= 500] = np.nan
+    distances[1, 5] = get_distance_matrix_in_m(locations)[1, 5]
+    expected = filter_nodes(DistanceMatrixDict.from_upper_triangular(node_ids, distances), local_node_ids)
+
+    lat_lons = np.array([location.get_decimal_degrees() for location in locations])
+    local_distance_matrix = get_local_distance_matrix_from_positions(node_ids, lat_lons, local_node_ids,
+                                                                     max_distance=500, include_pairs=include_pairs)
+    assert dict(local_distance_matrix.items()) == dict(expected.items())
@@ -0,0 +1,63 @@
+import subprocess
+from concurrent import futures
+
+import pytest
+
+from miniworld.management.ShellHelper import ShellWorkerPool
+
+
+@pytest.fixture
+def worker_pool():
+    worker_pool = ShellWorkerPool()
+    yield worker_pool
+    worker_pool.close()
+
+
+def test_run(worker_pool):
+    assert worker_pool.run("echo 'foo  bar'") == b"foo  bar\n"
+    assert worker_pool.run("printf %s foo") == b"foo"
+    assert worker_pool.run("sh -c 'echo foo >&2'") == b""
+    # no shell interpretation, like :py:func:`.run_shell`
+    assert worker_pool.run("echo $HOME '*' ; ls") == b"$HOME * ; ls\n"
+    assert len(worker_pool.workers) == 1
+
+
+def test_exit_code(worker_pool):
+    with pytest.raises(subprocess.CalledProcessError) as e:
+        worker_pool.run("sh -c 'echo out; echo err >&2; exit 3'")
+    assert e.value.returncode == 3
+    assert e.value.output == b"out\n"
+    assert e.value.stderr == b"err\n"
+
+    # the worker is still usable
+    assert worker_pool.run("echo foo") == b"foo\n"
+
+
+def test_large_output(worker_pool):
+    output = worker_pool.run("sh -c 'seq 1 100000; seq 1 100000 >&2'")
+    assert output.splitlines()[-1] == b"100000"
+
+
+def test_parallel(worker_pool):
+    with futures.ThreadPoolExecutor(max_workers=4) as executor:
+        outputs = list(executor.map(lambda i: worker_pool.run("echo %d" % i), range(100)))
+    assert outputs == [b"%d\n" % i for i in range(100)]
+    assert len(worker_pool.workers) <= 4
+
+
+def test_stderr_is_forwarded(worker_pool, capsys):
+    assert worker_pool.run("sh -c 'echo out; echo err >&2'") == b"out\n"
+    assert capsys.readouterr().err == "err\n"
+
+
+def test_missing_executable(worker_pool):
+    with pytest.raises(FileNotFoundError):
+        worker_pool.run("miniworld_does_not_exist --foo")
+
+    # a command may still exit with 127 itself
+    with pytest.raises(subprocess.CalledProcessError) as e:
+        worker_pool.run("sh -c 'exit 127'")
+    assert e.value.returncode == 127
+
+    assert worker_pool.run("echo foo") == b"foo\n"
+    assert len(worker_pool.workers) == 1
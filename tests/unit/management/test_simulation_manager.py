@@ -0,0 +1,92 @@
+import pytest
+
+from miniworld.Scenario import scenario_config
+from miniworld.management import SimulationManager
+from miniworld.management.DistanceMatrixPartitioner import filter_nodes
+from miniworld.model.collections.DistanceMatrix import DistanceMatrixDict
+from miniworld.model.spatial.Location import Location
+from miniworld.model.spatial.Nodes import Nodes
+from miniworld.rpc.zeromq.NodePositions import NodePositions
+from miniworld.util import PathUtil
+
+
+class FakeNode(object):
+
+    def __init__(self, location):
+        self.location = location
+
+    def get_location(self):
+        return self.location
+
+
+@pytest.fixture
+def nodes(monkeypatch):
+    monkeypatch.setattr(scenario_config, "get_number_of_nodes", lambda: 6)
+    nodes = Nodes.__new__(Nodes)
+    nodes.dict_of_nodes = {i: FakeNode(Location(50.8 + i * 0.001, 8.77 + i * 0.002)) for i in range(6)}
+    return nodes
+
+
+def test_local_distance_matrix_from_positions(nodes, tmpdir, monkeypatch):
+    monkeypatch.setattr(PathUtil, "get_log_file_path", lambda name: str(tmpdir.join(name)))
+    simulation_manager = SimulationManager.SimulationManagerDistributedClient()
+    simulation_manager.nodes_id_mapping = {2: None, 5: None}
+
+    pairs_in_range = set()
+    for step in range(3):
+        # the coordinator
+        distance_matrix = nodes.get_distance_matrix(max_distance=500, include_pairs=pairs_in_range)
+        pairs_in_range = {key for key, distance in distance_matrix.items() if distance < 500}
+        expected = filter_nodes(distance_matrix, [2, 5])
+
+        # the emulation server
+        node_positions = NodePositions.from_msg(NodePositions(nodes.get_lat_lons(), 500).to_msg())
+        local_distance_matrix = simulation_manager.get_local_distance_matrix_from_positions(node_positions)
+        assert dict(local_distance_matrix.items()) == dict(expected.items())
+
+        # move node 5 away
+        nodes.dict_of_nodes[4].location = Location(50.8 + step * 0.01, 8.77)
+
+
+def test_partitioner_is_cached(tmpdir, monkeypatch):
+    monkeypatch.setattr(PathUtil, "get_log_file_path", lambda name: str(tmpdir.join(name)))
+    server_node_mapping = {1: [1, 2], 2: [3]}
+    # like the scenario config, return a new dict on each call
+    monkeypatch.setattr(scenario_config, "get_distributed_server_node_mapping",
+                        lambda: {server_id: list(nodes) for server_id, nodes in server_node_mapping.items()})
+    simulation_manager = SimulationManager.SimulationManagerDistributedClient()
+
+    partitioner = simulation_manager.partitioner
+    assert simulation_manager.partitioner is partitioner
+    assert simulation_manager.get_server_for_node(3) == 2
+
+    server_node_mapping[2] = [3, 4]
+    assert simulation_manager.partitioner is not partitioner
+    assert simulation_manager.get_server_for_node(4) == 2
+
+
+class FakeLinkQualityModel(object):
+    """ Connected up to 30 meters, lossy beyond 10 meters. """
+
+    def distances_2_link_qualities(self, distances):
+        return ([distance < 30 for distance in distances],
+                [{"loss": 0 if distance < 10 else 0.5} for distance in distances])
+
+
+def test_link_quality_diff(tmpdir, monkeypatch):
+    monkeypatch.setattr(PathUtil, "get_log_file_path", lambda name: str(tmpdir.join(name)))
+    simulation_manager = SimulationManager.SimulationManagerDistributedClient()
+    simulation_manager.link_quality_model = FakeLinkQualityModel()
+
+    def get_link_quality_diff(distance_matrix):
+        return simulation_manager.get_link_quality_diff(DistanceMatrixDict(distance_matrix))
+
+    assert get_link_quality_diff({(1, 2): 10.2, (1, 3): 50}) == [((1, 2), 10.2, (True, {"loss": 0.5})),
+                                                                  ((1, 3), 50, (False, {"loss": 0.5}))]
+    # the distances changed, but not the link qualities
+    assert get_link_quality_diff({(1, 2): 10.3, (1, 3): 60}) == []
+
+    assert get_link_quality_diff({(1, 2): 5}) == [((1, 2), 5, (True, {"loss": 0}))]
+    # connected -> disconnected
+    assert get_link_quality_diff({(1, 2): 40}) == [((1, 2), 40, (False, {"loss": 0.5}))]
+    assert get_link_quality_diff({(1, 2): 45}) == []
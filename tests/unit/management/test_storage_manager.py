@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+from miniworld.management.StorageManager import StorageManager
+from miniworld.model.singletons.Singletons import singletons
+from miniworld.util import PathUtil
+
+
+def test_storage_manager_spill_over(tmpdir, monkeypatch):
+    storage_manager = StorageManager(capacity="3M", path_tmpfs=str(tmpdir))
+    # the accounting decides, not the free space of the test file system
+    monkeypatch.setattr(storage_manager, "get_free_tmpfs_space", lambda: 1024 ** 3)
+
+    path_overlay_1 = storage_manager.place("openwrt_overlay_1.img", node_id=1, reserve=2 * 1024 ** 2)
+    path_overlay_2 = storage_manager.place("openwrt_overlay_2.img", node_id=2, reserve=2 * 1024 ** 2)
+    path_sock_2 = storage_manager.place("qemu_2.sock", node_id=2)
+
+    assert os.path.dirname(path_overlay_1) == str(tmpdir)
+    # the tmpfs is full
+    assert os.path.dirname(path_overlay_2) != str(tmpdir)
+    assert os.path.dirname(path_sock_2) == str(tmpdir)
+    assert storage_manager.reserved == 2 * 1024 ** 2
+
+    # the placement is stable
+    assert storage_manager.place("openwrt_overlay_1.img", node_id=1, reserve=2 * 1024 ** 2) == path_overlay_1
+
+    with open(path_overlay_1, "wb") as f:
+        f.write(b"\1" * 8192)
+    usage = storage_manager.get_usage()
+    assert usage[1][0] >= 8192
+    assert usage[2] == (0, 0)
+
+
+def test_storage_manager_disabled(tmpdir):
+    storage_manager = StorageManager(path_tmpfs=str(tmpdir))
+    assert not storage_manager.is_enabled()
+    assert os.path.dirname(storage_manager.place("qemu_1.sock", node_id=1)) != str(tmpdir)
+
+
+def test_storage_manager_keeps_disk_path(tmpdir, monkeypatch):
+    storage_manager = StorageManager(capacity="1M", path_tmpfs=str(tmpdir))
+    monkeypatch.setattr(storage_manager, "get_free_tmpfs_space", lambda: 1024 ** 3)
+    # the tmpfs is full, the log stays in the log dir
+    path_log = PathUtil.get_log_file_path("qemu_boot_1.txt")
+    assert storage_manager.place("qemu_boot_1.txt", node_id=1, reserve=2 * 1024 ** 2, path_disk=path_log) == path_log
+
+
+@pytest.mark.parametrize("storage_manager", [None, StorageManager()])
+def test_hot_file_path_tmpfs_disabled(monkeypatch, storage_manager):
+    monkeypatch.setattr(singletons, "storage_manager", storage_manager)
+    assert PathUtil.get_hot_file_path("qemu_boot_1.txt", node_id=1, reserve=1024,
+                                      get_disk_path=PathUtil.get_log_file_path) == PathUtil.get_log_file_path("qemu_boot_1.txt")
+    assert PathUtil.get_hot_file_path("qemu_1.sock", node_id=1) == PathUtil.get_temp_file_path("qemu_1.sock")
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from miniworld.model.collections.DistanceMatrix import DistanceMatrixDict, DistanceMatrixNumpy, \
+    transform_distance_matrix
+
+
+@pytest.fixture(params=(DistanceMatrixDict, DistanceMatrixNumpy))
+def distance_matrix_type(request):
+    return request.param
+
+
+def test_set_get_distance(distance_matrix_type):
+    distance_matrix = distance_matrix_type()
+    distance_matrix.set_distance(1, 2, 10.5)
+    distance_matrix.set_unlimited_distance(1, 3)
+
+    assert distance_matrix.get_distance(1, 2) == 10.5
+    assert distance_matrix[(1, 3)] == distance_matrix_type.UNLIMITED_DISTANCE
+    assert (2, 1) not in distance_matrix
+    assert len(distance_matrix) == 2
+    assert dict(distance_matrix.filter_empty().items()) == {(1, 2): 10.5}
+
+
+def test_diff(distance_matrix_type):
+    old = distance_matrix_type({(1, 2): 1.0, (1, 3): 2.0, (2, 3): 3.0})
+    new = distance_matrix_type({(1, 2): 1.0, (1, 3): 2.5, (2, 3): 3.0, (3, 4): 4.0})
+
+    diff = new.diff(old)
+    assert isinstance(diff, distance_matrix_type)
+    assert dict(diff.items()) == {(1, 3): 2.5, (3, 4): 4.0}
+    assert not new.diff(new.copy())
+    assert dict(new.diff({}).items()) == dict(new.items())
+
+
+def test_numpy_diff_different_node_order():
+    old = DistanceMatrixNumpy({(2, 3): 3.0, (1, 2): 1.0})
+    new = DistanceMatrixNumpy({(1, 2): 1.0, (2, 3): 5.0, (1, 3): 2.0})
+
+    assert dict(new.diff(old).items()) == {(2, 3): 5.0, (1, 3): 2.0}
+
+
+def test_numpy_update_and_transform():
+    distance_matrix = DistanceMatrixNumpy({(1, 2): 1.0})
+    distance_matrix.update({(1, 1000): 0})
+    distance_matrix.update(DistanceMatrixNumpy({(1, 2): 3.0}))
+
+    assert dict(distance_matrix.items()) == {(1, 2): 3.0, (1, 1000): 0.0}
+    assert dict(transform_distance_matrix(distance_matrix)) == {1: [(2, 3.0), (1000, 0.0)]}
+
+
+def test_from_upper_triangular(distance_matrix_type):
+    matrix = np.array([[np.nan, 1.0, 2.0],
+                       [1.0, np.nan, np.nan],
+                       [2.0, 3.0, np.nan]])
+    distance_matrix = distance_matrix_type.from_upper_triangular((1, 2, 5), matrix)
+    assert dict(distance_matrix.items()) == {(1, 2): 1.0, (1, 5): 2.0}
+
+
+def test_arrays(distance_matrix_type):
+    distance_matrix = distance_matrix_type({(1, 2): 1.0, (5, 3): -1, (2, 5): 2.5})
+    xs, ys, distances = distance_matrix.to_arrays()
+    assert sorted(zip(xs.tolist(), ys.tolist(), distances.tolist())) == [(1, 2, 1.0), (2, 5, 2.5), (5, 3, -1.0)]
+
+    assert dict(distance_matrix_type.from_arrays(xs, ys, distances).items()) == dict(distance_matrix.items())
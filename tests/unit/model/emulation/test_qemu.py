@@ -0,0 +1,46 @@
+import logging
+import socket
+import subprocess
+import sys
+
+import pytest
+
+from miniworld.model.emulation import Qemu as Qemu_module
+from miniworld.model.emulation.Qemu import Qemu
+from miniworld.model.emulation.QemuQMP import QemuQMP
+from miniworld.util import NetUtil
+
+
+def test_boot_log_keeps_split_multibyte_characters(tmpdir, monkeypatch):
+    monkeypatch.setattr(Qemu_module, "READ_BUF_SIZE", 1)
+    sock, sock_qemu = socket.socketpair()
+    qemu = Qemu.__new__(Qemu)
+    qemu.nlog = logging.getLogger("test")
+    qemu.wait_until_uds_reachable = lambda return_sock: sock
+    try:
+        # each chunk contains only a part of the 2-byte character
+        sock_qemu.sendall("Grüße\nlogin:".encode())
+        path_log_file = str(tmpdir.join("qemu_boot.txt"))
+        qemu.wait_until_qemu_booted(NetUtil.wait_for_socket_result, path_log_file, booted_signal="login:", timeout=5)
+        assert tmpdir.join("qemu_boot.txt").read_text("utf-8") == "Grüße\nlogin:"
+    finally:
+        sock_qemu.close()
+
+
+@pytest.mark.parametrize("owns_process", [True, False])
+def test_shutdown_quits_owned_process(owns_process):
+    process = subprocess.Popen([sys.executable, "-c", "import sys; sys.stdin.read()"], stdin=subprocess.PIPE)
+    qemu = Qemu.__new__(Qemu)
+    qemu.nlog = logging.getLogger("test")
+    qemu.process = process
+    qemu.owns_process = owns_process
+    qemu.monitor = QemuQMP.__new__(QemuQMP)
+    # quitting via QMP lets the process exit
+    qemu.monitor.shutdown = process.stdin.close
+    try:
+        qemu._shutdown()
+        # a process which outlives the scenario (snapshot boot) is not shut down
+        assert (process.poll() is not None) == owns_process
+    finally:
+        process.kill()
+        process.wait()
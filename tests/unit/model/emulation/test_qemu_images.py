@@ -0,0 +1,45 @@
+import os
+
+from miniworld.model.emulation import QemuImages
+from miniworld.model.emulation.QemuImages import QemuOverlayImages
+
+
+def test_get_image_digest(tmpdir, monkeypatch):
+    image = tmpdir.join("openwrt.img")
+    image.write("disk")
+    path_index = str(tmpdir.join("digests.json"))
+
+    digest = QemuImages.get_image_digest(str(image), path_index=path_index)
+    assert digest == QemuImages.sha1(str(image))
+    assert os.path.exists(path_index)
+
+    # the cached digest is used as long as path, size and mtime do not change
+    monkeypatch.setattr(QemuImages, "sha1", lambda file_path: "rehashed")
+    assert QemuImages.get_image_digest(str(image), path_index=path_index) == digest
+
+    image.write("other disk")
+    assert QemuImages.get_image_digest(str(image), path_index=path_index) == "rehashed"
+
+
+def test_overlay_images_prepared(monkeypatch):
+    created = []
+
+    def create(base_image_path, node_id, overlay_image_path, prefixes=None):
+        created.append((base_image_path, node_id))
+        return overlay_image_path
+
+    overlay_images = QemuOverlayImages()
+    monkeypatch.setattr(overlay_images, "_create", create)
+
+    overlay_images.create_all(["/images/openwrt.img", "/images/stick.img"], [1, 2])
+    assert sorted(created) == [("/images/openwrt.img", 1), ("/images/openwrt.img", 2),
+                               ("/images/stick.img", 1), ("/images/stick.img", 2)]
+
+    # the nodes take the prepared overlays ...
+    path = overlay_images.create("/images/openwrt.img", 1)
+    assert path == QemuImages.get_overlay_image_path("/images/openwrt.img", 1)
+    assert len(created) == 4
+
+    # ... only once
+    overlay_images.create("/images/openwrt.img", 1)
+    assert len(created) == 5
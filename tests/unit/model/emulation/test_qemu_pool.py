@@ -0,0 +1,99 @@
+from miniworld.model.emulation.QemuPool import QemuPool, get_pool_tap_name
+from miniworld.model.singletons.Singletons import singletons
+from miniworld.util import PathUtil
+
+
+class FakeProcess(object):
+
+    def __init__(self):
+        self.returncode = None
+
+    def poll(self):
+        return self.returncode
+
+    def kill(self):
+        self.returncode = -9
+
+    def wait(self):
+        return self.returncode
+
+
+def test_qemu_pool(monkeypatch):
+    renamed = []
+
+    def assign_taps(vm, tap_names):
+        renamed.append(list(tap_names))
+        vm.tap_names = list(tap_names)
+
+    pool = QemuPool()
+    monkeypatch.setattr(pool, "assign_taps", assign_taps)
+    monkeypatch.setattr(pool, "detach_taps", lambda vm: None)
+    key = ("digest", "qemu-system-x86_64", 2)
+
+    assert pool.acquire(key, 1) is None
+    vm = pool.create(key, 1, 2)
+    vm.process = FakeProcess()
+    vm.ready = True
+    pool.assign_taps(vm, ["tap_00001_0", "tap_00001_1"])
+
+    # the scenario is reset, the vm keeps running with the pool tap names
+    pool.release(vm)
+    assert vm.tap_names == [get_pool_tap_name(vm.slot, 0), get_pool_tap_name(vm.slot, 1)]
+    assert vm.process.poll() is None
+
+    # reassigned to another node of the next scenario
+    assert pool.acquire(("other digest", "qemu-system-x86_64", 2), 5) is None
+    assert pool.acquire(key, 5) is vm
+    assert vm.node_id == 5
+
+
+def test_qemu_pool_discards_unready_vms():
+    pool = QemuPool()
+    vm = pool.create("key", 1, 1)
+    vm.process = FakeProcess()
+
+    # e.g. the boot failed
+    pool.release(vm)
+    assert vm.process.poll() is not None
+    assert pool.acquire("key", 1) is None
+
+
+class FakeShellHelper(object):
+    """ Keeps the root qdisc and bridge of each tap device. Renaming a device keeps its state. """
+
+    def __init__(self, devices):
+        self.devices = devices
+
+    def run_shell(self, node_id, cmd, prefixes=None):
+        args = cmd.split()
+        if args[:3] == ["tc", "qdisc", "show"]:
+            return "qdisc %s root refcnt 2\n" % self.devices[args[4]]["qdisc"]
+        elif args[:3] == ["tc", "qdisc", "del"]:
+            self.devices[args[4]]["qdisc"] = "fq_codel 0:"
+        elif args[-1] == "nomaster":
+            self.devices[args[4]]["master"] = None
+        elif args[-2] == "name":
+            self.devices[args[-1]] = self.devices.pop(args[4])
+        return ""
+
+
+def test_qemu_pool_reuse_after_shaped_run(tmpdir, monkeypatch):
+    # the iproute2 commands module writes its groups to the temp dir on import
+    monkeypatch.setattr(PathUtil, "PATH_TMP", str(tmpdir))
+
+    pool = QemuPool()
+    key = ("digest", "qemu-system-x86_64", 1)
+    vm = pool.create(key, 1, 1)
+    vm.process = FakeProcess()
+    vm.ready = True
+    devices = {get_pool_tap_name(vm.slot, 0): dict(qdisc="fq_codel 0:", master=None)}
+    monkeypatch.setattr(singletons, "shell_helper", FakeShellHelper(devices))
+    pool.assign_taps(vm, ["tap_00001_0"])
+
+    # the scenario shapes the link and bridges the tap device
+    devices["tap_00001_0"].update(qdisc="htb 1:", master="br_00001")
+
+    pool.release(vm)
+    assert pool.acquire(key, 5) is vm
+    # the next scenario starts with an unshaped and unbridged tap device
+    assert devices == {get_pool_tap_name(vm.slot, 0): dict(qdisc="fq_codel 0:", master=None)}
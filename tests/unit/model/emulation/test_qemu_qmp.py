@@ -0,0 +1,143 @@
+import json
+import logging
+import socket
+import threading
+
+import pytest
+
+from miniworld.model.emulation import QemuQMP as QemuQMP_module
+from miniworld.model.emulation.QemuQMP import QMPSession, QemuQMP, QemuQMPError
+
+
+def fake_qmp_server(sock, migration_states=(), guest_powers_off=True):
+    def send(msg):
+        sock.sendall(json.dumps(msg).encode() + b"\n")
+
+    migration_states = list(migration_states)
+    send({"QMP": {"version": {}, "capabilities": []}})
+    for line in sock.makefile("rb"):
+        request = json.loads(line.decode())
+        if request["execute"] == "migrate":
+            send({"return": {}, "id": request["id"]})
+        elif request["execute"] == "query-migrate":
+            send({"return": {"status": migration_states.pop(0)}, "id": request["id"]})
+        elif request["execute"] == "query-status":
+            # events may arrive before the result
+            send({"event": "STOP", "timestamp": {}})
+            send({"return": {"status": "paused", "running": False}, "id": request["id"]})
+        elif request["execute"] == "cont":
+            send({"return": {}, "id": request["id"]})
+            send({"event": "RESUME", "timestamp": {}})
+        elif request["execute"] == "qmp_capabilities":
+            send({"return": {}, "id": request["id"]})
+        elif request["execute"] == "system_powerdown":
+            send({"return": {}, "id": request["id"]})
+            if guest_powers_off:
+                send({"event": "SHUTDOWN", "data": {"guest": True}, "timestamp": {}})
+                break
+        elif request["execute"] == "quit":
+            send({"return": {}, "id": request["id"]})
+            send({"event": "SHUTDOWN", "data": {"guest": False}, "timestamp": {}})
+            break
+        else:
+            send({"error": {"class": "CommandNotFound", "desc": "not found"}, "id": request["id"]})
+
+
+def test_qmp_session():
+    sock_client, sock_server = socket.socketpair()
+    thread = threading.Thread(target=fake_qmp_server, args=(sock_server,), daemon=True)
+    thread.start()
+    try:
+        session = QMPSession(sock_client, timeout=5)
+        assert "QMP" in session.negotiate()
+
+        assert session.execute("query-status") == {"status": "paused", "running": False}
+        assert [event["event"] for event in session.events] == ["STOP"]
+
+        with pytest.raises(QemuQMPError):
+            session.execute("foo")
+
+        # the STOP event is discarded
+        QemuQMP.ensure_running(session)
+        assert not session.events
+    finally:
+        sock_client.close()
+        sock_server.close()
+
+
+@pytest.mark.parametrize("migration_states, exception", [
+    (["active", "active", "completed"], None),
+    (["setup", "failed"], QemuQMPError),
+])
+def test_migrate(tmpdir, monkeypatch, migration_states, exception):
+    monkeypatch.setattr(QemuQMP_module, "MIGRATION_POLL_INTERVAL", 0)
+    sock_client, sock_server = socket.socketpair()
+    thread = threading.Thread(target=fake_qmp_server, args=(sock_server, migration_states), daemon=True)
+    thread.start()
+    try:
+        session = QMPSession(sock_client, timeout=5)
+        session.negotiate()
+        session.execute("migrate", {"uri": "exec:cat > %s" % tmpdir.join("state")})
+        if exception is None:
+            QemuQMP.wait_for_migration(session)
+        else:
+            with pytest.raises(exception):
+                QemuQMP.wait_for_migration(session)
+    finally:
+        sock_client.close()
+        sock_server.close()
+
+
+def test_check_hmp_output():
+    QemuQMP.check_hmp_output("savevm foo", "")
+    QemuQMP.check_hmp_output("savevm foo", "warning: foo\r\n")
+    with pytest.raises(QemuQMPError):
+        QemuQMP.check_hmp_output("loadvm foo", "Device 'ide0-hd0' does not have the requested snapshot 'foo'\r\n")
+
+
+@pytest.mark.parametrize("powerdown, guest_powers_off", [
+    (False, True),
+    (True, True),
+    # the guest ignores the ACPI request, qemu is quit
+    (True, False),
+])
+def test_shutdown(tmpdir, powerdown, guest_powers_off):
+    path_uds_socket = str(tmpdir.join("qmp.sock"))
+    server = socket.socket(socket.AF_UNIX)
+    server.bind(path_uds_socket)
+    server.listen(1)
+    requests = []
+
+    def serve():
+        sock, _ = server.accept()
+        with sock:
+            fake_qmp_server(RecordingSocket(sock, requests), guest_powers_off=guest_powers_off)
+
+    threading.Thread(target=serve, daemon=True).start()
+    qmp = QemuQMP.__new__(QemuQMP)
+    qmp.path_uds_socket = path_uds_socket
+    qmp.nlog = logging.getLogger("test")
+    try:
+        qmp.shutdown(powerdown=powerdown, timeout=0.5)
+    finally:
+        server.close()
+
+    expected = (["system_powerdown"] if powerdown else []) + ([] if powerdown and guest_powers_off else ["quit"])
+    assert requests[1:] == expected
+
+
+class RecordingSocket(object):
+    """ Records the commands received by the fake QMP server. """
+
+    def __init__(self, sock, requests):
+        self.sock = sock
+        self.requests = requests
+
+    def sendall(self, data):
+        self.sock.sendall(data)
+
+    def makefile(self, mode):
+        for line in self.sock.makefile(mode):
+            self.requests.append(json.loads(line.decode())["execute"])
+            yield line
+
@@ -0,0 +1,69 @@
+import pytest
+
+from miniworld.model.emulation.QemuTemplate import QemuTemplates
+from miniworld.util import PathUtil
+
+
+class FakeMonitor(object):
+
+    def __init__(self):
+        self.command_lines = []
+
+    def run_hmp_commands(self, command_lines):
+        self.command_lines.extend(command_lines)
+
+    def migrate(self, uri):
+        self.command_lines.append("migrate %s" % uri)
+
+
+class FakeQemu(object):
+
+    def __init__(self, path_overlay_image):
+        self.id = 1
+        self.path_overlay_image = path_overlay_image
+        self.monitor = FakeMonitor()
+
+
+@pytest.fixture
+def hot_files(tmpdir, monkeypatch):
+    monkeypatch.setattr(PathUtil, "get_hot_file_path", lambda file_name, **kwargs: str(tmpdir.join(file_name)))
+    return tmpdir
+
+
+def test_qemu_template(hot_files):
+    overlay = hot_files.join("overlay_1.img")
+    overlay.write("disk")
+    qemu = FakeQemu(str(overlay))
+
+    templates = QemuTemplates()
+    key = ("openwrt.img", 2)
+    assert templates.get(key) is None
+
+    template = templates.create(qemu, key)
+    assert templates.get(key) is template
+    assert templates.get(("openwrt.img", 3)) is None
+    with open(template.path_disk) as f:
+        assert f.read() == "disk"
+
+    commands = [command_line.split()[0] for command_line in qemu.monitor.command_lines]
+    # the disk must not change while it is copied, the node continues afterwards
+    assert commands == ["stop", "snapshot_blkdev", "migrate", "cont"]
+    assert template.path_state in qemu.monitor.command_lines[2]
+
+
+def test_qemu_templates_per_key(hot_files):
+    overlay = hot_files.join("overlay_1.img")
+    overlay.write("disk 2 interfaces")
+    templates = QemuTemplates()
+    template = templates.create(FakeQemu(str(overlay)), ("openwrt.img", 2))
+
+    # a new key must not overwrite the files the clones of the first template use
+    overlay.write("disk 3 interfaces")
+    other_template = templates.create(FakeQemu(str(overlay)), ("openwrt.img", 3))
+    assert {template.path_disk, template.path_state}.isdisjoint({other_template.path_disk, other_template.path_state})
+    with open(template.path_disk) as f:
+        assert f.read() == "disk 2 interfaces"
+    assert templates.get(("openwrt.img", 2)) is template
+
+    with pytest.raises(ValueError):
+        templates.create(FakeQemu(str(overlay)), ("openwrt.img", 2))
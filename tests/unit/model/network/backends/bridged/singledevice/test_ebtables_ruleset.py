@@ -0,0 +1,32 @@
+from miniworld.management import ShellHelper
+from miniworld.model.network.backends.bridged.singledevice.EbtablesRuleset import EbtablesRuleset
+
+
+def test_ebtables_ruleset_commit_only_on_change(monkeypatch):
+    inputs = []
+    monkeypatch.setattr(ShellHelper, "run_shell_with_input", lambda cmd, _input: inputs.append((cmd, _input)))
+
+    ruleset = EbtablesRuleset()
+    ruleset.add_chain("wifi1", EbtablesRuleset.POLICY_DROP)
+    ruleset.add_redirect("wifi1")
+    ruleset.set_rule("wifi1", "tap_00001_1", "tap_00002_1", 1)
+    ruleset.set_rule("wifi1", "tap_00002_1", "tap_00001_1", 1)
+    assert ruleset.commit()
+    assert len(inputs) == 1
+    assert inputs[0][0] == EbtablesRuleset.EBTABLES_RESTORE_CMD
+    assert "-A wifi1 -i tap_00002_1 -o tap_00001_1 -j mark --set-mark 1 --mark-target ACCEPT" in inputs[0][1]
+
+    # nothing changed
+    ruleset.add_chain("wifi1", EbtablesRuleset.POLICY_DROP)
+    ruleset.set_rule("wifi1", "tap_00001_1", "tap_00002_1", 1)
+    assert not ruleset.commit()
+    assert len(inputs) == 1
+
+    ruleset.set_rule("wifi1", "tap_00001_1", "tap_00002_1", 1, up=False)
+    assert ruleset.diff() == (set(), {("wifi1", "tap_00001_1", "tap_00002_1", 1)})
+    assert ruleset.commit()
+    assert "tap_00001_1 -o tap_00002_1" not in inputs[1][1]
+
+    ruleset.set_forward_policy(EbtablesRuleset.POLICY_DROP)
+    assert ruleset.commit()
+    assert ":FORWARD DROP" in inputs[2][1]
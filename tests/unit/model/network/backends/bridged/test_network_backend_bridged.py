@@ -0,0 +1,18 @@
+from miniworld.model.network.backends.bridged.TrafficControl import get_tc_batch_errors
+
+
+def test_get_tc_batch_errors():
+    tc_command_args = [("conn_1", "qdisc replace dev tap_00001_1 root handle 1:0 htb"),
+                       ("conn_2", "class replace dev tap_00002_1 parent 1:0 classid 1:2 htb rate 10kbit"),
+                       ("conn_3", "qdisc replace dev tap_00003_1 root handle 1:0 htb")]
+    stderr = """Cannot find device "tap_00002_1"
+Command failed -:2
+RTNETLINK answers: Invalid argument
+We have an error talking to the kernel
+Command failed -:3
+"""
+    assert get_tc_batch_errors(stderr, tc_command_args) == [
+        ("conn_2", tc_command_args[1][1], 'Cannot find device "tap_00002_1"'),
+        ("conn_3", tc_command_args[2][1], "RTNETLINK answers: Invalid argument\nWe have an error talking to the kernel"),
+    ]
+    assert get_tc_batch_errors("", tc_command_args) == []
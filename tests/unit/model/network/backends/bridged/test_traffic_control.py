@@ -0,0 +1,86 @@
+import pytest
+
+from miniworld.errors import NetworkBackendBridgedError
+from miniworld.management import ShellHelper
+from miniworld.model.network.backends.bridged import TrafficControl
+from miniworld.model.network.backends.bridged.TrafficControl import TrafficControlNetlink
+
+
+def test_netem_qdisc():
+    tc_operation = TrafficControl.netem_qdisc("tap_00001_1", 12, [("loss", "1.5%"), ("delay", "2.00ms 0.20ms 25%")])
+
+    assert tc_operation.shell_command == \
+        "tc qdisc replace dev tap_00001_1 parent 1:12 handle 120: netem loss 1.5% delay 2.00ms 0.20ms 25%"
+    assert tc_operation.handle == 0x1200000
+    assert tc_operation.kwargs == dict(parent=0x10012, loss=1.5, delay=2000, jitter=200, delay_corr=25.0)
+
+
+def test_netem_qdisc_unsupported_option():
+    tc_operation = TrafficControl.netem_qdisc("tap_00001_1", 1, [("delay", "2ms distribution normal")])
+    assert tc_operation.kwargs is None
+
+
+def test_htb_and_filter():
+    tc_operation = TrafficControl.htb_root_qdisc("tap_00001_1", "")
+    assert tc_operation.shell_command == "tc qdisc replace dev tap_00001_1 root handle 1:0 htb "
+    assert tc_operation.kwargs["default"] == 0
+
+    tc_operation = TrafficControl.htb_class("tap_00001_1", 12, 54000.0)
+    assert tc_operation.shell_command == "tc class replace dev tap_00001_1 parent 1:0 classid 1:12 htb rate 54000.0kbit"
+    assert tc_operation.kwargs == dict(parent=0x10000, rate=6750000)
+
+    tc_operation = TrafficControl.fw_filter("tap_00001_1", 12)
+    assert tc_operation.handle == 12
+    assert tc_operation.kwargs["classid"] == 0x10012
+
+
+def test_operations_keep_event_order():
+    traffic_control = TrafficControlNetlink(["qdisc", "class"])
+    traffic_control.add_operation("class", TrafficControl.htb_class("tap_00001_1", 1, 100))
+    traffic_control.add_operation("qdisc", TrafficControl.htb_root_qdisc("tap_00001_1", ""))
+    traffic_control.add_operation("class", TrafficControl.htb_class("tap_00001_1", 1, 200))
+
+    assert [tc_operation.command for tc_operation in traffic_control.get_operations()] == ["replace", "replace-class"]
+    assert traffic_control.get_operations()[1].kwargs["rate"] == 25000
+
+
+def test_netem_qdisc_without_jitter():
+    # e.g. LinkQualityModelWiFiLinear at distance 1
+    tc_operation = TrafficControl.netem_qdisc("tap_00001_1", 12, [("delay", "0.00ms 0.00ms 25%")])
+    assert tc_operation.kwargs == dict(parent=0x10012, delay=0)
+
+
+def test_apply_falls_back_on_encoder_errors(monkeypatch):
+    class FakeIPRoute(object):
+        def tc(self, *args, **kwargs):
+            raise Exception('delay correlation requires delay and jitter to be set')
+
+    applied_shell = []
+    traffic_control = TrafficControlNetlink(["qdisc"])
+    traffic_control.ipr = FakeIPRoute()
+    traffic_control.interface_indexes["tap_00001_1"] = 1
+    monkeypatch.setattr(traffic_control, "apply_shell", applied_shell.extend)
+
+    tc_operation = TrafficControl.netem_qdisc("tap_00001_1", 12, [("delay", "2.00ms 0.20ms 25%")])
+    traffic_control.add_operation("qdisc", tc_operation)
+    traffic_control.apply()
+    assert applied_shell == [tc_operation]
+
+
+def test_apply_shell_maps_errors(monkeypatch):
+    batches = []
+
+    def run_batch_shell_with_input(cmd, _input):
+        batches.append((cmd, _input))
+        return 1, "", "RTNETLINK answers: No such file or directory\nCommand failed -:2\n"
+
+    monkeypatch.setattr(ShellHelper, "run_batch_shell_with_input", run_batch_shell_with_input)
+    tc_operations = [TrafficControl.htb_root_qdisc("tap_00001_1", ""), TrafficControl.fw_filter("tap_00002_1", 12)]
+
+    with pytest.raises(NetworkBackendBridgedError) as e:
+        TrafficControlNetlink.apply_shell(tc_operations)
+    # all commands are executed, the failed one is reported
+    assert batches[0][0] == "tc -force -batch -"
+    assert batches[0][1].splitlines() == [tc_operation.shell_command[len("tc "):] for tc_operation in tc_operations]
+    assert "1 of 2" in str(e.value)
+    assert "tap_00002_1" in str(e.value)
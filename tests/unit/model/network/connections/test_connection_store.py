@@ -0,0 +1,103 @@
+import functools
+
+import pytest
+
+from miniworld.model.network.connections.ConnectionStore import ConnectionStore, UnknownConnection
+from miniworld.model.network.interface.Interface import HubWiFi, Mesh
+
+
+@functools.total_ordering
+class Node:
+
+    def __init__(self, id):
+        self.id = id
+
+    def __eq__(self, other):
+        return self.id == other.id
+
+    def __lt__(self, other):
+        return self.id < other.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return str(self.id)
+
+
+@pytest.fixture
+def nodes():
+    return Node(1), Node(2), Node(3)
+
+
+@pytest.fixture
+def connection_store(nodes):
+    node_1, node_2, node_3 = nodes
+    connection_store = ConnectionStore()
+    connection_store.add_connection(node_2, node_1, Mesh(), Mesh(), 'conn_12', link_quality_dict={'loss': 0.1})
+    connection_store.add_connection(node_2, node_3, Mesh(), Mesh(), 'conn_23', active=False,
+                                    link_quality_dict={'loss': 0.2})
+    return connection_store
+
+
+def test_lookup(connection_store, nodes):
+    node_1, node_2, node_3 = nodes
+
+    connection_details = connection_store.get_connection_details(node_1, node_2, Mesh(), Mesh())
+    assert connection_details.connection == 'conn_12'
+    assert connection_details.active
+    assert connection_store.get_connection_details(node_1, node_3, Mesh(), Mesh()) is None
+
+    assert connection_store.get_connections_for_nodes_implicit(node_3, node_2, Mesh(), Mesh())[0] == \
+        ConnectionStore.KEY_CONN_NOT_ACTIVE
+    assert [c.connection for c in connection_store.get_connections_for_node(node_2)] == ['conn_12']
+    assert [c.connection for c in connection_store.get_connections_for_interface(node_2, Mesh(), active=False)] == \
+        ['conn_23']
+    assert connection_store.get_connections_per_node() == {node_1: {node_2}}
+
+
+def test_change_connection_state(connection_store, nodes):
+    node_1, node_2, node_3 = nodes
+
+    assert connection_store.change_connection_state(node_3, node_2, Mesh(), Mesh(), now_active=True)
+    assert not connection_store.change_connection_state(node_3, node_2, Mesh(), Mesh(), now_active=True)
+    assert connection_store.change_connection_state(node_1, node_2, Mesh(), Mesh(), now_active=False)
+
+    assert [(tuple(emu_nodes), tuple(ifaces)) for emu_nodes, ifaces in connection_store.iter_connections()] == \
+        [((node_2, node_3), (Mesh(), Mesh()))]
+    assert (node_2, node_3) in connection_store.get_active_node_connection_store()
+    assert (node_1, node_2) not in connection_store.get_active_node_connection_store()
+    assert connection_store.get_connections_per_node(active=False) == {node_1: {node_2}}
+    assert connection_store.get_connections_for_node(node_1) == []
+
+    with pytest.raises(UnknownConnection):
+        connection_store.change_connection_state(node_1, node_3, Mesh(), Mesh())
+
+
+def test_link_quality_matrix_cache(connection_store, nodes):
+    node_1, node_2, _ = nodes
+
+    loss_matrix = connection_store.get_link_quality_matrix(include_interfaces=False, key='loss')
+    assert {tuple(emu_nodes): loss for emu_nodes, loss in loss_matrix.items()} == {(node_1, node_2): 0.1}
+    assert connection_store.get_link_quality_matrix(include_interfaces=False, key='loss') is loss_matrix
+
+    connection_store.update_link_quality(node_2, node_1, Mesh(), Mesh(), 'conn_12', True, {'loss': 0.5})
+    loss_matrix = connection_store.get_link_quality_matrix(include_interfaces=False, key='loss')
+    assert {tuple(emu_nodes): loss for emu_nodes, loss in loss_matrix.items()} == {(node_1, node_2): 0.5}
+
+
+def test_unsorted_nodes_keep_their_interfaces(nodes):
+    node_1, node_2, _ = nodes
+    connection_store = ConnectionStore()
+    # nodes in descending order
+    connection_store.add_connection(node_2, node_1, HubWiFi(), Mesh(), 'conn_12')
+
+    assert [c.connection for c in connection_store.get_connections_for_interface(node_2, HubWiFi())] == ['conn_12']
+    assert [c.connection for c in connection_store.get_connections_for_interface(node_1, Mesh())] == ['conn_12']
+    assert connection_store.get_connections_for_interface(node_1, HubWiFi()) == []
+    assert connection_store.get_connection_details(node_1, node_2, Mesh(), HubWiFi()).connection == 'conn_12'
+
+    # the rebuilt indexes are the same
+    connection_store._build_indexes()
+    assert [c.connection for c in connection_store.get_connections_for_interface(node_2, HubWiFi())] == ['conn_12']
+    assert connection_store.get_connections_for_interface(node_1, HubWiFi()) == []
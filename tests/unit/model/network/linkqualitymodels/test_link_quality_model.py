@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+
+from miniworld.model.network.linkqualitymodels.LinkQualityModelRange import LinkQualityModelRange, \
+    LinkQualityModelWiFiExponential, LinkQualityModelWiFiLinear
+
+
+@pytest.mark.parametrize('link_quality_model_type',
+                         (LinkQualityModelRange, LinkQualityModelWiFiLinear, LinkQualityModelWiFiExponential))
+def test_lookup_table(link_quality_model_type):
+    link_quality_model = link_quality_model_type()
+    link_quality_model_lookup_table = link_quality_model_type(lookup_table=True)
+    distances = [0, 0.4, 1.6, 10.2, link_quality_model.max_connected_distance - 1,
+                 link_quality_model.max_connected_distance + 100.5, -1]
+
+    connected, link_qualities = link_quality_model_lookup_table.distances_2_link_qualities(np.array(distances))
+    for distance, batch_connected, batch_link_quality in zip(distances, connected, link_qualities):
+        expected = link_quality_model.distance_2_link_quality(distance)
+        assert link_quality_model_lookup_table.distance_2_link_quality(distance) == expected
+        assert (batch_connected, batch_link_quality) == expected
@@ -0,0 +1,24 @@
+import numpy as np
+
+from miniworld.model.spatial.GridIndex import GridIndex
+
+
+def test_get_candidate_pairs_contains_all_close_pairs():
+    random = np.random.RandomState(0)
+    coordinates = random.uniform(-500, 500, size=(200, 2))
+    max_distance = 50
+
+    xs, ys = GridIndex(max_distance).get_candidate_pairs(coordinates)
+    candidates = set(zip(xs.tolist(), ys.tolist()))
+
+    assert all(x < y for x, y in candidates)
+    assert len(candidates) < 200 * 199 / 2
+    for x in range(len(coordinates)):
+        for y in range(x + 1, len(coordinates)):
+            if np.linalg.norm(coordinates[x] - coordinates[y]) < max_distance:
+                assert (x, y) in candidates
+
+
+def test_get_candidate_pairs_empty():
+    xs, ys = GridIndex(1).get_candidate_pairs(np.zeros((0, 2)))
+    assert not len(xs) and not len(ys)
@@ -0,0 +1,16 @@
+import numpy as np
+import pytest
+
+from miniworld.model.spatial.Location import Location, get_distance_matrix_in_m
+
+
+def test_get_distance_matrix_in_m():
+    locations = [Location(50.8 + i * 0.0001, 8.77 + i * 0.0002) for i in range(4)]
+    distances = get_distance_matrix_in_m(locations)
+
+    for x in range(len(locations)):
+        for y in range(len(locations)):
+            if x < y:
+                assert distances[x, y] == pytest.approx(locations[x].get_distance_in_m(locations[y]))
+            else:
+                assert np.isnan(distances[x, y])
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import os
+import shlex
+from io import StringIO
+
+import pytest
+
+from miniworld.repl.AsyncCommandRunner import AsyncCommandRunner
+from miniworld.repl.errors import REPLConnectionClosed, REPLUnexpectedResult
+from miniworld.util import ConcurrencyUtil
+
+SHELL_PROMPT = "root@OpenWrt:/# "
+
+
+class FakeREPLable(object):
+
+    def __init__(self, path_uds_socket):
+        self.path_uds_socket = path_uds_socket
+
+    def render_script_from_flo(self, flo, **kwargs):
+        flo.seek(0)
+        return flo.read()
+
+
+async def fake_shell(reader, writer):
+    # echo each command and print the shell prompt
+    exit_code = 0
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        cmd = line.decode().strip()
+        if cmd == "exit":
+            break
+        if cmd.startswith("printf"):
+            # the marker of the pipelined mode
+            _, _, marker, idx, _ = shlex.split(cmd)
+            writer.write(("\r\n%s_%s_%d\r\n" % (marker, idx, exit_code) + SHELL_PROMPT).encode())
+            continue
+        exit_code = 1 if cmd == "false" else 0
+        output = "%s\nexit code:%d" % (cmd, exit_code) if cmd else ""
+        writer.write((output + "\n" + SHELL_PROMPT).encode())
+        await writer.drain()
+    writer.close()
+
+
+def run_commands(tmpdir, commands_per_node, return_value_checker=None, pipelined=False):
+    async def main():
+        paths = [os.path.join(str(tmpdir), "node_%d.sock" % idx) for idx in range(len(commands_per_node))]
+        servers = [await asyncio.start_unix_server(fake_shell, path=path) for path in paths]
+        try:
+            return await asyncio.gather(*[
+                AsyncCommandRunner(FakeREPLable(path), 5, StringIO(commands),
+                                   brief_logger=logging.getLogger("test"), shell_prompt=SHELL_PROMPT,
+                                   return_value_checker=return_value_checker, pipelined=pipelined).run()
+                for path, commands in zip(paths, commands_per_node)])
+        finally:
+            for server in servers:
+                server.close()
+
+    return ConcurrencyUtil.run_coroutines([main()])[0]
+
+
+def test_async_command_runner(tmpdir):
+    results = run_commands(tmpdir, ["ifconfig\nuptime", "hostname"])
+    assert results == [["ifconfig\nexit code:0\n" + SHELL_PROMPT, "uptime\nexit code:0\n" + SHELL_PROMPT],
+                       ["hostname\nexit code:0\n" + SHELL_PROMPT]]
+
+
+def test_async_command_runner_return_value_checker(tmpdir):
+    def return_value_checker(cmd, res):
+        if "exit code:0" not in res:
+            raise ValueError(cmd)
+
+    with pytest.raises(REPLUnexpectedResult):
+        run_commands(tmpdir, ["true", "false"], return_value_checker=return_value_checker)
+
+
+def test_async_command_runner_pipelined(tmpdir):
+    commands = ["echo %d" % idx for idx in range(100)]
+    results = run_commands(tmpdir, ['\n'.join(commands)], pipelined=True)[0]
+    assert len(results) == 100
+    for idx, res in enumerate(results):
+        assert res.endswith("echo %d\nexit code:0\n%s" % (idx, SHELL_PROMPT))
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_async_command_runner_connection_closed(tmpdir, pipelined):
+    with pytest.raises(REPLConnectionClosed):
+        run_commands(tmpdir, ["uptime\nexit\nhostname"], pipelined=pipelined)
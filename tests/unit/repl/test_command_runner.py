@@ -0,0 +1,109 @@
+import logging
+import shlex
+import socket
+import threading
+import time
+from io import StringIO
+
+import pytest
+
+from miniworld.repl.CommandRunner import CommandRunner
+from miniworld.repl.errors import REPLConnectionClosed
+from miniworld.util.NetUtil import Timeout
+
+SHELL_PROMPT = "root@OpenWrt:/# "
+
+
+class FakeREPLable(object):
+
+    def __init__(self, sock=None):
+        self.sock = sock
+
+    def wait_until_uds_reachable(self, return_sock=False):
+        return self.sock
+
+    def render_script_from_flo(self, flo, **kwargs):
+        flo.seek(0)
+        return flo.read()
+
+
+def fake_shell(sock):
+    # echo each command, answer the marker of the pipelined mode and print the shell prompt
+    exit_code = 0
+    with sock, sock.makefile("rb") as f:
+        for line in f:
+            cmd = line.decode().strip()
+            if cmd == "exit":
+                break
+            if not cmd:
+                sock.sendall(("\n" + SHELL_PROMPT).encode())
+            elif cmd.startswith("printf"):
+                _, _, marker, idx, _ = shlex.split(cmd)
+                sock.sendall(("\r\n%s_%s_%d\r\n" % (marker, idx, exit_code) + SHELL_PROMPT).encode())
+            else:
+                exit_code = 1 if cmd == "false" else 0
+                sock.sendall((cmd + "\n").encode())
+
+
+@pytest.fixture
+def socket_pair():
+    sock, sock_shell = socket.socketpair()
+    yield sock, sock_shell
+    sock.close()
+    sock_shell.close()
+
+
+def create_command_runner(sock, commands, timeout=5):
+    command_runner = CommandRunner(FakeREPLable(sock), timeout, StringIO('\n'.join(commands)),
+                                   brief_logger=logging.getLogger("test"), shell_prompt=SHELL_PROMPT, pipelined=True)
+    command_runner.sock = sock
+    return command_runner
+
+
+def test_execute_script_pipelined(socket_pair):
+    sock, sock_shell = socket_pair
+    threading.Thread(target=fake_shell, args=(sock_shell,), daemon=True).start()
+
+    commands = ["echo %d" % idx for idx in range(100)]
+    results = list(create_command_runner(sock, commands).execute_script_pipelined())
+    assert len(results) == 100
+    for idx, res in enumerate(results):
+        assert res.endswith("echo %d\n" % idx)
+
+
+def test_execute_script_pipelined_exit_codes(socket_pair):
+    sock, sock_shell = socket_pair
+    threading.Thread(target=fake_shell, args=(sock_shell,), daemon=True).start()
+
+    command_runner = create_command_runner(sock, ["true", "false", "true"])
+    assert len(list(command_runner.execute_script_pipelined())) == 3
+    assert command_runner.exit_codes == [0, 1, 0]
+
+
+def test_execute_script_pipelined_eof(socket_pair):
+    sock, sock_shell = socket_pair
+    threading.Thread(target=fake_shell, args=(sock_shell,), daemon=True).start()
+
+    # the shell exits in the middle of the script
+    with pytest.raises(REPLConnectionClosed):
+        list(create_command_runner(sock, ["uptime", "exit", "hostname"])())
+
+
+def test_execute_script_pipelined_timeout(socket_pair):
+    sock, sock_shell = socket_pair
+
+    def trickle():
+        # output which never contains the marker must not extend the timeout
+        try:
+            while True:
+                sock_shell.sendall(b".")
+                time.sleep(0.05)
+        except OSError:
+            pass
+
+    threading.Thread(target=trickle, daemon=True).start()
+
+    t_start = time.time()
+    with pytest.raises(Timeout):
+        list(create_command_runner(sock, ["uptime"], timeout=0.3).execute_script_pipelined())
+    assert time.time() - t_start < 2
@@ -0,0 +1,17 @@
+import pytest
+
+from miniworld.model.collections.DistanceMatrix import DistanceMatrixDict
+from miniworld.rpc.Protocol import BinaryProtocol
+
+
+@pytest.mark.parametrize("compression", ("none", "zlib"))
+def test_binary_protocol(compression):
+    protocol = BinaryProtocol(compression)
+    distance_matrix = DistanceMatrixDict({(1, 2): 1.5, (1, 3): -1, (2, 65535): 100.25})
+
+    data = protocol.serialize({"entries": protocol.encode_distance_matrix(distance_matrix)})
+    decoded = protocol.decode_distance_matrix(protocol.deserialize(data)["entries"])
+    assert dict(decoded.items()) == dict(distance_matrix.items())
+
+    with pytest.raises(ValueError):
+        protocol.encode_distance_matrix({(1, 65536): 1.0})
@@ -0,0 +1,41 @@
+from miniworld.model.collections.DistanceMatrix import DistanceMatrixDict
+from miniworld.rpc.Protocol import JSONProtocol
+from miniworld.rpc.zeromq.DistanceMatrixDelta import DistanceMatrixDeltaDecoder, DistanceMatrixDeltaEncoder, \
+    MSG_KEY_ENTRIES, MSG_KEY_KEYFRAME, MSG_KEY_REMOVED
+
+
+def test_distance_matrix_delta():
+    protocol = JSONProtocol()
+    encoder = DistanceMatrixDeltaEncoder(keyframe_interval=5, protocol=protocol)
+    decoder = DistanceMatrixDeltaDecoder(protocol)
+
+    def publish(distance_matrix):
+        msg = protocol.deserialize(protocol.serialize(encoder.encode(DistanceMatrixDict(distance_matrix))))
+        return msg, dict(decoder.decode(msg).items())
+
+    msg, distance_matrix = publish({(1, 2): 1.0, (1, 3): 2.0})
+    assert msg[MSG_KEY_KEYFRAME]
+    assert distance_matrix == {(1, 2): 1.0, (1, 3): 2.0}
+
+    # only the changes are sent
+    msg, distance_matrix = publish({(1, 2): 1.0, (1, 3): 2.5, (2, 3): 3.0})
+    assert not msg[MSG_KEY_KEYFRAME]
+    assert len(msg[MSG_KEY_ENTRIES]) == 2
+    assert distance_matrix == {(1, 2): 1.0, (1, 3): 2.5, (2, 3): 3.0}
+
+    msg, distance_matrix = publish({(1, 2): 1.0, (1, 3): 2.5})
+    assert msg[MSG_KEY_REMOVED] == [[2, 3]]
+    assert distance_matrix == {(1, 2): 1.0, (1, 3): 2.5}
+    assert decoder.synced
+
+    # a subscriber which missed a delta resyncs with the next keyframe
+    encoder.encode(DistanceMatrixDict({(1, 2): 5.0}))
+    msg, distance_matrix = publish({(1, 2): 5.0, (1, 3): 6.0})
+    assert not msg[MSG_KEY_KEYFRAME]
+    assert not decoder.synced
+    assert distance_matrix == {(1, 2): 1.0, (1, 3): 6.0}
+
+    msg, distance_matrix = publish({(1, 2): 5.0, (1, 3): 6.0})
+    assert msg[MSG_KEY_KEYFRAME]
+    assert decoder.synced
+    assert distance_matrix == {(1, 2): 5.0, (1, 3): 6.0}
@@ -0,0 +1,140 @@
+import socket
+import threading
+
+import pytest
+import zmq
+
+from miniworld.Config import config
+from miniworld.model.collections.DistanceMatrix import DistanceMatrixDict
+from miniworld.model.singletons.Singletons import singletons
+from miniworld.rpc import Protocol
+from miniworld.rpc.zeromq import States
+from miniworld.rpc.zeromq.StepWindow import StepWindow
+from miniworld.rpc.zeromq.ZeroMQProtoClient import ZeroMQClientSub
+from miniworld.rpc.zeromq.ZeroMQProtoServer import ZeroMQCServerPubSub
+
+
+class FakeSimulationManager(object):
+
+    def __init__(self):
+        self.cnt_steps = 0
+        self.aborted = False
+
+    def step(self, steps, distance_matrix=None):
+        self.cnt_steps += steps
+
+    def abort(self):
+        self.aborted = True
+
+    def get_local_distance_matrix_to_servers(self, distance_matrix):
+        return distance_matrix
+
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def server_and_client(monkeypatch):
+    for port in ("PORT_DEFAULT_SERVICE", "PORT_PUB_RESET_SERVICE", "PORT_PUB_SERVICE"):
+        monkeypatch.setattr(Protocol, port, get_free_port())
+    monkeypatch.setattr(config, "get_zeromq_max_step_lag", lambda: 1)
+    monkeypatch.setattr(singletons, "protocol", Protocol.factory()())
+    monkeypatch.setattr(singletons, "simulation_manager", FakeSimulationManager())
+
+    server = ZeroMQCServerPubSub()
+    client = ZeroMQClientSub("127.0.0.1")
+    yield server, client
+
+    for sock in (server.router_socket, server.reset_socket, server.pub_socket,
+                 client.svc, client.reset_socket, client.sub_socket):
+        sock.close(linger=0)
+    client.context.term()
+
+
+def test_reset_with_report_in_flight(server_and_client):
+    server, client = server_and_client
+    server.cnt_peers = 1
+    server.step_window = StepWindow(1, 1)
+    client.server_id = 1
+
+    # the reset registers again at the server
+    registered = threading.Event()
+
+    def start(tunnel_ip):
+        client.send_no_server_id(States.STATE_REGISTER)
+        registered.set()
+
+    client.start = start
+
+    errors = []
+
+    def run_loop():
+        try:
+            client.enter_pipelined_run_loop()
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=run_loop, daemon=True)
+    thread.start()
+
+    # publish until the subscriber reports a step (a subscriber misses the messages before it is connected)
+    while not server.router_socket.poll(50):
+        server.send_distance_matrix(DistanceMatrixDict({(1, 2): 1.0}))
+
+    # the report is not acknowledged before the reset
+    server.send_reset()
+    assert server.step_window is None
+    while not registered.wait(0.05) and thread.is_alive():
+        server.reset_socket.send(b'reset')
+    thread.join(5)
+
+    assert not errors
+    assert singletons.simulation_manager.aborted
+
+    # the queued report has been drained before the reset, later reports are ignored in the new simulation
+    expecter = server.get_expecter_state(States.STATE_REGISTER, 0)
+    while True:
+        assert server.router_socket.poll(5000)
+        if expecter.expect():
+            break
+
+
+def send_report(server, state, *parts):
+    req_socket = server.context.socket(zmq.REQ)
+    req_socket.connect("tcp://127.0.0.1:%d" % Protocol.PORT_DEFAULT_SERVICE)
+    req_socket.send_multipart([singletons.protocol.serialize(part) for part in (state,) + parts])
+    return req_socket
+
+
+def test_reset_drains_queued_report(server_and_client):
+    server, _ = server_and_client
+    server.step_window = StepWindow(1, 1)
+    req_socket = send_report(server, States.STATE_DISTANCE_MATRIX, 1, 3)
+    try:
+        assert server.router_socket.poll(5000)
+        server.send_reset()
+        # the report has been acknowledged before the reset was published
+        assert req_socket.poll(5000)
+        assert singletons.protocol.deserialize(req_socket.recv()) == ''
+    finally:
+        req_socket.close(linger=0)
+
+
+def test_ignored_report_is_acked(server_and_client):
+    server, _ = server_and_client
+    server.cnt_peers = 1
+    server.step_window = StepWindow(1, 1)
+    # the report has the wrong number of parts
+    req_socket = send_report(server, States.STATE_DISTANCE_MATRIX, 1)
+    try:
+        assert server.router_socket.poll(5000)
+        server.handle_step_reports()
+        # the client does not block waiting for the acknowledgement
+        assert req_socket.poll(5000)
+        assert singletons.protocol.deserialize(req_socket.recv()) == ''
+        assert server.step_window.get_lag() == 0
+    finally:
+        req_socket.close(linger=0)
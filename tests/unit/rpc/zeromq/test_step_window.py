@@ -0,0 +1,22 @@
+from miniworld.rpc.zeromq.StepWindow import StepWindow
+
+
+def test_step_window():
+    step_window = StepWindow(max_lag=2, cnt_peers=2)
+    assert not step_window.is_full()
+
+    step_window.published = 2
+    # not every server reported yet
+    step_window.report(1, 2)
+    assert step_window.is_full()
+
+    step_window.report(2, 1)
+    assert step_window.get_lag() == 1
+    assert not step_window.is_full()
+
+    # coalesced reports never go back
+    step_window.report(2, 0)
+    assert step_window.get_min_applied() == 1
+
+    step_window.published = 3
+    assert step_window.is_full()
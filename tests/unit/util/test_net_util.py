@@ -0,0 +1,28 @@
+import re
+import socket
+
+from miniworld.util.NetUtil import SocketExpect
+
+
+def test_socket_expect_chunked_read():
+    sock_read, sock_write = socket.socketpair()
+    try:
+        boot_log = ("x" * 100 + "\n") * 50 + "äöü\nPlease press Enter to activate this console.\n"
+        sock_write.sendall(boot_log.encode("utf-8"))
+
+        regex = re.compile("Please press Enter", flags=re.MULTILINE | re.DOTALL)
+        windows = []
+
+        def check_fun(buf, window):
+            windows.append(window)
+            return regex.search(window) is not None
+
+        # split the multibyte characters and the boot signal between the chunks
+        expect = SocketExpect(sock_read, check_fun, read_buf_size=7, timeout=5, search_window=32)
+        output = expect.read()
+        assert boot_log.startswith(output)
+        assert "äöü\nPlease press Enter" in output
+        assert max(len(window) for window in windows) <= 32 + 7
+    finally:
+        sock_read.close()
+        sock_write.close()
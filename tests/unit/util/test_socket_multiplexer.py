@@ -0,0 +1,82 @@
+import re
+import socket
+
+import pytest
+
+from miniworld.util import SocketMultiplexer as SocketMultiplexer_module
+from miniworld.util.NetUtil import Timeout
+from miniworld.util.SocketMultiplexer import SocketMultiplexer, SocketMultiplexerError
+
+
+def test_socket_multiplexer():
+    multiplexer = SocketMultiplexer()
+    socket_pairs = [socket.socketpair() for _ in range(3)]
+    try:
+        regex = re.compile("root@OpenWrt")
+
+        def check_fun(buf, window):
+            return regex.search(window)
+
+        boot_future, shell_future, timeout_future = [
+            multiplexer.expect(sock_read, check_fun, timeout=5 if idx < 2 else 0.1, search_window=64)
+            for idx, (sock_read, _) in enumerate(socket_pairs)]
+
+        socket_pairs[1][1].sendall(b"echo foo\nfoo\nroot@OpenWrt:/# ")
+        socket_pairs[0][1].sendall(b"booting ...\n")
+        socket_pairs[0][1].sendall(b"procd: - init complete -\nroot@OpenWrt")
+
+        assert shell_future.result(timeout=5) == "echo foo\nfoo\nroot@OpenWrt:/# "
+        assert boot_future.result(timeout=5) == "booting ...\nprocd: - init complete -\nroot@OpenWrt"
+        with pytest.raises(Timeout):
+            timeout_future.result(timeout=5)
+
+        # the socket can be used again
+        future = multiplexer.expect(socket_pairs[1][0], check_fun, timeout=5)
+        socket_pairs[1][1].sendall(b"root@OpenWrt")
+        assert future.result(timeout=5) == "root@OpenWrt"
+    finally:
+        multiplexer.reset()
+        for sock_read, sock_write in socket_pairs:
+            sock_read.close()
+            sock_write.close()
+
+
+def test_send_data(monkeypatch):
+    monkeypatch.setattr(SocketMultiplexer_module, "SEND_DATA_INTERVAL", 0.05)
+    multiplexer = SocketMultiplexer()
+    sock_read, sock_write = socket.socketpair()
+    try:
+        future = multiplexer.expect(sock_read, lambda buf, window: "login" in window, timeout=5, send_data=b"\n")
+
+        # the data is sent periodically until the expectation is met
+        received = b""
+        sock_write.settimeout(5)
+        while received.count(b"\n") < 2:
+            received += sock_write.recv(64)
+        assert set(received) == {ord("\n")}
+
+        sock_write.sendall(b"login")
+        assert future.result(timeout=5) == "login"
+    finally:
+        multiplexer.reset()
+        sock_read.close()
+        sock_write.close()
+
+
+def test_reset_fails_pending_expectations():
+    multiplexer = SocketMultiplexer()
+    sock_read, sock_write = socket.socketpair()
+    try:
+        future = multiplexer.expect(sock_read, lambda buf, window: False)
+        multiplexer.reset()
+        with pytest.raises(SocketMultiplexerError):
+            future.result(timeout=5)
+
+        # the multiplexer is started again by the next expectation
+        future = multiplexer.expect(sock_read, lambda buf, window: "foo" in window, timeout=5)
+        sock_write.sendall(b"foo")
+        assert future.result(timeout=5) == "foo"
+    finally:
+        multiplexer.reset()
+        sock_read.close()
+        sock_write.close()